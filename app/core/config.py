@@ -2,6 +2,7 @@ from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 import os
 import json
+from typing import Optional
 
 load_dotenv()
 
@@ -10,18 +11,95 @@ class AppConfig(BaseSettings):
     TWITCH_CLIENT_SECRET: str = ""
     TWITCH_APP_ACCESS_TOKEN: str = ""
     TWITCH_CHAT_REFRESH_TOKEN: str = ""
+    TWITCH_CHAT_TOKEN: str = ""
+    TWITCH_TOKEN_REFRESH_MARGIN_SECONDS: float = 300.0  # Refresh this long before the token expires
+
+    HTTP_POOL_LIMIT: int = 32
+    HTTP_POOL_LIMIT_PER_HOST: int = 16
+    HELIX_USER_CACHE_TTL_SECONDS: float = 3600.0
+    HELIX_CHANNEL_CACHE_TTL_SECONDS: float = 300.0
+    HELIX_BATCH_WINDOW_MS: float = 10.0  # Lookups arriving within this window share one request
     TWITCH_BROADCASTER_ID: str = ""
+    TWITCH_EVENTSUB_ENABLED: bool = False  # Run the EventSub conduit (needs TWITCH_BROADCASTER_ID)
+    TWITCH_CHAT_REPLIES_ENABLED: bool = False  # Also subscribe to channel.chat.message, so chat mentions get LLM replies
+    TWITCH_BOT_USER_ID: str = ""  # Account that reads chat over EventSub; defaults to the broadcaster
+    TWITCH_EVENTSUB_WS_URL: str = "wss://eventsub.wss.twitch.tv/ws"
+    TWITCH_API_URL: str = "https://api.twitch.tv/helix"
+    TWITCH_OAUTH_URL: str = "https://id.twitch.tv/oauth2"  # Overridable so benchmarks can point at local fakes
     TWITCH_NICKNAME: str = ""
 
     OPENAI_API_KEY: str = ""
 
     PIPER_TTS_CMD: str = "piper --model default.onnx --output_file out.wav"
-    WHISPER_MODEL: str = "base"
+    WHISPER_MODEL: str = "base"  # faster-whisper size or path; benchmarks use tiny.en
+    INFERENCE_SOCKET_PATH: str = ""  # When set, Whisper runs in the shared server (python -m app.services.inference_server)
+    INFERENCE_WORKERS: int = 2  # Concurrent transcriptions in the inference server
     EVENTSUB_SECRET: str = ""
 
     PIPER_PATH: str = "/home/mournian/piper/piper"
     PIPER_VOICE_MODEL: str = "/home/mournian/piper/voices/glados.onnx"
 
+    TTS_INITIAL_VOLUME_REDUCTION_DB: float = 0.0
+    TTS_SPEECH_SPEED: float = 1.0
+    TTS_PITCH_SEMITONES: float = 0.0
+    TTS_OUTPUT_SAMPLE_RATE: int = 44100
+    TTS_NORMALIZE_DBFS: Optional[float] = None  # e.g. -18.0 to even out loudness between replies
+    TTS_LIPSYNC_ENABLED: bool = True
+    TTS_LIPSYNC_FRAME_MS: int = 15
+    TTS_PARALLEL_SENTENCES: bool = False  # One Piper process per sentence, reassembled in order
+    TTS_PARALLEL_WORKERS: int = 0  # 0 = one per CPU core
+    TTS_MIN_SENTENCE_CHARS: int = 40  # Shorter sentences are merged so Piper start-up doesn't dominate
+    TTS_TEXT_CACHE_SIZE: int = 1024  # Normalized lines kept in the LRU cache
+    TTS_EXTRA_EMOTES: str = ""  # Comma-separated channel emotes to strip before speaking, e.g. "mournHype,mournLurk"
+
+    ARTIFACT_MEMORY_LIMIT_MB: int = 64
+    ARTIFACT_DISK_LIMIT_MB: int = 512
+    ARTIFACT_TTL_SECONDS: float = 600.0
+    WEB_CONCURRENCY: int = 1  # uvicorn worker count (uvicorn reads it too); above 1, artifacts are shared through the spill dir
+    ARTIFACT_SPILL_DIR: str = ""  # Defaults to /dev/shm/penny-artifacts when tmpfs is available; each process uses a <pid> subdirectory
+
+    WS_MAX_QUEUE: int = 256  # Outbound messages buffered per Unity/overlay client
+    WS_SLOW_CONSUMER_POLICY: str = "drop_noncritical"  # drop_oldest | drop_noncritical | disconnect
+    WS_SEND_TIMEOUT_SECONDS: float = 5.0
+
+    EVENTSUB_DEDUPE_WINDOW_SECONDS: float = 600.0  # Twitch may redeliver a message_id within ~10 minutes
+    EVENTSUB_DEDUPE_MAX_ENTRIES: int = 10000
+
+    CHAT_USER_COOLDOWN_SECONDS: float = 15.0
+    CHAT_GLOBAL_COOLDOWN_SECONDS: float = 3.0  # Minimum gap between chat-triggered responses
+    CHAT_QUEUE_MAX: int = 32
+    CHAT_QUEUE_MAX_AGE_SECONDS: float = 45.0  # Older queued messages are no longer worth answering
+
+    EVENT_AGGREGATION_QUIET_SECONDS: float = 2.0  # Flush a burst once it has been quiet this long
+    EVENT_AGGREGATION_MAX_SECONDS: float = 10.0  # ...or this long after its first event
+
+    TARGET_BOT_NAMES: str = "penny,penney,pennie"  # Names (and Whisper misspellings) that address the bot
+    TARGET_STREAMER_NAME: str = "Mournian"  # Speaker recorded for the streamer's own transcripts
+    TARGET_SKIP_CONFIDENCE: float = 0.6  # Skip the LLM when a line is this confidently not for Penny
+    TARGET_MODEL_PATH: str = ""  # JSON weights from target_detection_service.train_from_log
+    TARGET_LOG_PATH: str = ""  # Append scored lines as JSONL, for labelling and training
+
+    TRACE_EXPORT_PATH: str = ""  # Append finished request traces as OTLP/JSON lines
+    TRACE_OTLP_ENDPOINT: str = ""  # e.g. http://127.0.0.1:4318/v1/traces
+    TRACE_SERVICE_NAME: str = "penny-api"
+
+    LOOP_WATCHDOG_ENABLED: bool = True
+    LOOP_WATCHDOG_INTERVAL_MS: float = 50.0  # Heartbeat period used to measure event-loop lag
+    LOOP_LAG_THRESHOLD_MS: float = 100.0  # Lag at which the blocking stack is sampled and kept
+    LOOP_STALLS_KEPT: int = 50
+    ADMIN_TOKEN: str = ""  # /admin endpoints require a matching X-Admin-Token header; they return 403 while unset
+
+    CONVERSATION_LOG_DIR: str = ""  # Append-only history that survives restarts, e.g. "data/conversation"; single worker only (others keep memory-only history)
+    CONVERSATION_SEGMENT_MB: int = 8
+    CONVERSATION_MAX_SEGMENTS: int = 0  # 0 keeps every segment; otherwise fully summarized old ones are deleted
+    SUMMARY_ENABLED: bool = False  # Fold turns that leave the prompt history into a "story so far" (one SUMMARY_MODEL call per batch)
+    SUMMARY_MODEL: str = "gpt-4o-mini"
+    SUMMARY_BATCH_TURNS: int = 4  # Aged-out turns per summarizer call
+    SUMMARY_MAX_CHARS: int = 1200
+
+    STARTUP_WARMUP: bool = True  # Run one Whisper and one Piper inference before reporting ready
+    STARTUP_RETRY_SECONDS: float = 30.0  # How often failed Whisper/Piper/LLM startups are retried; 0 disables retries
+
     FASTAPI_URL_TRANSCRIBE: str = "http://127.0.0.1:7002/transcribe"
 
     class Config:
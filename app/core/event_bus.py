@@ -1,9 +1,13 @@
 import asyncio
+import contextvars
 import logging
 from collections import defaultdict
+from contextlib import nullcontext
 from typing import Callable, Type, TypeVar, DefaultDict, List, Awaitable, Any, Coroutine
 
 from app.core.events import BaseEvent
+from app.core.tracing import current_trace, span
+from app.core.turns import TurnManager, current_turn
 
 logger = logging.getLogger(__name__)
 T = TypeVar("T", bound=BaseEvent)
@@ -36,8 +40,17 @@ class EventBus:
             
     async def publish(self, event: BaseEvent):
         event_type = type(event)
+        turn = current_turn()
+        if event.turn_scoped and turn is not None and turn.cancelled:
+            # Output of a turn that was barged in on; nobody should hear or act on it any more
+            TurnManager.get_instance().record(f"dropped.{event_type.__name__}")
+            return
         logger.debug(f"Publishing event: {event_type.__name__} - {event}")
+        # Subscriber tasks inherit the caller's context, so a request's trace follows the hop
+        with span(f"bus.{event_type.__name__}") if current_trace() else nullcontext():
+            await self._dispatch(event_type, event)
 
+    async def _dispatch(self, event_type: Type[BaseEvent], event: BaseEvent):
         # Handle synchronous subscribers
         for callback in self._subscribers[event_type]:
             try:
@@ -46,7 +59,7 @@ class EventBus:
                 # For simplicity here, we call directly, but this is a point of caution for long-running sync code.
                 # If callback is for UI, it must be thread-safe or scheduled on UI thread.
                 loop = asyncio.get_event_loop()
-                await loop.run_in_executor(None, callback, event) 
+                await loop.run_in_executor(None, contextvars.copy_context().run, callback, event)
                 # callback(event) # Direct call - BE CAREFUL if it blocks
             except Exception as e:
                 logger.error(f"Error in sync subscriber {callback.__name__} for {event_type.__name__}: {e}", exc_info=True)
@@ -1,9 +1,9 @@
 from dataclasses import dataclass, field
-from typing import Any, Optional, List, Dict
+from typing import Any, ClassVar, Optional, List, Dict
 
 @dataclass
 class BaseEvent:
-    pass
+    turn_scoped: ClassVar[bool] = False # Dropped by the EventBus once the turn that produced it is cancelled
 
 @dataclass
 class AudioRecordedEvent(BaseEvent):
@@ -22,9 +22,11 @@ class TranscriptionAvailableEvent(BaseEvent):
     is_final: bool = True
     audio_path: Optional[str] = None  
     error: Optional[str] = None
+    query_llm: bool = True  # False when the caller replies itself (VoicePipeline), so nothing gates it
 
 @dataclass
 class AIQueryEvent(BaseEvent):
+    turn_scoped: ClassVar[bool] = True
     def __init__(self, input_text: str, instruction: Optional[str] = None, include_vision_context: bool = False, source: Optional[str] = None):
         self.input_text = input_text
         self.instruction = instruction
@@ -33,11 +35,13 @@ class AIQueryEvent(BaseEvent):
         
 @dataclass
 class AIResponseEvent(BaseEvent):
+    turn_scoped: ClassVar[bool] = True
     text_to_speak: str
     original_query: Optional[str] = None
 
 @dataclass
 class SpeakRequestEvent(BaseEvent):
+    turn_scoped: ClassVar[bool] = True
     text: str
     collab_mode: bool = False
 
@@ -61,10 +65,34 @@ class TwitchUserEvent(BaseEvent): # For subs, raids etc.
 class AudioRMSVolumeEvent(BaseEvent): # For VTuber mouth movement
     rms_volume: float # Normalized 0-1 or raw RMS
 
+@dataclass
+class TTSAudioChunkEvent(BaseEvent): # Synthesized speech on its way to Unity
+    turn_scoped: ClassVar[bool] = True
+    utterance_id: str
+    seq: int
+    sample_rate: int
+    pcm: bytes # Mono int16 little-endian
+    is_final: bool = False
+
+@dataclass
+class LipSyncEnvelopeEvent(BaseEvent): # Precomputed mouth movement for a TTS utterance
+    turn_scoped: ClassVar[bool] = True
+    utterance_id: str
+    start_ms: float # Offset of values[0] from the start of the utterance audio
+    frame_ms: int
+    values: List[float] # Normalized 0-1, one per frame
+    is_final: bool = False
+
 @dataclass
 class PTTRecordingStateEvent(BaseEvent):
     is_recording: bool
 
+@dataclass
+class TurnCancelledEvent(BaseEvent): # Barge-in: these turns' audio should stop
+    turn_ids: List[str]
+    utterance_ids: List[str]
+    reason: str
+
 @dataclass
 class AppShutdownEvent(BaseEvent):
     pass
@@ -100,6 +128,7 @@ class ExternalTranscriptEvent(BaseEvent):
 
 @dataclass
 class EmotionTagEvent(BaseEvent):
+    turn_scoped: ClassVar[bool] = True
     tone: str
     emotion: str
 
@@ -0,0 +1,35 @@
+# app/core/inference_protocol.py
+"""
+Framing for the local inference server's Unix socket.
+
+Every message is a u32 big-endian length followed by a msgpack map. Requests carry
+an "op" ("ping" or "transcribe"); responses carry the result fields or "error".
+Audio never travels over the socket: the client writes it to a shared-memory block
+and sends the block's name, size and kind:
+
+    "f32"      float32 mono samples at 16 kHz
+    "encoded"  a complete audio file (WAV, MP3, ...) for faster-whisper to decode
+"""
+
+import asyncio
+import struct
+from typing import Any, Dict
+
+import msgpack
+
+LENGTH = struct.Struct(">I")
+MAX_MESSAGE_BYTES = 1 << 20  # Messages are small control maps; anything bigger is a protocol error
+
+AUDIO_F32 = "f32"
+AUDIO_ENCODED = "encoded"
+
+async def read_message(reader: asyncio.StreamReader) -> Dict[str, Any]:
+    """Reads one message; raises asyncio.IncompleteReadError at EOF."""
+    (length,) = LENGTH.unpack(await reader.readexactly(LENGTH.size))
+    if length > MAX_MESSAGE_BYTES:
+        raise ValueError(f"Inference message of {length} bytes exceeds {MAX_MESSAGE_BYTES}.")
+    return msgpack.unpackb(await reader.readexactly(length), raw=False)
+
+def write_message(writer: asyncio.StreamWriter, message: Dict[str, Any]):
+    body = msgpack.packb(message, use_bin_type=True)
+    writer.write(LENGTH.pack(len(body)) + body)
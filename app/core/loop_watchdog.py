@@ -0,0 +1,190 @@
+# app/core/loop_watchdog.py
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+from collections import Counter, deque
+from types import FrameType
+from typing import Optional
+
+from app.core.config import settings
+from app.core.tracing import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+MAX_STACK_DEPTH = 64
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", code.co_filename)
+    return f"{module}:{code.co_name}:{frame.f_lineno}"
+
+def collapse_stack(frame: Optional[FrameType]) -> str:
+    """Root-first 'a;b;c' stack, the input format of flamegraph.pl and speedscope."""
+    labels = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+class LoopWatchdog:
+    """
+    Measures event-loop lag with a heartbeat task and catches whatever is blocking it.
+
+    The heartbeat sleeps `interval` and records how late it woke up. A daemon thread
+    checks the heartbeat every `sample_interval`; once the loop has been silent for
+    longer than `threshold`, it samples the loop thread's stack until the loop comes
+    back, and the stall is kept with its most frequent stack. profile() samples the
+    loop thread (or every thread) for N seconds on demand and returns collapsed stacks.
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.05,
+        threshold: float = 0.1,
+        sample_interval: float = 0.01,
+        max_stalls: int = 50,
+    ):
+        self.interval = interval
+        self.threshold = threshold
+        self.sample_interval = sample_interval
+        self.stalls: deque[dict] = deque(maxlen=max_stalls)
+        self.lag = LatencyHistogram()
+        self.total_stalls = 0
+
+        self._loop_thread_id: Optional[int] = None
+        self._last_beat = 0.0
+        self._stall_samples: Counter = Counter()
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._profile_lock = asyncio.Lock()  # One on-demand profile at a time
+
+    async def start(self):
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.perf_counter()
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+        logger.info(f"[LoopWatchdog] Watching for stalls over {self.threshold * 1000:.0f} ms.")
+
+    async def stop(self):
+        self._stopping.set()
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._thread:
+            await asyncio.to_thread(self._thread.join, 1.0)
+            self._thread = None
+
+    async def _heartbeat(self):
+        while True:
+            before = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            lag = max(0.0, now - before - self.interval)
+            self.lag.record(lag * 1000)
+            with self._lock:
+                self._last_beat = now
+                samples, self._stall_samples = self._stall_samples, Counter()
+            if lag >= self.threshold:
+                self._record_stall(lag, samples)
+
+    def _record_stall(self, lag: float, samples: Counter):
+        self.total_stalls += 1
+        stack, hits = samples.most_common(1)[0] if samples else ("", 0)
+        self.stalls.append({
+            "at": time.time() - lag,
+            "lag_ms": round(lag * 1000, 1),
+            "samples": sum(samples.values()),
+            "stack": stack.split(";") if stack else [],
+            "stack_share": round(hits / sum(samples.values()), 2) if samples else 0.0,
+        })
+        where = stack.rsplit(";", 1)[-1] if stack else "unknown (stall shorter than a sample)"
+        logger.warning(f"[LoopWatchdog] Event loop blocked for {lag * 1000:.0f} ms in {where}")
+
+    def _watch(self):
+        while not self._stopping.wait(self.sample_interval):
+            with self._lock:
+                silent_for = time.perf_counter() - self._last_beat
+            # Start sampling a little early so short stalls still get a few samples
+            if silent_for < self.interval + self.threshold / 2:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = collapse_stack(frame)
+            del frame
+            with self._lock:
+                self._stall_samples[stack] += 1
+
+    def recent_stalls(self, limit: int = 20) -> list[dict]:
+        return list(self.stalls)[-limit:][::-1]
+
+    def stats(self) -> dict:
+        return {
+            "lag": self.lag.snapshot(),
+            "threshold_ms": round(self.threshold * 1000, 1),
+            "stalls_total": self.total_stalls,
+        }
+
+    def _sample_for(self, seconds: float, interval: float, all_threads: bool) -> Counter:
+        stacks: Counter = Counter()
+        own_id = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            frames = sys._current_frames()
+            for thread_id, frame in frames.items():
+                if thread_id == own_id or (not all_threads and thread_id != self._loop_thread_id):
+                    continue
+                stack = collapse_stack(frame)
+                stacks[f"{names.get(thread_id, thread_id)};{stack}" if all_threads else stack] += 1
+            del frames  # Don't keep other threads' frames (and their locals) alive between samples
+            time.sleep(interval)
+        return stacks
+
+    @property
+    def profiling(self) -> bool:
+        return self._profile_lock.locked()
+
+    async def profile(self, seconds: float, interval: float = 0.005, all_threads: bool = False) -> str:
+        """
+        Samples for `seconds` on a thread of its own and returns 'stack count' lines,
+        heaviest first. A long profile doesn't tie up a default-executor worker, and
+        callers queue behind the one that is running.
+        """
+        async with self._profile_lock:
+            loop = asyncio.get_running_loop()
+            done: asyncio.Future = loop.create_future()
+
+            def sample():
+                try:
+                    result = self._sample_for(seconds, interval, all_threads)
+                except BaseException as e:
+                    loop.call_soon_threadsafe(lambda: done.done() or done.set_exception(e))
+                else:
+                    loop.call_soon_threadsafe(lambda: done.done() or done.set_result(result))
+
+            threading.Thread(target=sample, name="loop-profiler", daemon=True).start()
+            stacks = await done
+        return "\n".join(f"{stack} {count}" for stack, count in stacks.most_common()) + "\n"
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls(
+                interval=getattr(settings, 'LOOP_WATCHDOG_INTERVAL_MS', 50) / 1000,
+                threshold=getattr(settings, 'LOOP_LAG_THRESHOLD_MS', 100) / 1000,
+                max_stalls=getattr(settings, 'LOOP_STALLS_KEPT', 50),
+            )
+        return cls._instance
@@ -0,0 +1,264 @@
+# app/core/tracing.py
+
+import asyncio
+import bisect
+import json
+import logging
+import re
+import secrets
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Log-spaced latency buckets from 0.1 ms to ~100 s, 25% apart
+BUCKET_BOUNDS_MS = [0.1 * 1.25 ** i for i in range(63)]
+MAX_PENDING_EXPORTS = 1000
+
+@dataclass
+class Span:
+    name: str
+    span_id: str
+    parent_id: Optional[str]
+    start: float  # perf_counter
+    duration: Optional[float] = None  # Seconds; None while the span is open
+    attributes: dict = field(default_factory=dict)
+
+class LatencyHistogram:
+    """Fixed log-bucket histogram; percentiles are bucket upper bounds, good to within 25%."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, ms: float):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return min(BUCKET_BOUNDS_MS[i], self.max_ms) if i < len(BUCKET_BOUNDS_MS) else self.max_ms
+        return self.max_ms
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+            "p50_ms": round(self.percentile(0.50), 2),
+            "p95_ms": round(self.percentile(0.95), 2),
+            "p99_ms": round(self.percentile(0.99), 2),
+            "max_ms": round(self.max_ms, 2),
+        }
+
+HISTOGRAMS: dict[str, LatencyHistogram] = {}
+
+def record(name: str, seconds: float):
+    histogram = HISTOGRAMS.get(name)
+    if histogram is None:
+        histogram = HISTOGRAMS[name] = LatencyHistogram()
+    histogram.record(seconds * 1000)
+
+def latency_stats() -> dict:
+    return {name: histogram.snapshot() for name, histogram in sorted(HISTOGRAMS.items())}
+
+class Trace:
+    """All spans of one request. Carried in a contextvar, so it follows awaits, tasks and EventBus hops."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.trace_id = secrets.token_hex(16)
+        self.start = time.perf_counter()
+        self.start_ns = time.time_ns()
+        self.root = Span(name, secrets.token_hex(8), None, self.start)
+        self.spans: list[Span] = []
+        self.finished = False
+
+    def server_timing(self) -> str:
+        """Finished spans summed by name, as a Server-Timing header value."""
+        totals: dict[str, float] = {}
+        for s in self.spans:
+            if s.duration is not None:
+                totals[s.name] = totals.get(s.name, 0.0) + s.duration
+        parts = [f"{_metric_name(name)};dur={seconds * 1000:.1f}" for name, seconds in totals.items()]
+        parts.append(f"total;dur={(time.perf_counter() - self.start) * 1000:.1f}")
+        return ", ".join(parts)
+
+    def finish(self):
+        if self.finished:
+            return
+        self.finished = True
+        self.root.duration = time.perf_counter() - self.start
+        record(self.name, self.root.duration)
+        exporter = OTLPExporter.get_instance()
+        if exporter.enabled:
+            exporter.export(self)
+
+    def to_otlp(self) -> list[dict]:
+        """Spans in OTLP/JSON form (the `spans` list of a ScopeSpans)."""
+        spans = []
+        for s in [self.root, *self.spans]:
+            start_ns = self.start_ns + int((s.start - self.start) * 1e9)
+            end_ns = start_ns + int((s.duration or 0.0) * 1e9)
+            spans.append({
+                "traceId": self.trace_id,
+                "spanId": s.span_id,
+                "parentSpanId": s.parent_id or "",
+                "name": s.name,
+                "kind": 2 if s is self.root else 1,  # SERVER for the request, INTERNAL for stages
+                "startTimeUnixNano": str(start_ns),
+                "endTimeUnixNano": str(end_ns),
+                "attributes": [_otlp_attribute(k, v) for k, v in s.attributes.items()],
+            })
+        return spans
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("penny_trace", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("penny_span", default=None)
+
+def _metric_name(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9!#$%&'*+.^_`|~-]", "_", name)
+
+def _otlp_attribute(key: str, value) -> dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+def start_trace(name: str) -> Trace:
+    trace = Trace(name)
+    _current_trace.set(trace)
+    _current_span.set(trace.root)
+    return trace
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Optional[Span]]:
+    """
+    Times a stage. Inside a trace it becomes a child of the current span; either
+    way its duration goes into the `name` histogram.
+    """
+    trace = _current_trace.get()
+    start = time.perf_counter()
+    if trace is None:
+        try:
+            yield None
+        finally:
+            record(name, time.perf_counter() - start)
+        return
+
+    parent = _current_span.get()
+    s = Span(name, secrets.token_hex(8), parent.span_id if parent else trace.root.span_id, start, attributes=attributes)
+    trace.spans.append(s)
+    token = _current_span.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.attributes["error"] = type(e).__name__
+        raise
+    finally:
+        s.duration = time.perf_counter() - start
+        record(name, s.duration)
+        try:
+            _current_span.reset(token)
+        except ValueError:
+            # Closed from another context, e.g. a span held across an async generator's yields
+            _current_span.set(parent)
+
+def add_span(name: str, start: float, **attributes):
+    """Records a stage that has already ended, given its perf_counter start (e.g. time to first audio)."""
+    duration = time.perf_counter() - start
+    record(name, duration)
+    trace = _current_trace.get()
+    if trace is not None:
+        parent = _current_span.get()
+        trace.spans.append(Span(name, secrets.token_hex(8), parent.span_id if parent else trace.root.span_id, start, duration, attributes))
+
+class OTLPExporter:
+    """
+    Optional export of finished traces as OTLP/JSON: appended one request per line
+    to TRACE_EXPORT_PATH and/or POSTed to an OTLP/HTTP collector at TRACE_OTLP_ENDPOINT
+    (e.g. http://127.0.0.1:4318/v1/traces). Batched off the request path.
+    """
+
+    def __init__(self, path: str = "", endpoint: str = "", service_name: str = "penny-api"):
+        self.path = path
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self._pending: list[Trace] = []
+        self._task: Optional[asyncio.Task] = None
+        self.exported = 0
+        self.dropped = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path or self.endpoint)
+
+    def export(self, trace: Trace):
+        if len(self._pending) >= MAX_PENDING_EXPORTS:
+            self.dropped += 1
+            return
+        self._pending.append(trace)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush_loop())
+
+    def _request_body(self, traces: list[Trace]) -> dict:
+        return {"resourceSpans": [{
+            "resource": {"attributes": [_otlp_attribute("service.name", self.service_name)]},
+            "scopeSpans": [{"scope": {"name": "penny.tracing"}, "spans": [s for t in traces for s in t.to_otlp()]}],
+        }]}
+
+    async def _flush_loop(self):
+        while self._pending:
+            traces, self._pending = self._pending, []
+            body = self._request_body(traces)
+            try:
+                if self.path:
+                    await asyncio.to_thread(self._append, json.dumps(body))
+                if self.endpoint:
+                    from app.services.http_pool import HttpPool
+                    async with HttpPool.get_instance().session().post(self.endpoint, json=body) as resp:
+                        if resp.status >= 300:
+                            logger.warning(f"[Tracing] Collector returned {resp.status}")
+                self.exported += len(traces)
+            except Exception as e:
+                self.dropped += len(traces)
+                logger.warning(f"[Tracing] Export failed: {e}")
+
+    def _append(self, line: str):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    async def flush(self):
+        if self._task:
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls(
+                path=getattr(settings, 'TRACE_EXPORT_PATH', ''),
+                endpoint=getattr(settings, 'TRACE_OTLP_ENDPOINT', ''),
+                service_name=getattr(settings, 'TRACE_SERVICE_NAME', 'penny-api'),
+            )
+        return cls._instance
@@ -0,0 +1,175 @@
+# app/core/turns.py
+"""
+Turn-scoped cancellation for barge-in.
+
+A Turn is one exchange with Penny (a push-to-talk utterance, a typed command, a
+collab line) and everything it sets off: the LLM call, Piper processes and the
+audio queued for Unity. The turn rides along in a context variable, so work
+started through EventBus.emit/publish inherits it the same way request traces do.
+
+When the streamer starts talking again, or a newer turn starts in the same
+scope, TurnManager cancels the older turns: tasks attached to them get
+CancelledError (which kills their Piper processes and aborts their OpenAI
+streams), turn-scoped events they would still publish are dropped by the
+EventBus, and a TurnCancelledEvent tells the Unity bridge to discard queued audio.
+"""
+
+import asyncio
+import contextvars
+import logging
+import time
+import uuid
+import weakref
+from collections import Counter
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+EWMA_ALPHA = 0.2
+
+class Turn:
+    def __init__(self, source: str, scope: Optional[str] = None):
+        self.turn_id = uuid.uuid4().hex
+        self.source = source
+        self.scope = scope
+        self.started_at = time.perf_counter()
+        self.cancelled = False
+        self.reason = ""
+        self.error = ""  # Set when the turn's audio failed after it had started streaming
+        self.utterances: set[str] = set()  # TTS utterances whose audio belongs to this turn
+        self._tasks: set[asyncio.Task] = set()
+
+    def attach(self, task: Optional[asyncio.Task] = None) -> asyncio.Task:
+        """Ties `task` (default: the current one) to the turn, so cancelling the turn cancels it."""
+        task = task or asyncio.current_task()
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        if self.cancelled:
+            task.cancel()
+        return task
+
+    def run(self, coro) -> asyncio.Task:
+        """Runs `coro` as a new task inside this turn."""
+        context = contextvars.copy_context()
+        context.run(_current_turn.set, self)
+        return self.attach(asyncio.create_task(coro, context=context))
+
+    def cancel(self, reason: str) -> bool:
+        if self.cancelled:
+            return False
+        self.cancelled = True
+        self.reason = reason
+        current = asyncio.current_task()
+        for task in list(self._tasks):
+            if task is not current:
+                task.cancel()
+        return True
+
+_current_turn: contextvars.ContextVar[Optional[Turn]] = contextvars.ContextVar("penny_turn", default=None)
+
+def current_turn() -> Optional[Turn]:
+    return _current_turn.get()
+
+@contextmanager
+def use_turn(turn: Optional[Turn]) -> Iterator[Optional[Turn]]:
+    """Makes `turn` current for the block, including for events emitted inside it."""
+    token = _current_turn.set(turn)
+    try:
+        yield turn
+    finally:
+        _current_turn.reset(token)
+
+class TurnManager:
+    """
+    Starts turns, cancels superseded ones and keeps count of the work that was
+    skipped as a result. Savings are estimates: an aborted LLM stream is credited
+    with the average completion length minus the tokens already received, and a
+    killed Piper process with its average seconds per character for the text it
+    had not finished.
+    """
+
+    def __init__(self):
+        self._live: "weakref.WeakSet[Turn]" = weakref.WeakSet()  # Turns drop out once nothing references them
+        self.counters: Counter = Counter()
+        self._averages: dict[str, float] = {}
+
+    async def start_listening(self, event_bus):
+        from app.core.events import PTTRecordingStateEvent
+        event_bus.subscribe_async(PTTRecordingStateEvent, self.handle_ptt)
+
+    async def stop_listening(self, event_bus):
+        from app.core.events import PTTRecordingStateEvent
+        event_bus.unsubscribe(PTTRecordingStateEvent, self.handle_ptt)
+
+    async def handle_ptt(self, event):
+        # Recording started outside of any turn (e.g. an external PTT client): Penny stops talking.
+        # Sessions that start their own turn publish the event from inside it and are skipped here.
+        if event.is_recording and current_turn() is None:
+            self.barge_in("push-to-talk")
+
+    def start(self, source: str, scope: Optional[str] = None) -> Turn:
+        """
+        Starts a turn, cancelling every older turn in the same scope first. A scope of
+        None is a global barge-in: all outstanding turns are cancelled.
+        """
+        self.barge_in(f"superseded by {source}", scope)
+        turn = Turn(source, scope)
+        self._live.add(turn)
+        self.counters["turns_started"] += 1
+        return turn
+
+    def track(self, source: str) -> Turn:
+        """A turn for work that isn't a reply to anyone (chat reactions, speak commands); it never cancels others."""
+        turn = Turn(source, scope=source)
+        self._live.add(turn)
+        return turn
+
+    def barge_in(self, reason: str, scope: Optional[str] = None) -> list[Turn]:
+        cancelled = [
+            turn for turn in list(self._live)
+            if (scope is None or turn.scope == scope) and turn.cancel(reason)
+        ]
+        if not cancelled:
+            return cancelled
+        for turn in cancelled:
+            self._live.discard(turn)
+        self.counters["turns_cancelled"] += len(cancelled)
+        utterances = sorted({u for turn in cancelled for u in turn.utterances})
+        logger.info(f"[Turns] Cancelled {len(cancelled)} turn(s) ({reason}), {len(utterances)} utterance(s) in flight.")
+
+        from app.core.event_bus import EventBus
+        from app.core.events import TurnCancelledEvent
+        with use_turn(None):
+            EventBus.get_instance().emit(TurnCancelledEvent(
+                turn_ids=[turn.turn_id for turn in cancelled],
+                utterance_ids=utterances,
+                reason=reason,
+            ))
+        return cancelled
+
+    def record(self, name: str, amount: float = 1):
+        self.counters[name] += amount
+
+    def observe(self, name: str, value: float):
+        """Running average of a cost (tokens per completion, Piper seconds per character) used for estimates."""
+        previous = self._averages.get(name)
+        self._averages[name] = value if previous is None else previous + EWMA_ALPHA * (value - previous)
+
+    def average(self, name: str, default: float = 0.0) -> float:
+        return self._averages.get(name, default)
+
+    def stats(self) -> dict:
+        return {
+            "counters": {name: round(value, 3) for name, value in sorted(self.counters.items())},
+            "averages": {name: round(value, 4) for name, value in sorted(self._averages.items())},
+            "live_turns": len(self._live),
+        }
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
@@ -0,0 +1,130 @@
+# app/core/unity_protocol.py
+"""
+Framing for the /ws/unity channel.
+
+Binary frames (protocol "binary", version 1):
+
+    +-------+---------+------+----------------+-----------------+-----------+
+    | "PN"  | version | kind | header length  | msgpack header  | payload   |
+    | 2 B   | u8      | u8   | u32 big-endian | header length B | remaining |
+    +-------+---------+------+----------------+-----------------+-----------+
+
+Audio and lip-sync data travel as raw payload bytes (no base64). The JSON fallback
+("json", the default) carries the same header fields as a flat object, which keeps
+it readable in a browser console and compatible with the original event messages.
+"""
+
+import base64
+import json
+import struct
+from dataclasses import dataclass, field
+from typing import Any, Dict, Union
+
+import msgpack
+
+MAGIC = b"PN"
+VERSION = 1
+PREFIX = struct.Struct(">2sBBI")
+
+PROTOCOL_JSON = "json"
+PROTOCOL_BINARY = "binary"
+PROTOCOLS = (PROTOCOL_JSON, PROTOCOL_BINARY)
+
+# Frame kinds
+EVENT = 1  # Backend events (Twitch alerts, transcripts, replies)
+AUDIO = 2  # PCM chunk; header: utterance_id, seq, sample_rate, channels, encoding, final
+LIPSYNC = 3  # Envelope; header: utterance_id, start_ms, frame_ms, final; payload: u8 per frame
+CONTROL = 4  # Session control (hello, ping, cancel, ...)
+
+KIND_NAMES = {EVENT: "event", AUDIO: "audio", LIPSYNC: "lipsync", CONTROL: "control"}
+KIND_IDS = {name: kind for kind, name in KIND_NAMES.items()}
+
+class ProtocolError(ValueError):
+    pass
+
+@dataclass
+class UnityFrame:
+    kind: int
+    header: Dict[str, Any] = field(default_factory=dict)
+    payload: bytes = b""
+
+    @property
+    def type(self) -> str:
+        return self.header.get("type") or KIND_NAMES.get(self.kind, "unknown")
+
+def event_frame(event_type: str, **data: Any) -> UnityFrame:
+    return UnityFrame(EVENT, {"type": event_type, **data})
+
+def control_frame(control_type: str, **data: Any) -> UnityFrame:
+    return UnityFrame(CONTROL, {"type": control_type, **data})
+
+def audio_frame(utterance_id: str, seq: int, sample_rate: int, pcm: bytes, final: bool = False) -> UnityFrame:
+    return UnityFrame(AUDIO, {
+        "utterance_id": utterance_id,
+        "seq": seq,
+        "sample_rate": sample_rate,
+        "channels": 1,
+        "encoding": "pcm_s16le",
+        "final": final,
+    }, pcm)
+
+def lipsync_frame(utterance_id: str, start_ms: float, frame_ms: int, values: list[float], final: bool = False) -> UnityFrame:
+    # One byte per frame is plenty of resolution for mouth openness
+    quantized = bytes(min(255, max(0, int(v * 255 + 0.5))) for v in values)
+    return UnityFrame(LIPSYNC, {
+        "utterance_id": utterance_id,
+        "start_ms": round(start_ms, 1),
+        "frame_ms": frame_ms,
+        "final": final,
+    }, quantized)
+
+def encode_binary(frame: UnityFrame) -> bytes:
+    header = msgpack.packb(frame.header, use_bin_type=True)
+    return b"".join((PREFIX.pack(MAGIC, VERSION, frame.kind, len(header)), header, frame.payload))
+
+def decode_binary(data: bytes) -> UnityFrame:
+    if len(data) < PREFIX.size:
+        raise ProtocolError("Frame shorter than prefix.")
+    magic, version, kind, header_len = PREFIX.unpack_from(data)
+    if magic != MAGIC:
+        raise ProtocolError("Bad frame magic.")
+    if version != VERSION:
+        raise ProtocolError(f"Unsupported protocol version {version}.")
+    header_end = PREFIX.size + header_len
+    if header_end > len(data):
+        raise ProtocolError("Truncated frame header.")
+    header = msgpack.unpackb(data[PREFIX.size:header_end], raw=False) if header_len else {}
+    return UnityFrame(kind, header, data[header_end:])
+
+def encode_json(frame: UnityFrame) -> str:
+    if frame.kind == EVENT:
+        return json.dumps(frame.header)
+    body: Dict[str, Any] = {"kind": KIND_NAMES.get(frame.kind, frame.kind), "v": VERSION, **frame.header}
+    if frame.kind == LIPSYNC:
+        body["values"] = [round(b / 255, 3) for b in frame.payload]
+    elif frame.payload:
+        body["payload_b64"] = base64.b64encode(frame.payload).decode("ascii")
+    body.setdefault("type", KIND_NAMES.get(frame.kind, "unknown"))
+    return json.dumps(body)
+
+def decode_json(text: str) -> UnityFrame:
+    try:
+        body = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise ProtocolError(f"Invalid JSON frame: {e}") from e
+    if not isinstance(body, dict):
+        raise ProtocolError("JSON frame must be an object.")
+    kind = KIND_IDS.get(body.pop("kind", "event"), EVENT)
+    body.pop("v", None)
+    payload = b""
+    if "payload_b64" in body:
+        payload = base64.b64decode(body.pop("payload_b64"))
+    elif kind == LIPSYNC and "values" in body:
+        payload = bytes(min(255, max(0, int(v * 255 + 0.5))) for v in body.pop("values"))
+    return UnityFrame(kind, body, payload)
+
+def encode(frame: UnityFrame, protocol: str) -> Union[str, bytes]:
+    return encode_binary(frame) if protocol == PROTOCOL_BINARY else encode_json(frame)
+
+def decode(data: Union[str, bytes]) -> UnityFrame:
+    return decode_binary(data) if isinstance(data, (bytes, bytearray)) else decode_json(data)
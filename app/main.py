@@ -1,9 +1,36 @@
 # main.py
-from fastapi import FastAPI
-from app.routes.speak import router as respond_router  # Adjust path if needed
+import time
+_import_started = time.perf_counter()
+
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
+from app.core.tracing import start_trace
+from app.routes.speak import router as respond_router, services  # Adjust path if needed
+from app.routes.ws import router as ws_router
+from app.routes.artifacts import router as artifacts_router
+from app.routes.llm import router as llm_router
+from app.routes.metrics import router as metrics_router
+from app.routes.admin import router as admin_router
+from app.routes.health import router as health_router
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI()
+IMPORT_SECONDS = time.perf_counter() - _import_started
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Services start in the background so the port binds straight away: /healthz answers
+    # immediately and /readyz turns 200 once Whisper and Piper are loaded and warmed up
+    services.import_seconds = IMPORT_SECONDS
+    startup = asyncio.create_task(services.start())
+    yield
+    if not startup.done():
+        startup.cancel()
+    await asyncio.gather(startup, return_exceptions=True)
+    await services.stop()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -15,6 +42,34 @@ app.add_middleware(
 
 # Include all your routes here
 app.include_router(respond_router)
+app.include_router(ws_router)
+app.include_router(artifacts_router)
+app.include_router(llm_router)
+app.include_router(metrics_router)
+app.include_router(admin_router)
+app.include_router(health_router)
+
+@app.middleware("http")
+async def server_timing(request: Request, call_next):
+    # Stages timed during the request come back as Server-Timing; streamed bodies
+    # close the trace (and export it) once the last chunk has been sent
+    trace = start_trace(f"{request.method} {request.url.path}")
+    response = await call_next(request)
+    # Histograms are keyed by trace name, so name it after the route template rather than the
+    # raw path: one entry for /artifacts/{artifact_id}, not one per artifact (or per 404)
+    route = request.scope.get("route")
+    trace.name = f"{request.method} {route.path}" if route is not None else f"{request.method} unmatched"
+    response.headers["Server-Timing"] = trace.server_timing()
+    body_iterator = response.body_iterator
+
+    async def traced_body():
+        try:
+            async for chunk in body_iterator:
+                yield chunk
+        finally:
+            trace.finish()
+    response.body_iterator = traced_body()
+    return response
 
 # Optional: root endpoint
 @app.get("/")
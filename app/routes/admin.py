@@ -0,0 +1,39 @@
+import secrets
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from app.core.config import settings
+from app.core.loop_watchdog import LoopWatchdog
+
+MAX_PROFILE_SECONDS = 60.0
+
+def require_admin(x_admin_token: str = Header(default="")):
+    # Closed unless ADMIN_TOKEN is configured: stack dumps show prompts, tokens in locals and so on
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (ADMIN_TOKEN is not set).")
+    if not secrets.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin token required.")
+
+router = APIRouter(prefix="/admin", dependencies=[Depends(require_admin)])
+watchdog = LoopWatchdog.get_instance()
+
+@router.get("/loop/stalls")
+async def loop_stalls(limit: int = Query(default=20, ge=1, le=200)):
+    """Event-loop lag histogram and the most recent stalls with the stack that caused them."""
+    return {**watchdog.stats(), "stalls": watchdog.recent_stalls(limit)}
+
+@router.get("/loop/profile", response_class=PlainTextResponse)
+async def loop_profile(
+    seconds: float = Query(default=5.0, gt=0, le=MAX_PROFILE_SECONDS),
+    interval_ms: float = Query(default=5.0, ge=1.0, le=100.0),
+    all_threads: bool = False,
+):
+    """
+    Samples for `seconds` and returns collapsed stacks ('frame;frame;frame count'),
+    ready for flamegraph.pl or speedscope.
+    Only one profile runs at a time; a second request gets 409.
+    """
+    if watchdog.profiling:
+        raise HTTPException(status_code=409, detail="A profile is already running.")
+    return await watchdog.profile(seconds, interval_ms / 1000, all_threads)
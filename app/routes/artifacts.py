@@ -0,0 +1,63 @@
+import asyncio
+import re
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import Response
+from typing import Optional
+
+from app.services.artifact_store import Artifact, AudioArtifactStore
+
+router = APIRouter()
+store = AudioArtifactStore.get_instance()
+
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+def parse_range(range_header: str, size: int) -> Optional[tuple[int, int]]:
+    """Parses a single-range `Range` header into inclusive (start, end), or None if unsatisfiable."""
+    match = RANGE_PATTERN.match(range_header.strip())
+    if not match or (not match.group(1) and not match.group(2)):
+        return None
+    first, last = match.group(1), match.group(2)
+    if not first:  # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return None
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return None
+    return start, end
+
+async def read_artifact(artifact: Artifact, start: int = 0, end: Optional[int] = None) -> bytes:
+    if artifact.data is not None:
+        return artifact.read(start, end)
+    try:
+        return await asyncio.to_thread(artifact.read, start, end)
+    except OSError:
+        # Evicted between lookup and read
+        raise HTTPException(status_code=404, detail="Artifact not found or expired.")
+
+@router.get("/artifacts/{artifact_id}")
+async def get_artifact(artifact_id: str, range: Optional[str] = Header(default=None)):
+    artifact = store.get(artifact_id)
+    if artifact is None:
+        raise HTTPException(status_code=404, detail="Artifact not found or expired.")
+
+    headers = {"Accept-Ranges": "bytes"}
+    if range is None:
+        body = await read_artifact(artifact)
+        return Response(content=body, media_type=artifact.media_type, headers=headers)
+
+    byte_range = parse_range(range, artifact.size)
+    if byte_range is None:
+        headers["Content-Range"] = f"bytes */{artifact.size}"
+        return Response(status_code=416, headers=headers)
+
+    start, end = byte_range
+    body = await read_artifact(artifact, start, end)
+    headers["Content-Range"] = f"bytes {start}-{end}/{artifact.size}"
+    return Response(content=body, status_code=206, media_type=artifact.media_type, headers=headers)
+
+@router.get("/artifacts")
+async def artifact_stats():
+    return store.stats()
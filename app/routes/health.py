@@ -0,0 +1,18 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.services.container import ServiceContainer
+
+router = APIRouter()
+services = ServiceContainer.get_instance()
+
+@router.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and serving, whether or not the models have loaded."""
+    return {"status": "ok"}
+
+@router.get("/readyz")
+async def readyz():
+    """Readiness: 200 once Whisper, Piper and the LLM client are warmed up, 503 until then."""
+    report = services.startup_report()
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
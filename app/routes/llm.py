@@ -0,0 +1,11 @@
+from fastapi import APIRouter
+
+from app.services.container import ServiceContainer
+
+router = APIRouter()
+services = ServiceContainer.get_instance()
+
+@router.get("/llm/target_stats")
+async def target_stats():
+    """How many transcript lines the local classifier kept away from the LLM."""
+    return services.target_detector.stats()
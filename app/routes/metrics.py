@@ -0,0 +1,20 @@
+from fastapi import APIRouter
+
+from app.core.tracing import OTLPExporter, latency_stats
+from app.core.turns import TurnManager
+
+router = APIRouter()
+
+@router.get("/metrics/latency")
+async def latency():
+    """Per-stage latency histograms (upload, whisper, llm, tts.*, bus hops and whole requests)."""
+    exporter = OTLPExporter.get_instance()
+    return {
+        "stages": latency_stats(),
+        "export": {"enabled": exporter.enabled, "exported": exporter.exported, "dropped": exporter.dropped},
+    }
+
+@router.get("/metrics/turns")
+async def turns():
+    """Barge-in counters: turns cancelled, and the LLM tokens, Piper CPU time and queued audio saved by it."""
+    return TurnManager.get_instance().stats()
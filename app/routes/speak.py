@@ -1,50 +1,106 @@
-import os
 import logging
-from fastapi import APIRouter, UploadFile, File
-from fastapi.responses import FileResponse
+from typing import AsyncIterator, Optional
 
-from app.core.event_bus import EventBus
-from app.services.transcribe_service import TranscribeService
-from app.services.streaming_openai_service import StreamingOpenAIService
-from app.services.context_manager import ContextManager
-from app.services.tts_service import TTSService
-from app.core.config import settings
+from fastapi import APIRouter, UploadFile, File, Header, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.core.tracing import current_trace, span
+from app.core.turns import current_turn
+from app.services.container import ServiceContainer
+from app.utils.audio_decode import AudioDecodeError, accepted_media_types, media_type, read_upload
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# Initialize the EventBus singleton
-event_bus = EventBus.get_instance()
+# Shared with the /ws/unity sessions
+services = ServiceContainer.get_instance()
+tts_service = services.tts_service
 
-# Instantiate services correctly
-context_manager = ContextManager(max_history=5)
-transcribe_service = TranscribeService(event_bus, context_manager)
-llm_service = StreamingOpenAIService(event_bus, context_manager)
-tts_service = TTSService(event_bus, settings)
+UPLOAD_CHUNK = 64 * 1024
 
-@router.post("/respond")
-async def respond(audio: UploadFile = File(...)):
-    logger.info("[/respond] Received audio file for response")
+async def upload_chunks(upload: UploadFile) -> AsyncIterator[bytes]:
+    while chunk := await upload.read(UPLOAD_CHUNK):
+        yield chunk
 
-    # Save audio file
-    temp_path = f"/tmp/{audio.filename}"
-    with open(temp_path, "wb") as f:
-        f.write(await audio.read())
+async def prefetch(source: AsyncIterator[bytes], chunks: int) -> AsyncIterator[bytes]:
+    """
+    Pulls the first `chunks` chunks before the response starts, so Piper's time to
+    first audio is known when the Server-Timing header goes out. The client gets its
+    first audio no later than it would have otherwise.
 
-    # Transcribe to text
-    with open(temp_path, "rb") as f:
-        audio_bytes = f.read()
-    text = await transcribe_service.transcribe_and_publish(audio_bytes, source=temp_path)
+    A failure before then surfaces as an error response. Once the body has started,
+    the status is already sent, so a failure (e.g. Piper exiting) ends the audio
+    early and is logged and marked on the request trace instead of resetting the connection.
+    """
+    head = []
+    async for chunk in source:
+        head.append(chunk)
+        if len(head) >= chunks:
+            break
 
-    # Use ContextManager to build prompt
-    prompt = context_manager.build_prompt_from_transcription(text)
+    async def body():
+        for chunk in head:
+            yield chunk
+        try:
+            async for chunk in source:
+                yield chunk
+        except Exception as e:
+            logger.error(f"[/respond] Audio stream failed after it started, ending it early: {e}")
+            services.turns.record("tts_stream_failures")
+            trace = current_trace()
+            if trace is not None:
+                trace.root.attributes["error"] = f"tts: {type(e).__name__}"
+            turn = current_turn()
+            if turn is not None:
+                turn.error = str(e)
+    return body()
 
-    # Query the LLM
-    reply = await llm_service.get_response(prompt)
-    if not reply or not reply.strip():
-        return {"error": "LLM did not generate a valid reply."}
+@router.post("/respond")
+async def respond(request: Request, audio: Optional[UploadFile] = File(None), accept: str = Header(default="audio/wav")):
+    """
+    Takes the audio as a multipart "audio" file or as the raw request body. WAV,
+    Ogg/Opus, WebM/Opus and FLAC are accepted, chosen by the part's (or body's)
+    Content-Type; anything else gets 415 with the accepted types in Accept-Post.
+    Raw compressed bodies are decoded while they are still being received.
+    """
+    if audio is not None:
+        upload_type, source, chunks = media_type(audio.content_type, audio.filename), audio.filename or "upload", upload_chunks(audio)
+    else:
+        upload_type, source, chunks = media_type(request.headers.get("content-type")), "body", request.stream()
+    accepted = accepted_media_types()
+    if upload_type not in accepted:
+        return JSONResponse(
+            {"error": f"Unsupported audio type '{upload_type}'."},
+            status_code=415,
+            headers={"Accept-Post": ", ".join(accepted)},
+        )
+    logger.info(f"[/respond] Received {upload_type} audio for response")
+
+    # Transcribe straight from the upload; nothing is written under /tmp
+    try:
+        with span("upload", type=upload_type):
+            audio_input = await read_upload(chunks, upload_type)
+    except AudioDecodeError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    text = await services.voice_pipeline.transcribe(audio_input, source=source)
 
-    # Speak to file
-    output_path = tts_service.speak_to_file(reply)    
+    # Build the prompt from context and query the LLM
+    reply = await services.voice_pipeline.reply(text)
+    if not reply:
+        return {"error": "LLM did not generate a valid reply."}
 
-    return FileResponse(output_path, media_type="audio/wav")
+    # Stream Piper's audio back as it is synthesized instead of waiting for a finished file.
+    # The utterance ID ties it to the lip-sync envelope on /ws/unity, and the finished WAV
+    # is kept as an artifact under the same ID for replays and range requests.
+    utterance_id = services.artifact_store.new_id()
+    headers = {
+        "X-Sample-Rate": str(tts_service.sample_rate),
+        "X-Utterance-Id": utterance_id,
+        "X-Artifact-Url": f"/artifacts/{utterance_id}",
+    }
+    if "audio/l16" in accept.lower():
+        response_type = f"audio/L16; rate={tts_service.sample_rate}; channels=1"
+        body = await prefetch(tts_service.stream_and_store(reply, utterance_id), chunks=1)
+        return StreamingResponse(body, media_type=response_type, headers=headers)
+    body = await prefetch(tts_service.stream_wav(reply, utterance_id), chunks=2)  # WAV header + first audio
+    return StreamingResponse(body, media_type="audio/wav", headers=headers)
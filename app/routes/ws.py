@@ -1,15 +1,36 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from app.services.websocket_manager import WebSocketManager
+from fastapi import APIRouter, WebSocket
+from app.core.unity_protocol import PROTOCOL_BINARY, PROTOCOL_JSON
+from app.services.container import ServiceContainer
+from app.services.unity_session import UnitySession
 
 router = APIRouter()
-manager = WebSocketManager()
+services = ServiceContainer.get_instance()
+manager = services.ws_manager
+
+BINARY_SUBPROTOCOL = "penny.binary.v1"
+JSON_SUBPROTOCOL = "penny.json.v1"
+
+def negotiate_protocol(websocket: WebSocket) -> tuple[str, str | None]:
+    """Picks the framing from `?protocol=` or the Sec-WebSocket-Protocol offer; JSON by default."""
+    offered = [p.strip() for p in websocket.headers.get("sec-websocket-protocol", "").split(",") if p.strip()]
+    if BINARY_SUBPROTOCOL in offered:
+        return PROTOCOL_BINARY, BINARY_SUBPROTOCOL
+    if JSON_SUBPROTOCOL in offered:
+        return PROTOCOL_JSON, JSON_SUBPROTOCOL
+    if websocket.query_params.get("protocol") == PROTOCOL_BINARY:
+        return PROTOCOL_BINARY, None
+    return PROTOCOL_JSON, None
 
 @router.websocket("/ws/unity")
 async def websocket_endpoint(websocket: WebSocket):
-    await manager.connect(websocket)
+    protocol, subprotocol = negotiate_protocol(websocket)
+    await manager.connect(websocket, protocol, subprotocol)
     try:
-        while True:
-            data = await websocket.receive_text()
-            print(f"[Unity WS] Received: {data}")  # Optional: route back
-    except WebSocketDisconnect:
+        await UnitySession(websocket, services).run()
+    finally:
         await manager.disconnect(websocket)
+
+@router.get("/ws/stats")
+async def websocket_stats():
+    """Per-client outbound queue depth and send latency."""
+    return {"clients": manager.stats()}
@@ -0,0 +1,64 @@
+# app/services/api_client_service.py
+
+import logging
+from typing import Optional
+
+from app.services.helix_client import HelixClient
+from app.services.streaming_openai_service import StreamingOpenAIService
+
+logger = logging.getLogger(__name__)
+
+class APIClientService:
+    """Produces Penny's lines for chat interactions: shoutouts, replies to mentions and reactions to Twitch events."""
+
+    def __init__(self, llm_service: StreamingOpenAIService, helix: Optional[HelixClient] = None):
+        self.llm_service = llm_service
+        self.helix = helix or HelixClient.get_instance()
+
+    async def _ask(self, prompt: str) -> Optional[str]:
+        reply = (await self.llm_service.get_response(prompt) or "").strip()
+        if not reply or reply.startswith("[ERROR]"):
+            return None
+        return reply
+
+    async def get_api_shout_out_text(self, username: str) -> Optional[str]:
+        try:
+            user = await self.helix.get_user(login=username)
+            channel = await self.helix.get_channel(user["id"]) if user else None
+        except Exception as e:
+            logger.error(f"[APIClient] Helix lookup for shoutout of {username} failed: {e}")
+            user, channel = None, None
+
+        if not user:
+            return await self._ask(
+                f"Someone asked you to shout out '{username}', but no Twitch channel by that name exists. "
+                f"Mock the request in one sentence."
+            )
+
+        name = user.get("display_name") or user["login"]
+        details = [f"Their channel is twitch.tv/{user['login']}."]
+        if channel and channel.get("game_name"):
+            details.append(f"They were last streaming {channel['game_name']}.")
+        if channel and channel.get("title"):
+            details.append(f"Their stream title: \"{channel['title']}\".")
+        if user.get("description"):
+            details.append(f"Their bio: \"{user['description']}\".")
+        return await self._ask(
+            f"Give a short shoutout (two sentences at most) for the streamer {name} and tell chat to go follow them. "
+            + " ".join(details)
+        )
+
+    async def get_api_chat_response_text(self, username: str, message_text: str) -> Optional[str]:
+        return await self._ask(f"{username} said in Twitch chat: {message_text}\nReply to them directly in one or two sentences.")
+
+    async def get_api_event_reaction_text(self, event_type: str, username: str, details: Optional[dict] = None) -> Optional[str]:
+        details = details or {}
+        event = details.get("summary") or f"{event_type} by {username}"
+        facts = ", ".join(
+            f"{key}: {value}" for key, value in details.items()
+            if key not in ("summary", "aggregated", "users") and value not in (None, "")
+        )
+        return await self._ask(
+            f"React to this Twitch event in one or two sentences. Event: {event}."
+            + (f" Details: {facts}." if facts else "")
+        )
@@ -0,0 +1,254 @@
+# app/services/artifact_store.py
+
+import asyncio
+import logging
+import os
+import re
+import shutil
+import tempfile
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# "<pid>-<hex>": the worker that owns an artifact is part of its ID, so the others can find its file
+ARTIFACT_ID_PATTERN = re.compile(r"^(\d+)-[0-9a-f]{32}$")
+
+def _default_spill_dir() -> str:
+    # Prefer tmpfs so spilled audio never touches a physical disk
+    base = "/dev/shm" if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK) else tempfile.gettempdir()
+    return os.path.join(base, "penny-artifacts")
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # Exists, but belongs to another user
+    return True
+
+@dataclass
+class Artifact:
+    id: str
+    media_type: str
+    size: int
+    created_at: float
+    expires_at: float
+    data: Optional[bytes] = None  # Set while the artifact lives in memory
+    path: Optional[str] = None  # Set once it has been spilled
+
+    def read(self, start: int = 0, end: Optional[int] = None) -> bytes:
+        """Returns bytes [start, end] inclusive, like an HTTP byte range."""
+        stop = self.size if end is None else end + 1
+        if self.data is not None:
+            return self.data[start:stop]
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            return f.read(stop - start)
+
+class AudioArtifactStore:
+    """
+    Bounded store for generated and uploaded audio, handed out by ID.
+
+    Artifacts are kept in an in-memory ring; when memory exceeds its budget the
+    oldest ones are spilled to files, and the oldest spilled files are deleted once
+    the disk budget is exceeded. Everything expires after `ttl_seconds`, so usage
+    stays flat no matter how long the stream runs.
+
+    With `shared` (several uvicorn workers), artifacts are written straight to the
+    owning worker's spill directory, and an ID minted by another worker is served
+    from that worker's file, so /artifacts works whichever worker gets the request.
+    """
+
+    def __init__(
+        self,
+        memory_limit_bytes: int = 64 * 1024 * 1024,
+        disk_limit_bytes: int = 512 * 1024 * 1024,
+        ttl_seconds: float = 600.0,
+        spill_dir: Optional[str] = None,
+        cleanup_interval: float = 30.0,
+        shared: bool = False,
+    ):
+        self.memory_limit_bytes = memory_limit_bytes
+        self.disk_limit_bytes = disk_limit_bytes
+        self.ttl_seconds = ttl_seconds
+        # Every worker process spills into its own subdirectory, so none of them wipes another's files
+        self.spill_root = spill_dir or _default_spill_dir()
+        self.spill_dir = os.path.join(self.spill_root, str(os.getpid()))
+        self.cleanup_interval = cleanup_interval
+        self.shared = shared
+        self._artifacts: "OrderedDict[str, Artifact]" = OrderedDict()  # Oldest first
+        self._memory_bytes = 0
+        self._disk_bytes = 0
+        self._cleanup_task: Optional[asyncio.Task] = None
+        self._reset_spill_dir()
+
+    def _reset_spill_dir(self):
+        """Removes directories left behind by processes that are gone; their IDs are gone with them."""
+        os.makedirs(self.spill_root, exist_ok=True)
+        for name in os.listdir(self.spill_root):
+            if name.isdigit() and (int(name) == os.getpid() or not _process_alive(int(name))):
+                shutil.rmtree(os.path.join(self.spill_root, name), ignore_errors=True)
+        os.makedirs(self.spill_dir, exist_ok=True)
+
+    async def start(self):
+        if self._cleanup_task is None:
+            self._cleanup_task = asyncio.create_task(self._cleanup_loop())
+            logger.info(f"[ArtifactStore] Started (spill dir: {self.spill_dir}).")
+
+    async def stop(self):
+        if self._cleanup_task:
+            self._cleanup_task.cancel()
+            self._cleanup_task = None
+        for artifact_id in list(self._artifacts):
+            self._remove(artifact_id)
+        shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+    async def _cleanup_loop(self):
+        while True:
+            await asyncio.sleep(self.cleanup_interval)
+            try:
+                self.purge_expired()
+            except Exception as e:
+                logger.error(f"[ArtifactStore] Cleanup failed: {e}", exc_info=True)
+
+    def new_id(self) -> str:
+        return f"{os.getpid()}-{uuid.uuid4().hex}"
+
+    def put(self, data: bytes, media_type: str = "audio/wav", artifact_id: Optional[str] = None) -> str:
+        now = time.time()
+        artifact = Artifact(
+            id=artifact_id or self.new_id(),
+            media_type=media_type,
+            size=len(data),
+            created_at=now,
+            expires_at=now + self.ttl_seconds,
+            data=data,
+        )
+        self._artifacts[artifact.id] = artifact
+        self._memory_bytes += artifact.size
+        if self.shared:
+            self._spill(artifact)  # Other workers can only read it from the file
+        self.purge_expired(now)
+        self._enforce_limits()
+        return artifact.id
+
+    def get(self, artifact_id: str) -> Optional[Artifact]:
+        artifact = self._artifacts.get(artifact_id)
+        if artifact is None and self.shared:
+            return self._get_foreign(artifact_id)
+        if artifact and artifact.expires_at <= time.time():
+            self._remove(artifact_id)
+            return None
+        return artifact
+
+    def _get_foreign(self, artifact_id: str) -> Optional[Artifact]:
+        """An artifact owned by another worker, read from its spill file; its owner expires and deletes it."""
+        match = ARTIFACT_ID_PATTERN.match(artifact_id)
+        if not match or int(match.group(1)) == os.getpid():
+            return None
+        path = os.path.join(self.spill_root, match.group(1), artifact_id)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        if stat.st_mtime + self.ttl_seconds <= time.time():
+            return None
+        return Artifact(
+            id=artifact_id,
+            media_type="audio/wav",  # Everything stored here is a WAV from TTSService
+            size=stat.st_size,
+            created_at=stat.st_mtime,
+            expires_at=stat.st_mtime + self.ttl_seconds,
+            path=path,
+        )
+
+    def delete(self, artifact_id: str) -> None:
+        self._remove(artifact_id)
+
+    def purge_expired(self, now: Optional[float] = None) -> int:
+        now = now or time.time()
+        # Insertion order equals expiry order since every artifact gets the same TTL
+        expired = []
+        for artifact_id, artifact in self._artifacts.items():
+            if artifact.expires_at > now:
+                break
+            expired.append(artifact_id)
+        for artifact_id in expired:
+            self._remove(artifact_id)
+        return len(expired)
+
+    def _enforce_limits(self):
+        if self._memory_bytes > self.memory_limit_bytes:
+            for artifact in list(self._artifacts.values()):
+                if self._memory_bytes <= self.memory_limit_bytes:
+                    break
+                if artifact.data is not None:
+                    self._spill(artifact)
+
+        if self._disk_bytes > self.disk_limit_bytes:
+            for artifact in list(self._artifacts.values()):
+                if self._disk_bytes <= self.disk_limit_bytes:
+                    break
+                if artifact.path is not None:
+                    logger.debug(f"[ArtifactStore] Disk budget exceeded, evicting {artifact.id}")
+                    self._remove(artifact.id)
+
+    def _spill(self, artifact: Artifact):
+        path = os.path.join(self.spill_dir, artifact.id)
+        try:
+            # Renamed into place so another worker never sees a partly written file
+            with open(path + ".tmp", "wb") as f:
+                f.write(artifact.data)
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            logger.error(f"[ArtifactStore] Failed to spill {artifact.id}, dropping it: {e}")
+            self._remove(artifact.id)
+            return
+        artifact.path = path
+        artifact.data = None
+        self._memory_bytes -= artifact.size
+        self._disk_bytes += artifact.size
+
+    def _remove(self, artifact_id: str):
+        artifact = self._artifacts.pop(artifact_id, None)
+        if artifact is None:
+            return
+        if artifact.data is not None:
+            self._memory_bytes -= artifact.size
+        if artifact.path is not None:
+            self._disk_bytes -= artifact.size
+            try:
+                os.remove(artifact.path)
+            except OSError:
+                pass
+
+    def stats(self) -> dict:
+        return {
+            "count": len(self._artifacts),
+            "memory_bytes": self._memory_bytes,
+            "disk_bytes": self._disk_bytes,
+            "memory_limit_bytes": self.memory_limit_bytes,
+            "disk_limit_bytes": self.disk_limit_bytes,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls(
+                memory_limit_bytes=settings.ARTIFACT_MEMORY_LIMIT_MB * 1024 * 1024,
+                disk_limit_bytes=settings.ARTIFACT_DISK_LIMIT_MB * 1024 * 1024,
+                ttl_seconds=settings.ARTIFACT_TTL_SECONDS,
+                spill_dir=settings.ARTIFACT_SPILL_DIR or None,
+                shared=getattr(settings, 'WEB_CONCURRENCY', 1) > 1,
+            )
+        return cls._instance
@@ -0,0 +1,180 @@
+# app/services/chat_triage.py
+
+import heapq
+import itertools
+import logging
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+
+from app.core.config import settings
+from app.core.events import TwitchMessageEvent
+
+logger = logging.getLogger(__name__)
+
+# Lower value = handled first
+COMMAND_PRIORITIES = {
+    "so": 0,
+    "shoutout": 0,
+    "ask": 1,
+    "penny": 1,
+    "search": 3,
+}
+MENTION_PRIORITY = 2
+PRIVILEGED_BADGES = ("broadcaster", "moderator")
+
+@dataclass(order=True)
+class TriageItem:
+    priority: int
+    seq: int
+    kind: str = field(compare=False)  # "command" or "mention"
+    username: str = field(compare=False)
+    message: str = field(compare=False)
+    command: Optional[str] = field(default=None, compare=False)
+    enqueued_at: float = field(default=0.0, compare=False)
+
+class ChatTriage:
+    """
+    First stop for every chat message. A single compiled pattern recognises known
+    commands and mentions of the bot; anything else is discarded immediately.
+    Actionable messages are subject to a per-user cooldown and land on a bounded
+    priority queue, which the consumer drains no faster than the global cooldown.
+    """
+
+    def __init__(
+        self,
+        bot_name: str,
+        command_prefix: str = "!",
+        user_cooldown: float = 15.0,
+        global_cooldown: float = 3.0,
+        max_queue: int = 32,
+        max_age: float = 45.0,
+    ):
+        self.user_cooldown = user_cooldown
+        self.global_cooldown = global_cooldown
+        self.max_queue = max_queue
+        self.max_age = max_age
+        self.pattern = self.compile_pattern(bot_name, command_prefix, COMMAND_PRIORITIES)
+
+        self._last_by_user: OrderedDict[str, float] = OrderedDict()
+        self._queue: list[TriageItem] = []
+        self._seq = itertools.count()
+        self._last_dispatch = float("-inf")
+        self.stats = {"seen": 0, "actionable": 0, "cooldown": 0, "dropped": 0, "expired": 0, "dispatched": 0}
+
+    @staticmethod
+    def compile_pattern(bot_name: str, command_prefix: str, commands) -> re.Pattern:
+        # Leftmost match wins: a message starting with the prefix always matches the first
+        # branch, with `command` unset if it isn't one we handle
+        alternatives = [rf"^\s*{re.escape(command_prefix)}(?:(?P<command>{'|'.join(map(re.escape, commands))})(?=\s|$))?"]
+        if bot_name:
+            alternatives.append(rf"(?P<mention>{re.escape(bot_name)})")
+        return re.compile("|".join(alternatives), re.IGNORECASE)
+
+    def classify(self, event: TwitchMessageEvent, now: Optional[float] = None) -> Optional[TriageItem]:
+        """Returns a TriageItem if the message needs a response, otherwise None."""
+        self.stats["seen"] += 1
+        match = self.pattern.search(event.message)
+        if match is None:
+            return None
+
+        command = match.group("command")
+        if command:
+            command = command.lower()
+            kind, priority = "command", COMMAND_PRIORITIES[command]
+        elif match.lastgroup == "mention":
+            kind, priority = "mention", MENTION_PRIORITY
+        else:
+            return None  # Unknown command
+
+        now = time.monotonic() if now is None else now
+        username = event.username.lower()
+        privileged = self._is_privileged(event.tags)
+        if not privileged and not self._take_user_slot(username, now):
+            self.stats["cooldown"] += 1
+            return None
+
+        self.stats["actionable"] += 1
+        return TriageItem(
+            priority=priority - 10 if privileged else priority,
+            seq=next(self._seq),
+            kind=kind,
+            username=event.username,
+            message=event.message.strip(),
+            command=command,
+            enqueued_at=now,
+        )
+
+    def _is_privileged(self, tags: dict) -> bool:
+        if not tags:
+            return False
+        if tags.get("mod") in ("1", True):
+            return True
+        badges = tags.get("badges") or ""
+        return any(badge in badges for badge in PRIVILEGED_BADGES)
+
+    def _take_user_slot(self, username: str, now: float) -> bool:
+        last_by_user = self._last_by_user
+        # Entries are kept in acceptance order, so expired ones are always at the front
+        cutoff = now - self.user_cooldown
+        while last_by_user:
+            oldest_user, oldest_at = next(iter(last_by_user.items()))
+            if oldest_at > cutoff:
+                break
+            del last_by_user[oldest_user]
+
+        if username in last_by_user:
+            return False
+        last_by_user[username] = now
+        return True
+
+    def push(self, item: TriageItem) -> None:
+        heapq.heappush(self._queue, item)
+        if len(self._queue) > self.max_queue:
+            # Evict the least important (and, among equals, the newest) item
+            worst = max(self._queue)
+            self._queue.remove(worst)
+            heapq.heapify(self._queue)
+            self.stats["dropped"] += 1
+
+    def offer(self, event: TwitchMessageEvent, now: Optional[float] = None) -> Optional[TriageItem]:
+        item = self.classify(event, now)
+        if item:
+            self.push(item)
+        return item
+
+    def next_ready_in(self, now: Optional[float] = None) -> float:
+        """Seconds until the global cooldown allows the next dispatch."""
+        now = time.monotonic() if now is None else now
+        return max(0.0, self._last_dispatch + self.global_cooldown - now)
+
+    def pop(self, now: Optional[float] = None) -> Optional[TriageItem]:
+        """Returns the most important fresh item, or None if the queue is empty or cooling down."""
+        now = time.monotonic() if now is None else now
+        if self.next_ready_in(now) > 0:
+            return None
+        while self._queue:
+            item = heapq.heappop(self._queue)
+            if now - item.enqueued_at > self.max_age:
+                self.stats["expired"] += 1
+                continue
+            self._last_dispatch = now
+            self.stats["dispatched"] += 1
+            return item
+        return None
+
+    def __len__(self):
+        return len(self._queue)
+
+    @classmethod
+    def from_settings(cls, bot_name: str, command_prefix: str = "!") -> "ChatTriage":
+        return cls(
+            bot_name,
+            command_prefix,
+            user_cooldown=getattr(settings, 'CHAT_USER_COOLDOWN_SECONDS', 15.0),
+            global_cooldown=getattr(settings, 'CHAT_GLOBAL_COOLDOWN_SECONDS', 3.0),
+            max_queue=getattr(settings, 'CHAT_QUEUE_MAX', 32),
+            max_age=getattr(settings, 'CHAT_QUEUE_MAX_AGE_SECONDS', 45.0),
+        )
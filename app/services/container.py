@@ -0,0 +1,224 @@
+# app/services/container.py
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+
+from app.core.config import settings
+from app.core.event_bus import EventBus
+from app.core.loop_watchdog import LoopWatchdog
+from app.core.turns import TurnManager
+from app.services.api_client_service import APIClientService
+from app.services.artifact_store import AudioArtifactStore
+from app.services.context_manager import ContextManager
+from app.services.conversation_log import ConversationLog, ConversationLogLocked
+from app.services.conversation_summarizer import ConversationSummarizer
+from app.services.helix_client import HelixClient
+from app.services.http_pool import HttpPool
+from app.services.interaction_service import InteractionService
+from app.services.streaming_openai_service import StreamingOpenAIService
+from app.services.target_detection_service import TargetDetectionService
+from app.services.transcribe_service import TranscribeService
+from app.services.tts_service import TTSService
+from app.services.twitch_eventsub_conduit import TwitchEventSubConduit
+from app.services.twitch_token_refresh import TwitchTokenManager
+from app.services.unity_bridge_service import UnityBridgeService
+from app.services.voice_pipeline import VoicePipeline
+from app.services.websocket_manager import WebSocketManager
+
+logger = logging.getLogger(__name__)
+
+# /readyz stays 503 until these have started; the rest are reported but don't gate readiness
+REQUIRED_FOR_READY = ("whisper", "piper", "llm")
+
+class ServiceContainer:
+    """
+    Owns the shared service instances so HTTP routes and websocket sessions use the same ones.
+    Construction is cheap; models, heavy imports and warm-ups happen in start().
+    """
+
+    def __init__(self):
+        self.event_bus = EventBus.get_instance()
+        self.conversation_log: Optional[ConversationLog] = None  # Opened in start(), so importing the app touches no files
+        self.context_manager = ContextManager(max_history=5)
+        self.turns = TurnManager.get_instance()
+        self.artifact_store = AudioArtifactStore.get_instance()
+        self.ws_manager = WebSocketManager.get_instance()
+        self.transcribe_service = TranscribeService(self.event_bus, self.context_manager, model_path=settings.WHISPER_MODEL, inference_socket=settings.INFERENCE_SOCKET_PATH)
+        self.target_detector = TargetDetectionService(self.event_bus)
+        self.llm_service = StreamingOpenAIService(self.event_bus, self.context_manager, self.target_detector)
+        self.tts_service = TTSService(self.event_bus, settings, self.artifact_store)
+        self.summarizer = ConversationSummarizer(
+            self.context_manager,
+            self.llm_service,
+            model_name=settings.SUMMARY_MODEL,
+            batch_turns=settings.SUMMARY_BATCH_TURNS,
+            max_chars=settings.SUMMARY_MAX_CHARS,
+        ) if settings.SUMMARY_ENABLED else None
+        self.voice_pipeline = VoicePipeline(self.transcribe_service, self.llm_service, self.context_manager)
+        self.unity_bridge = UnityBridgeService(self.event_bus, self.ws_manager)
+        self.helix = HelixClient.get_instance()
+        self.api_client = APIClientService(self.llm_service, self.helix)
+        self.interaction_service = InteractionService(self.event_bus, self.api_client)
+        self.eventsub = TwitchEventSubConduit(self.ws_manager, event_bus=self.event_bus) if (
+            settings.TWITCH_EVENTSUB_ENABLED and settings.TWITCH_BROADCASTER_ID
+        ) else None
+        self.twitch_tokens = TwitchTokenManager.get_instance() if settings.TWITCH_CLIENT_ID else None
+
+        self.started = False
+        self.import_seconds = 0.0
+        self.startup_seconds = 0.0
+        self.components: dict[str, dict] = {}
+        self._retry_task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _open_conversation_log() -> Optional[ConversationLog]:
+        try:
+            return ConversationLog(
+                settings.CONVERSATION_LOG_DIR,
+                segment_bytes=settings.CONVERSATION_SEGMENT_MB * 1024 * 1024,
+                max_segments=settings.CONVERSATION_MAX_SEGMENTS,
+            )
+        except ConversationLogLocked as e:
+            # Persistence is a single-writer feature: the other workers' histories diverge from the log
+            logger.warning(
+                f"[Startup] Conversation log disabled in this worker ({e}). Its history is in memory only and "
+                f"is neither saved nor shared with the worker that holds the log; run one worker to persist it."
+            )
+            return None
+
+    async def _start_component(self, name: str, starting: Awaitable):
+        started = time.perf_counter()
+        try:
+            await starting
+            self.components[name] = {"ok": True, "seconds": round(time.perf_counter() - started, 3)}
+        except Exception as e:
+            logger.error(f"[Startup] {name} failed to start: {e}", exc_info=True)
+            self.components[name] = {"ok": False, "seconds": round(time.perf_counter() - started, 3), "error": str(e)}
+
+    def _retries(self) -> dict[str, Callable[[], Awaitable]]:
+        # What brings a failed required component up again without re-registering its subscriptions
+        return {
+            "whisper": self.transcribe_service.start,
+            "piper": self.tts_service.warm_up,
+            "llm": self.llm_service.start,
+        }
+
+    def _refresh(self):
+        """Picks up components that came up after start(), e.g. Whisper loaded by the first transcription."""
+        whisper = self.components.get("whisper")
+        if whisper and not whisper["ok"] and self.transcribe_service.model is not None:
+            self.components["whisper"] = {"ok": True, "seconds": whisper["seconds"], "recovered": True}
+
+    @property
+    def ready(self) -> bool:
+        self._refresh()
+        return self.started and all(self.components.get(name, {}).get("ok") for name in REQUIRED_FOR_READY)
+
+    async def _retry_failed(self, interval: float):
+        """Retries failed required components until all of them are up, so /readyz can turn 200 without a restart."""
+        retries = self._retries()
+        while True:
+            await asyncio.sleep(interval)
+            self._refresh()
+            failed = [name for name in REQUIRED_FOR_READY if not self.components.get(name, {}).get("ok")]
+            if not failed:
+                logger.info("[Startup] All required components are up; now ready.")
+                return
+            for name in failed:
+                attempts = self.components[name].get("attempts", 1)
+                await self._start_component(name, retries[name]())
+                if self.components[name]["ok"]:
+                    self.components[name]["recovered"] = True
+                else:
+                    self.components[name]["attempts"] = attempts + 1
+
+    async def start(self):
+        """
+        Starts every service concurrently: the Whisper load and warm-up runs in a thread
+        while Piper warms up in its own process and the rest register their subscriptions.
+        A service that fails is logged and reported by startup_report() instead of
+        taking the others down.
+        """
+        started = time.perf_counter()
+        if settings.LOOP_WATCHDOG_ENABLED:
+            await LoopWatchdog.get_instance().start()
+        if settings.CONVERSATION_LOG_DIR and self.conversation_log is None:
+            self.conversation_log = self._open_conversation_log()
+            if self.conversation_log:
+                self.context_manager.attach_log(self.conversation_log)
+
+        components = {
+            "whisper": self.transcribe_service.start(),
+            "piper": self.tts_service.start(),
+            "llm": self.llm_service.start(),
+            "artifact_store": self.artifact_store.start(),
+            "target_detector": self.target_detector.start(),
+            "unity_bridge": self.unity_bridge.start(),
+            "turns": self.turns.start_listening(self.event_bus),
+            "interaction": self.interaction_service.start(),
+        }
+        if self.twitch_tokens:
+            components["twitch_tokens"] = self.twitch_tokens.start()
+        if self.summarizer:
+            components["summarizer"] = self.summarizer.start()
+        await asyncio.gather(*(self._start_component(name, starting) for name, starting in components.items()))
+        if self.eventsub:
+            # Creates its subscriptions with the app token, so it goes after the token manager
+            await self._start_component("eventsub", self.eventsub.start())
+
+        self.startup_seconds = time.perf_counter() - started
+        self.started = True
+        slowest = ", ".join(f"{name} {c['seconds']:.2f}s" for name, c in sorted(self.components.items(), key=lambda c: -c[1]["seconds"])[:3])
+        failed = [name for name, c in self.components.items() if not c["ok"]]
+        logger.info(
+            f"[Startup] {'Ready' if self.ready else 'NOT ready'} after {self.import_seconds + self.startup_seconds:.2f}s "
+            f"(imports {self.import_seconds:.2f}s, services {self.startup_seconds:.2f}s; slowest: {slowest})"
+            + (f"; failed: {', '.join(failed)}" if failed else "")
+        )
+        retry_seconds = getattr(settings, 'STARTUP_RETRY_SECONDS', 30.0)
+        if not self.ready and retry_seconds > 0:
+            self._retry_task = asyncio.create_task(self._retry_failed(retry_seconds))
+
+    def startup_report(self) -> dict:
+        return {
+            "ready": self.ready,
+            "import_seconds": round(self.import_seconds, 3),
+            "startup_seconds": round(self.startup_seconds, 3),
+            "components": self.components,
+        }
+
+    async def stop(self):
+        self.started = False
+        if self._retry_task:
+            self._retry_task.cancel()
+            await asyncio.gather(self._retry_task, return_exceptions=True)
+            self._retry_task = None
+        if self.eventsub:
+            await self.eventsub.stop()
+        if self.twitch_tokens:
+            await self.twitch_tokens.stop()
+        await self.interaction_service.stop()
+        if self.summarizer:
+            await self.summarizer.stop()
+        if self.conversation_log:
+            self.context_manager.log = None
+            self.conversation_log.close()
+            self.conversation_log = None
+        await self.tts_service.stop()
+        await self.llm_service.stop()
+        await self.unity_bridge.stop()
+        await self.turns.stop_listening(self.event_bus)
+        await self.target_detector.stop()
+        await self.artifact_store.stop()
+        await HttpPool.get_instance().close()
+        await LoopWatchdog.get_instance().stop()
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
@@ -1,16 +1,75 @@
 # app/services/context_manager.py
 
+import asyncio
+import logging
 from collections import deque
+from typing import Optional
+
+from app.services.conversation_log import ConversationLog
+
+logger = logging.getLogger(__name__)
 
 class ContextManager:
-    def __init__(self, max_history=5):
+    """
+    What Penny remembers between turns. The last `max_history` exchanges go into the
+    prompt verbatim; older ones are queued for ConversationSummarizer, which folds
+    them into `story_so_far` in the background. With a ConversationLog everything
+    is also kept on disk, and a restart picks up the latest summary and recent turns
+    from the end of the log.
+    """
+
+    def __init__(self, max_history=5, log: Optional[ConversationLog] = None, max_pending: int = 50):
         self.chat_history = deque(maxlen=max_history)  # Stores (user_input, ai_response) pairs
+        self._history_seqs = deque(maxlen=max_history)
         self.latest_vision_summary = None
         self.last_emotions = deque(maxlen=10)
+        self.story_so_far = ""
+        self.summarized_through = 0
+        # (seq, user_input, ai_response) that left chat_history and aren't in the story yet; if the
+        # summarizer can't keep up (e.g. the LLM is down) the oldest are dropped, as before
+        self.pending_summary: deque[tuple[int, str, str]] = deque(maxlen=max_pending)
+        self.summary_wanted = asyncio.Event()
+        self.log: Optional[ConversationLog] = None
+        self._seq = 0
+        if log:
+            self.attach_log(log)
+
+    def attach_log(self, log: ConversationLog):
+        """Starts persisting to `log`, after picking up where it left off."""
+        self.log = log
+        summary, turns = self.log.recover(self.chat_history.maxlen + self.pending_summary.maxlen)
+        if summary:
+            self.story_so_far = summary.get("text", "")
+            self.summarized_through = summary.get("through", 0)
+        for turn in turns:
+            if turn["seq"] > self.summarized_through:
+                self._remember(turn["seq"], turn.get("user", ""), turn.get("penny", ""))
+        self._seq = self.log.next_seq - 1
+        logger.info(
+            f"[ContextManager] Resumed {len(self.chat_history)} recent turns, {len(self.pending_summary)} to summarize"
+            f"{', with a story so far' if self.story_so_far else ''}."
+        )
+
+    def _remember(self, seq: int, user_input: str, ai_response: str):
+        if len(self.chat_history) == self.chat_history.maxlen:
+            self.pending_summary.append((self._history_seqs[0], *self.chat_history[0]))
+            self.summary_wanted.set()
+        self.chat_history.append((user_input, ai_response))
+        self._history_seqs.append(seq)
 
     def update_chat(self, user_input: str, ai_response: str):
         """Add a new user/AI message pair to the conversation history."""
-        self.chat_history.append((user_input, ai_response))
+        self._seq = self.log.append("turn", user=user_input, penny=ai_response) if self.log else self._seq + 1
+        self._remember(self._seq, user_input, ai_response)
+
+    def apply_summary(self, text: str, through: int):
+        """Replaces the story so far with one that covers every turn up to `through`."""
+        self.story_so_far = text
+        self.summarized_through = through
+        while self.pending_summary and self.pending_summary[0][0] <= through:
+            self.pending_summary.popleft()
+        if self.log:
+            self.log.append("summary", text=text, through=through)
 
     def set_vision_context(self, vision_summary: str):
         """Store the latest vision summary to include in prompts."""
@@ -20,6 +79,10 @@ class ContextManager:
         """Constructs the full prompt to send to the LLM."""
         parts = []
 
+        # Add the running summary of everything older than the history below
+        if self.story_so_far:
+            parts.append("[STORY SO FAR]\n" + self.story_so_far)
+
         # Add chat history
         if self.chat_history:
             history = "\n".join(f"User: {u}\nPenny: {a}" for u, a in self.chat_history)
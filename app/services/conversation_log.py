@@ -0,0 +1,177 @@
+# app/services/conversation_log.py
+"""
+Append-only conversation log on disk. Every exchange Penny has is appended as a
+JSON line, and so is every rolling summary the summarizer produces. Files are
+rotated into segments named after their first sequence number, so old ones can
+be archived or pruned as a whole.
+
+Nothing is ever replayed: on startup the log is read backwards from the end
+through mmap, up to the newest summary, which already stands for everything
+before it.
+
+    {"seq": 41, "t": 1760000000.0, "kind": "turn", "user": "...", "penny": "..."}
+    {"seq": 42, "t": 1760000001.0, "kind": "summary", "text": "...", "through": 37}
+
+A directory has one writer at a time: the log holds an exclusive flock on its
+lock file while open, so a second worker process pointed at the same directory
+gets ConversationLogLocked instead of interleaving sequence numbers.
+"""
+
+import fcntl
+import json
+import logging
+import mmap
+import os
+import time
+from typing import Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".jsonl"
+SUMMARY_MARKER = b'"kind": "summary"'  # Quotes inside logged text are escaped, so this only matches the field
+LOCK_NAME = ".lock"
+
+class ConversationLogLocked(RuntimeError):
+    pass
+
+class ConversationLog:
+    def __init__(self, directory: str, segment_bytes: int = 8 * 1024 * 1024, max_segments: int = 0):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments  # 0 keeps every segment
+        self.next_seq = 1
+        self.summarized_through = 0  # Newest turn covered by a logged summary; older segments may be pruned
+        self._fd: Optional[int] = None
+        self._segment_size = 0
+        os.makedirs(directory, exist_ok=True)
+        self._lock_fd = self._lock(directory)
+        self._open_tail()
+
+    @staticmethod
+    def _lock(directory: str) -> int:
+        fd = os.open(os.path.join(directory, LOCK_NAME), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            raise ConversationLogLocked(f"{directory} is already in use by another process.")
+        return fd
+
+    def _segments(self) -> list[str]:
+        names = [n for n in os.listdir(self.directory) if n.startswith(SEGMENT_PREFIX) and n.endswith(SEGMENT_SUFFIX)]
+        return [os.path.join(self.directory, n) for n in sorted(names)]
+
+    def _open_tail(self):
+        segments = self._segments()
+        if not segments:
+            return
+        path = segments[-1]
+        self._repair(path)
+        last = next(self._read_backwards(path), None)
+        self.next_seq = last["seq"] + 1 if last else int(os.path.basename(path)[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND)
+        self._segment_size = os.path.getsize(path)
+
+    def _repair(self, path: str):
+        """Cuts off a line left half-written by a crash, so the next append starts on a fresh line."""
+        size = os.path.getsize(path)
+        if not size:
+            return
+        with open(path, "r+b") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if data[size - 1:size] == b"\n":
+                return
+            keep = data.rfind(b"\n") + 1
+        logger.warning(f"[ConversationLog] Dropping {size - keep} bytes of a partial record at the end of {path}.")
+        os.truncate(path, keep)
+
+    def _rotate(self):
+        if self._fd is not None:
+            os.close(self._fd)
+        path = os.path.join(self.directory, f"{SEGMENT_PREFIX}{self.next_seq:012d}{SEGMENT_SUFFIX}")
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        self._segment_size = 0
+        self._prune()
+
+    def _prune(self):
+        segments = self._segments()
+        while self.max_segments and len(segments) > self.max_segments:
+            # Only segments whose every turn is already folded into a summary can go
+            following = int(os.path.basename(segments[1])[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+            if following - 1 > self.summarized_through:
+                break
+            os.remove(segments.pop(0))
+
+    def append(self, kind: str, **fields) -> int:
+        """Appends one record and returns its sequence number. A single small write; no fsync."""
+        if self._fd is None or self._segment_size >= self.segment_bytes:
+            self._rotate()
+        seq = self.next_seq
+        data = (json.dumps({"seq": seq, "t": round(time.time(), 3), "kind": kind, **fields}, ensure_ascii=False) + "\n").encode("utf-8")
+        os.write(self._fd, data)
+        self._segment_size += len(data)
+        self.next_seq += 1
+        if kind == "summary":
+            self.summarized_through = fields.get("through", self.summarized_through)
+        return seq
+
+    def _read_backwards(self, path: str) -> Iterator[dict]:
+        if not os.path.getsize(path):
+            return
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            end = len(data)
+            while end > 0:
+                start = data.rfind(b"\n", 0, end - 1) + 1
+                line = data[start:end]
+                end = start
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    def read_backwards(self) -> Iterator[dict]:
+        """Records newest first, across segments; only the pages actually reached are read."""
+        for path in reversed(self._segments()):
+            yield from self._read_backwards(path)
+
+    def _latest_summary(self) -> Optional[dict]:
+        for path in reversed(self._segments()):
+            if not os.path.getsize(path):
+                continue
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                found = data.rfind(SUMMARY_MARKER)
+                if found >= 0:
+                    start = data.rfind(b"\n", 0, found) + 1
+                    return json.loads(data[start:data.find(b"\n", found)])
+        return None
+
+    def recover(self, max_turns: int) -> tuple[Optional[dict], list[dict]]:
+        """
+        The newest summary and up to `max_turns` of the turns it doesn't cover, oldest
+        first. Reading stops at the turns it covers, so startup cost doesn't grow with the log.
+        """
+        summary, turns = None, []
+        for record in self.read_backwards():
+            kind = record.get("kind")
+            if kind == "summary" and summary is None:
+                # Turns just before it can still be newer than what it covers, so keep going until those end
+                summary = record
+            elif kind == "turn":
+                if summary is not None and record["seq"] <= summary.get("through", 0):
+                    break
+                if len(turns) == max_turns:
+                    # More unsummarized turns than are wanted: jump straight to the summary instead of parsing them
+                    summary = summary or self._latest_summary()
+                    break
+                turns.append(record)
+        if summary:
+            self.summarized_through = summary.get("through", 0)
+        return summary, turns[::-1]
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)  # Releases the flock
+            self._lock_fd = None
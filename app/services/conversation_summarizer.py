@@ -0,0 +1,88 @@
+# app/services/conversation_summarizer.py
+
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from app.services.context_manager import ContextManager
+from app.services.streaming_openai_service import StreamingOpenAIService
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_INSTRUCTION = (
+    "You maintain the running memory of a livestream co-host called Penny. "
+    "Merge the new exchanges into the story so far. Keep names, running jokes, promises, "
+    "open questions and what the streamer is doing; drop greetings and filler. "
+    "Write plain third-person prose, no lists or headings."
+)
+
+class ConversationSummarizer:
+    """
+    Folds exchanges that age out of the prompt history into ContextManager.story_so_far.
+    Runs as a background task, one LLM call per `batch_turns` aged-out exchanges, so
+    replies never wait on it and build_prompt only pastes in the finished summary.
+    """
+
+    def __init__(
+        self,
+        context_manager: ContextManager,
+        llm_service: StreamingOpenAIService,
+        model_name: str = "gpt-4o-mini",
+        batch_turns: int = 4,
+        max_chars: int = 1200,
+        retry_seconds: float = 30.0,
+    ):
+        self.context_manager = context_manager
+        self.llm_service = llm_service
+        self.model_name = model_name
+        self.batch_turns = max(1, batch_turns)
+        self.max_chars = max_chars
+        self.retry_seconds = retry_seconds
+        self.folds = 0
+        self.last_fold_seconds = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"[Summarizer] Folding every {self.batch_turns} aged-out turns into the story so far.")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        wanted = self.context_manager.summary_wanted
+        while True:
+            await wanted.wait()
+            wanted.clear()
+            while len(self.context_manager.pending_summary) >= self.batch_turns:
+                try:
+                    await self.fold()
+                except Exception as e:
+                    logger.warning(f"[Summarizer] Summary failed, retrying in {self.retry_seconds:.0f}s: {e}")
+                    await asyncio.sleep(self.retry_seconds)
+
+    async def fold(self):
+        """Summarizes everything currently pending into the story so far."""
+        batch = list(self.context_manager.pending_summary)
+        if not batch:
+            return
+        previous = self.context_manager.story_so_far
+        exchanges = "\n".join(f"User: {user}\nPenny: {penny}" for _, user, penny in batch)
+        prompt = (
+            f"Story so far:\n{previous or '(nothing yet)'}\n\n"
+            f"New exchanges:\n{exchanges}\n\n"
+            f"Rewrite the story so far to include them, in at most {self.max_chars} characters."
+        )
+        started = time.perf_counter()
+        text = await self.llm_service.complete(SUMMARY_INSTRUCTION, prompt, self.model_name, max_tokens=self.max_chars // 3)
+        if not text or text.startswith("[ERROR]"):
+            raise RuntimeError("LLM returned no summary.")
+        self.context_manager.apply_summary(text[:self.max_chars], through=batch[-1][0])
+        self.folds += 1
+        self.last_fold_seconds = time.perf_counter() - started
+        logger.info(f"[Summarizer] Folded {len(batch)} turns into the story so far in {self.last_fold_seconds:.2f}s ({len(text)} chars).")
@@ -0,0 +1,195 @@
+# app/services/event_aggregator.py
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+
+from app.core.events import TwitchUserEvent
+
+logger = logging.getLogger(__name__)
+
+PASSTHROUGH_TYPES = {"raid"}
+MAX_NAMED_USERS = 3
+
+def _plural(count: int, word: str) -> str:
+    return f"{count} {word}" if count == 1 else f"{count} {word}s"
+
+@dataclass
+class _Burst:
+    key: tuple
+    started_at: float
+    events: list[TwitchUserEvent] = field(default_factory=list)
+    handle: Optional[asyncio.TimerHandle] = None
+
+class EventAggregator:
+    """
+    Merges bursts of Twitch events before they reach reaction generation, so a gift
+    bomb or a wave of subs costs one LLM call and one TTS job instead of dozens.
+
+    Events are grouped by type (and gifter/cheerer where it matters). A group is
+    flushed once no related event has arrived for `quiet_seconds`, or at the
+    latest `max_seconds` after its first event; a gift group also flushes as soon
+    as all of its recipients have arrived.
+    """
+
+    def __init__(
+        self,
+        on_flush: Callable[[TwitchUserEvent], Awaitable[None]],
+        quiet_seconds: float = 2.0,
+        max_seconds: float = 10.0,
+    ):
+        self.on_flush = on_flush
+        self.quiet_seconds = quiet_seconds
+        self.max_seconds = max_seconds
+        self._bursts: dict[tuple, _Burst] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self.events_in = 0
+        self.events_out = 0
+
+    def _key(self, event: TwitchUserEvent) -> Optional[tuple]:
+        if event.event_type in PASSTHROUGH_TYPES:
+            return None
+        if event.event_type == "sub" and event.details.get("is_gift"):
+            # channel.subscribe for a gift recipient doesn't name the gifter: attach it to
+            # the open gift burst if there is one
+            gift_keys = [key for key in self._bursts if key[0] == "gift"]
+            return gift_keys[-1] if gift_keys else ("gift", None)
+        if event.event_type in ("sub", "resub"):
+            return ("sub",)
+        if event.event_type in ("gift", "cheer"):
+            return (event.event_type, event.username.lower())
+        return (event.event_type,)
+
+    def add(self, event: TwitchUserEvent) -> None:
+        self.events_in += 1
+        key = self._key(event)
+        if key is None:
+            self._emit(event)
+            return
+
+        now = time.monotonic()
+        burst = self._bursts.get(key)
+        if burst is None and key[0] == "gift" and key[1] is not None and ("gift", None) in self._bursts:
+            # Recipients arrived before the gifter's event: adopt them
+            burst = self._bursts.pop(("gift", None))
+            burst.key = key
+            self._bursts[key] = burst
+        if burst is None:
+            burst = self._bursts[key] = _Burst(key=key, started_at=now)
+        burst.events.append(event)
+
+        if burst.handle:
+            burst.handle.cancel()
+        if self._gift_complete(burst):
+            self._flush(key)
+            return
+        delay = min(self.quiet_seconds, burst.started_at + self.max_seconds - now)
+        burst.handle = asyncio.get_running_loop().call_later(max(0.0, delay), self._flush, key)
+
+    def _gift_complete(self, burst: _Burst) -> bool:
+        if burst.key[0] != "gift":
+            return False
+        total = sum(e.details.get("count") or 0 for e in burst.events if e.event_type == "gift")
+        # Only gift recipients; ordinary subs merged in from a sub wave (see _flush) don't count
+        recipients = sum(1 for e in burst.events if e.event_type == "sub" and e.details.get("is_gift"))
+        return total > 0 and recipients >= total
+
+    def _flush(self, key: tuple) -> None:
+        burst = self._bursts.get(key)
+        if burst is None:
+            return
+        if key == ("sub",) and any(k[0] == "gift" for k in self._bursts):
+            # A sub wave during a gift bomb is reacted to together with the gift
+            gift_burst = next(b for k, b in self._bursts.items() if k[0] == "gift")
+            gift_burst.events.extend(burst.events)
+            del self._bursts[key]
+            return
+        del self._bursts[key]
+        if burst.handle:
+            burst.handle.cancel()
+        events = burst.events
+        if key[0] == "gift" and ("sub",) in self._bursts:
+            sub_burst = self._bursts.pop(("sub",))
+            if sub_burst.handle:
+                sub_burst.handle.cancel()
+            events = events + sub_burst.events
+        self._emit(self.summarize(events))
+
+    def _emit(self, event: TwitchUserEvent) -> None:
+        self.events_out += 1
+        task = asyncio.create_task(self.on_flush(event))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def flush_all(self) -> None:
+        for key in list(self._bursts):
+            self._flush(key)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    @staticmethod
+    def summarize(events: list[TwitchUserEvent]) -> TwitchUserEvent:
+        if len(events) == 1 and not (events[0].event_type == "sub" and events[0].details.get("is_gift")):
+            return events[0]
+
+        first = events[0]
+        gifts = [e for e in events if e.event_type == "gift"]
+        if gifts or first.details.get("is_gift"):
+            gifter = gifts[0].username if gifts else "Someone"
+            recipients = [e for e in events if e.event_type == "sub" and e.details.get("is_gift")]
+            gifted = sum(e.details.get("count") or 0 for e in gifts) or len(recipients)
+            others = [e for e in events if e.event_type in ("sub", "resub") and not e.details.get("is_gift")]
+            summary = f"{gifter} gifted {_plural(gifted, 'sub')}"
+            if others:
+                summary += f", {_plural(len(others), 'new sub')}"
+            return TwitchUserEvent("gift", gifter, {
+                "count": gifted,
+                "tier": (gifts[0] if gifts else first).details.get("tier"),
+                "gifter": gifter,
+                "new_subs": len(others),
+                "aggregated": len(events),
+                "summary": summary,
+            })
+
+        if first.event_type == "cheer":
+            bits = sum(e.details.get("bits") or 0 for e in events)
+            messages = [e.details.get("message") for e in events if e.details.get("message")]
+            return TwitchUserEvent("cheer", first.username, {
+                "bits": bits,
+                "message": messages[-1] if messages else "",
+                "aggregated": len(events),
+                "summary": f"{first.username} cheered {bits} bits across {len(events)} cheers",
+            })
+
+        users = list(dict.fromkeys(e.username for e in events))
+        named = ", ".join(users[:MAX_NAMED_USERS]) + (f" and {_plural(len(users) - MAX_NAMED_USERS, 'other')}" if len(users) > MAX_NAMED_USERS else "")
+        if first.event_type in ("sub", "resub"):
+            new_subs = sum(1 for e in events if e.event_type == "sub")
+            resubs = len(events) - new_subs
+            parts = [_plural(n, label) for n, label in ((new_subs, "new sub"), (resubs, "resub")) if n]
+            summary = f"{' and '.join(parts)} from {named}"
+            return TwitchUserEvent("sub" if new_subs >= resubs else "resub", users[0], {
+                "count": len(events),
+                "new_subs": new_subs,
+                "resubs": resubs,
+                "users": users,
+                "aggregated": len(events),
+                "summary": summary,
+            })
+
+        return TwitchUserEvent(first.event_type, users[0], {
+            "count": len(events),
+            "users": users,
+            "aggregated": len(events),
+            "summary": f"{_plural(len(events), first.event_type)} from {named}",
+        })
+
+    def stats(self) -> dict:
+        return {
+            "events_in": self.events_in,
+            "reactions_out": self.events_out,
+            "saved": self.events_in - self.events_out - sum(len(b.events) for b in self._bursts.values()),
+            "open_bursts": len(self._bursts),
+        }
@@ -0,0 +1,176 @@
+# app/services/eventsub_ingest.py
+
+import logging
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from app.core.config import settings
+from app.core.event_bus import EventBus
+from app.core.events import TwitchMessageEvent, TwitchUserEvent
+from app.core.unity_protocol import event_frame
+from app.services.websocket_manager import WebSocketManager
+
+try:
+    import orjson
+    loads = orjson.loads
+except ImportError:  # orjson is optional; the stdlib decoder is ~2-3x slower on EventSub payloads
+    import json
+    loads = json.loads
+
+logger = logging.getLogger(__name__)
+CHAT_MESSAGE_TYPE = "channel.chat.message"
+
+class MessageDeduper:
+    """
+    Remembers message_ids for `window_seconds` (bounded to `max_entries`) so Twitch's
+    at-least-once redeliveries are only handled once. Ids arrive in time order, so
+    expiry only ever looks at the oldest entries.
+    """
+
+    def __init__(self, window_seconds: float = 600.0, max_entries: int = 10000):
+        self.window_seconds = window_seconds
+        self.max_entries = max_entries
+        self._seen: OrderedDict[str, float] = OrderedDict()
+        self.duplicates = 0
+
+    def seen(self, message_id: str, now: Optional[float] = None) -> bool:
+        """Returns True if `message_id` was already seen in the window, otherwise records it."""
+        now = time.monotonic() if now is None else now
+        seen = self._seen
+        cutoff = now - self.window_seconds
+        while seen:
+            oldest_id, oldest_at = next(iter(seen.items()))
+            if oldest_at >= cutoff and len(seen) < self.max_entries:
+                break
+            seen.popitem(last=False)
+
+        if message_id in seen:
+            self.duplicates += 1
+            return True
+        seen[message_id] = now
+        return False
+
+    def __len__(self):
+        return len(self._seen)
+
+def _user(event: dict, prefix: str = "user") -> str:
+    if event.get("is_anonymous"):
+        return "Anonymous"
+    return event.get(f"{prefix}_name") or event.get(f"{prefix}_login") or "unknown"
+
+def _tier(event: dict) -> Optional[int]:
+    tier = event.get("tier")
+    return int(tier) // 1000 if tier and tier.isdigit() else None
+
+def _map_subscribe(event: dict) -> TwitchUserEvent:
+    return TwitchUserEvent("sub", _user(event), {"tier": _tier(event), "is_gift": bool(event.get("is_gift"))})
+
+def _map_resub(event: dict) -> TwitchUserEvent:
+    return TwitchUserEvent("resub", _user(event), {
+        "tier": _tier(event),
+        "months": event.get("cumulative_months"),
+        "streak": event.get("streak_months"),
+        "message": (event.get("message") or {}).get("text", ""),
+    })
+
+def _map_gift(event: dict) -> TwitchUserEvent:
+    return TwitchUserEvent("gift", _user(event), {
+        "tier": _tier(event),
+        "count": event.get("total"),
+        "gifter": _user(event),
+        "cumulative_total": event.get("cumulative_total"),
+    })
+
+def _map_cheer(event: dict) -> TwitchUserEvent:
+    return TwitchUserEvent("cheer", _user(event), {"bits": event.get("bits"), "message": event.get("message", "")})
+
+def _map_raid(event: dict) -> TwitchUserEvent:
+    return TwitchUserEvent("raid", _user(event, "from_broadcaster_user"), {"viewer_count": event.get("viewers")})
+
+def _map_follow(event: dict) -> TwitchUserEvent:
+    return TwitchUserEvent("follow", _user(event), {})
+
+EVENT_MAPPERS: dict[str, Callable[[dict], TwitchUserEvent]] = {
+    "channel.subscribe": _map_subscribe,
+    "channel.subscription.message": _map_resub,
+    "channel.subscription.gift": _map_gift,
+    "channel.cheer": _map_cheer,
+    "channel.raid": _map_raid,
+    "channel.follow": _map_follow,
+}
+
+def map_chat_message(event: dict) -> TwitchMessageEvent:
+    # Badges in the IRC tag form ("moderator/1,subscriber/12") so ChatTriage reads both sources alike
+    badges = ",".join(f"{b.get('set_id')}/{b.get('id')}" for b in event.get("badges") or [])
+    return TwitchMessageEvent(
+        username=event.get("chatter_user_name") or event.get("chatter_user_login") or "unknown",
+        message=(event.get("message") or {}).get("text", ""),
+        tags={"badges": badges, "id": event.get("message_id", "")}
+    )
+
+def map_notification(subscription_type: str, event: dict) -> Optional[TwitchUserEvent]:
+    mapper = EVENT_MAPPERS.get(subscription_type)
+    return mapper(event) if mapper else None
+
+class EventSubIngest:
+    """
+    Turns EventSub notifications into TwitchUserEvents: drops redelivered message_ids,
+    maps the payload by subscription type, then fans out to the EventBus (for
+    InteractionService) and to the Unity clients.
+    """
+
+    def __init__(self, event_bus: EventBus, ws_manager: WebSocketManager, deduper: Optional[MessageDeduper] = None):
+        self.event_bus = event_bus
+        self.ws_manager = ws_manager
+        self.deduper = deduper or MessageDeduper(
+            window_seconds=getattr(settings, 'EVENTSUB_DEDUPE_WINDOW_SECONDS', 600.0),
+            max_entries=getattr(settings, 'EVENTSUB_DEDUPE_MAX_ENTRIES', 10000)
+        )
+        self.received = 0
+        self.routed = 0
+        self.unmapped = 0
+
+    def is_duplicate(self, metadata: dict) -> bool:
+        message_id = metadata.get("message_id")
+        return bool(message_id) and self.deduper.seen(message_id)
+
+    async def handle_notification(self, data: dict) -> Optional[TwitchUserEvent]:
+        self.received += 1
+        metadata = data.get("metadata", {})
+        if self.is_duplicate(metadata):
+            logger.debug(f"[EventSubIngest] Duplicate message {metadata.get('message_id')} dropped.")
+            return None
+
+        payload = data.get("payload", {})
+        subscription_type = metadata.get("subscription_type") or payload.get("subscription", {}).get("type")
+        if subscription_type == CHAT_MESSAGE_TYPE:
+            # Chat goes to InteractionService's triage only; Unity doesn't need every line
+            self.routed += 1
+            self.event_bus.emit(map_chat_message(payload.get("event", {})))
+            return None
+
+        twitch_event = map_notification(subscription_type, payload.get("event", {}))
+        if twitch_event is None:
+            self.unmapped += 1
+            logger.debug(f"[EventSubIngest] No mapping for {subscription_type}.")
+            return None
+
+        self.routed += 1
+        logger.info(f"[EventSubIngest] {twitch_event.event_type} from {twitch_event.username}")
+        # The reaction goes through the LLM and TTS; don't hold up the socket reader for it
+        self.event_bus.emit(twitch_event)
+        await self.ws_manager.broadcast_frame(
+            event_frame(twitch_event.event_type, user=twitch_event.username, **twitch_event.details),
+            critical=True
+        )
+        return twitch_event
+
+    def stats(self) -> dict:
+        return {
+            "received": self.received,
+            "routed": self.routed,
+            "duplicates": self.deduper.duplicates,
+            "unmapped": self.unmapped,
+            "dedupe_entries": len(self.deduper),
+        }
@@ -0,0 +1,275 @@
+# app/services/helix_client.py
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+import aiohttp
+
+from app.core.config import settings
+from app.services.http_pool import HttpPool
+from app.services.twitch_token_refresh import TwitchTokenManager, TwitchTokenProvider
+
+logger = logging.getLogger(__name__)
+
+HELIX_URL = getattr(settings, 'TWITCH_API_URL', "https://api.twitch.tv/helix")
+MAX_BATCH = 100  # Helix accepts up to 100 repeated id/login parameters
+MAX_RETRIES = 3
+_MISSING = object()
+
+class TTLCache:
+    """Small LRU cache whose entries also expire after `ttl` seconds."""
+
+    def __init__(self, ttl: float, max_entries: int = 5000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+class RateLimitBucket:
+    """Tracks Helix's Ratelimit-* headers and holds requests back when the bucket is nearly empty."""
+
+    def __init__(self, reserve: int = 2):
+        self.reserve = reserve
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset_at = 0.0  # Unix time
+        self.waits = 0
+        self._probing = False
+        self._known = asyncio.Event()
+        self._logged_reset = 0.0
+
+    def update(self, headers) -> None:
+        try:
+            if "Ratelimit-Limit" in headers:
+                self.limit = int(headers["Ratelimit-Limit"])
+            reset_at = float(headers.get("Ratelimit-Reset", self.reset_at))
+            if "Ratelimit-Remaining" in headers:
+                remaining = int(headers["Ratelimit-Remaining"])
+                # Within a window, responses to earlier requests report stale (higher) counts
+                if reset_at > self.reset_at or self.remaining is None:
+                    self.remaining = remaining
+                else:
+                    self.remaining = min(self.remaining, remaining)
+            self.reset_at = reset_at
+        except ValueError:
+            pass
+        self.settle()
+
+    def settle(self) -> None:
+        """Ends the probe phase, whether or not the probe got rate-limit headers back."""
+        if self._probing:
+            self._probing = False
+            self._known.set()
+
+    async def acquire(self) -> None:
+        # Until one response has told us the bucket size, send a single probe request
+        while self.remaining is None and self._probing:
+            await self._known.wait()
+        if self.remaining is None:
+            self._probing = True
+            self._known.clear()
+            return
+
+        while self.remaining <= self.reserve:
+            delay = self.reset_at - time.time()
+            if delay <= 0:
+                self.remaining = self.limit if self.limit is not None else self.reserve + 1
+                break
+            self.waits += 1
+            if self._logged_reset != self.reset_at:
+                self._logged_reset = self.reset_at
+                logger.warning(f"[Helix] Rate limit nearly exhausted ({self.remaining} left), waiting {delay:.1f}s")
+            await asyncio.sleep(delay)
+        if self.remaining is not None:
+            self.remaining -= 1  # Optimistic; corrected by the next response's headers
+
+class _Batcher:
+    """
+    Collects lookups for one Helix endpoint for `window` seconds and sends them as
+    one ?param=a&param=b request. Lookups for a key already in flight share its future.
+    """
+
+    def __init__(self, fetch: Callable, window: float):
+        self.fetch = fetch
+        self.window = window
+        self._pending: dict[str, asyncio.Future] = {}
+        self._queued: list[str] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+
+    def get(self, key: str) -> asyncio.Future:
+        future = self._pending.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._pending[key] = future
+            self._queued.append(key)
+            if len(self._queued) >= MAX_BATCH:
+                self._flush()
+            elif self._flush_handle is None:
+                self._flush_handle = asyncio.get_running_loop().call_later(self.window, self._flush)
+        return future
+
+    def _flush(self):
+        if self._flush_handle:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        keys, self._queued = self._queued, []
+        if keys:
+            asyncio.ensure_future(self._run(keys))
+
+    async def _run(self, keys: list[str]):
+        try:
+            results = await self.fetch(keys)
+        except Exception as e:
+            for key in keys:
+                future = self._pending.pop(key, None)
+                if future and not future.done():
+                    future.set_exception(e)
+            return
+        for key in keys:
+            future = self._pending.pop(key, None)
+            if future and not future.done():
+                future.set_result(results.get(key))
+
+class HelixClient:
+    """
+    Shared Helix client: requests go over the pooled HttpPool session with the app
+    token, are paced by the Ratelimit-* headers, and user/channel lookups are
+    cached and coalesced into batched requests.
+    """
+
+    def __init__(
+        self,
+        tokens: Optional[TwitchTokenProvider] = None,
+        base_url: str = HELIX_URL,
+        http: Optional[aiohttp.ClientSession] = None,
+    ):
+        self.tokens = tokens or TwitchTokenManager.get_instance().app
+        self.base_url = base_url.rstrip("/")
+        self._http = http
+        self.bucket = RateLimitBucket()
+        self.requests = 0
+
+        window = getattr(settings, 'HELIX_BATCH_WINDOW_MS', 10.0) / 1000
+        self.users = TTLCache(getattr(settings, 'HELIX_USER_CACHE_TTL_SECONDS', 3600.0))
+        self.channels = TTLCache(getattr(settings, 'HELIX_CHANNEL_CACHE_TTL_SECONDS', 300.0))
+        self._logins = _Batcher(lambda keys: self._fetch_users("login", keys), window)
+        self._user_ids = _Batcher(lambda keys: self._fetch_users("id", keys), window)
+        self._channel_ids = _Batcher(self._fetch_channels, window)
+
+    def _client(self) -> aiohttp.ClientSession:
+        return self._http if self._http is not None else HttpPool.get_instance().session()
+
+    async def request(self, method: str, path: str, params=None, json: Any = None) -> tuple[int, Any]:
+        """Sends one Helix request; retries after a 401 (with a fresh token) or a 429 (after the reset)."""
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        token_refreshed = False
+        for attempt in range(MAX_RETRIES):
+            await self.bucket.acquire()
+            token = await self.tokens.get_token()
+            headers = {"Client-Id": settings.TWITCH_CLIENT_ID, "Authorization": f"Bearer {token}"}
+            self.requests += 1
+            try:
+                async with self._client().request(method, url, params=params, json=json, headers=headers) as resp:
+                    self.bucket.update(resp.headers)
+                    if resp.status == 401 and not token_refreshed:
+                        token_refreshed = True
+                        await self.tokens.refresh(stale_token=token)
+                        continue
+                    if resp.status == 429 and attempt < MAX_RETRIES - 1:
+                        self.bucket.remaining = 0
+                        continue
+                    body = await resp.json(content_type=None) if resp.content_type == "application/json" else await resp.text()
+                    return resp.status, body
+            finally:
+                self.bucket.settle()
+        return 429, None
+
+    async def _fetch_users(self, field: str, keys: list[str]) -> dict[str, Optional[dict]]:
+        status, body = await self.request("GET", "users", params=[(field, key) for key in keys])
+        if status != 200:
+            raise RuntimeError(f"Helix /users returned {status}: {body}")
+        found = {}
+        for user in body.get("data", []):
+            self._cache_user(user)
+            found[user["login"] if field == "login" else user["id"]] = user
+        for key in keys:
+            if key not in found:
+                # Negative-cache unknown names briefly so typo'd shoutouts don't hit the API each time
+                self.users.set(f"{field}:{key}", None, ttl=60.0)
+        return found
+
+    async def _fetch_channels(self, keys: list[str]) -> dict[str, Optional[dict]]:
+        status, body = await self.request("GET", "channels", params=[("broadcaster_id", key) for key in keys])
+        if status != 200:
+            raise RuntimeError(f"Helix /channels returned {status}: {body}")
+        found = {}
+        for channel in body.get("data", []):
+            self.channels.set(channel["broadcaster_id"], channel)
+            found[channel["broadcaster_id"]] = channel
+        return found
+
+    def _cache_user(self, user: dict):
+        self.users.set(f"login:{user['login']}", user)
+        self.users.set(f"id:{user['id']}", user)
+
+    async def get_user(self, login: Optional[str] = None, user_id: Optional[str] = None) -> Optional[dict]:
+        if login:
+            field, key, batcher = "login", login.lower().lstrip("@"), self._logins
+        elif user_id:
+            field, key, batcher = "id", str(user_id), self._user_ids
+        else:
+            return None
+        cached = self.users.get(f"{field}:{key}", _MISSING)
+        if cached is not _MISSING:
+            return cached
+        return await batcher.get(key)
+
+    async def get_users(self, logins: list[str]) -> list[Optional[dict]]:
+        return list(await asyncio.gather(*(self.get_user(login=login) for login in logins)))
+
+    async def get_channel(self, broadcaster_id: str) -> Optional[dict]:
+        cached = self.channels.get(str(broadcaster_id), _MISSING)
+        if cached is not _MISSING:
+            return cached
+        return await self._channel_ids.get(str(broadcaster_id))
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "rate_limit_remaining": self.bucket.remaining,
+            "rate_limit_waits": self.bucket.waits,
+            "user_cache": {"size": len(self.users), "hits": self.users.hits, "misses": self.users.misses},
+            "channel_cache": {"size": len(self.channels), "hits": self.channels.hits, "misses": self.channels.misses},
+        }
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
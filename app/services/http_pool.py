@@ -0,0 +1,46 @@
+# app/services/http_pool.py
+
+import logging
+from typing import Optional
+
+import aiohttp
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class HttpPool:
+    """One keep-alive aiohttp session shared by the Twitch token, Helix and EventSub calls."""
+
+    def __init__(self, limit: int = 32, limit_per_host: int = 16):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def session(self) -> aiohttp.ClientSession:
+        # Created lazily so it binds to the running event loop
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=300,
+                keepalive_timeout=60,
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=15))
+        return self._session
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls(
+                limit=getattr(settings, 'HTTP_POOL_LIMIT', 32),
+                limit_per_host=getattr(settings, 'HTTP_POOL_LIMIT_PER_HOST', 16)
+            )
+        return cls._instance
@@ -0,0 +1,71 @@
+# app/services/inference_client.py
+
+import asyncio
+import logging
+import time
+from multiprocessing import shared_memory
+from typing import Union
+
+import numpy as np
+
+from app.core.inference_protocol import AUDIO_ENCODED, AUDIO_F32, read_message, write_message
+
+logger = logging.getLogger(__name__)
+
+class InferenceClient:
+    """
+    Talks to the shared inference server (app/services/inference_server.py) over its
+    Unix socket. Each request gets its own connection and its own shared-memory
+    block, which the server reads in place; only the block's name crosses the socket.
+    """
+
+    def __init__(self, socket_path: str, timeout: float = 120.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    async def _call(self, request: dict) -> dict:
+        reader, writer = await asyncio.open_unix_connection(self.socket_path)
+        try:
+            write_message(writer, request)
+            await writer.drain()
+            response = await asyncio.wait_for(read_message(reader), self.timeout)
+        finally:
+            writer.close()
+            await writer.wait_closed()
+        if "error" in response:
+            raise RuntimeError(f"Inference server: {response['error']}")
+        return response
+
+    async def ping(self) -> dict:
+        return await self._call({"op": "ping"})
+
+    async def wait_ready(self, timeout: float = 300.0) -> dict:
+        """Waits for the server to answer a ping, e.g. while it is still loading the model."""
+        deadline = time.perf_counter() + timeout
+        while True:
+            try:
+                info = await self.ping()
+                logger.info(f"[InferenceClient] Using inference server at {self.socket_path} (model '{info.get('model')}').")
+                return info
+            except (OSError, asyncio.IncompleteReadError) as e:
+                if time.perf_counter() > deadline:
+                    raise TimeoutError(f"Inference server at {self.socket_path} not reachable: {e}") from e
+                await asyncio.sleep(0.2)
+
+    async def transcribe(self, audio: Union[bytes, np.ndarray]) -> str:
+        """Transcribes encoded audio bytes, or float32 samples already at 16 kHz."""
+        if isinstance(audio, np.ndarray):
+            payload = memoryview(np.ascontiguousarray(audio, dtype=np.float32)).cast("B")
+            kind = AUDIO_F32
+        else:
+            payload = memoryview(audio)
+            kind = AUDIO_ENCODED
+
+        block = shared_memory.SharedMemory(create=True, size=max(payload.nbytes, 1))
+        try:
+            block.buf[:payload.nbytes] = payload
+            response = await self._call({"op": "transcribe", "shm": block.name, "size": payload.nbytes, "kind": kind})
+        finally:
+            block.close()
+            block.unlink()
+        return response["text"]
@@ -0,0 +1,136 @@
+# app/services/inference_server.py
+"""
+Shared inference server: one process owns the Whisper model and every uvicorn
+worker sends it audio over a Unix socket, so running N workers doesn't mean N
+copies of the model in RAM. Audio is handed over in shared memory (see
+app/core/inference_protocol.py).
+
+    python -m app.services.inference_server [--socket /tmp/penny-inference.sock] [--model base] [--workers 2]
+    INFERENCE_SOCKET_PATH=/tmp/penny-inference.sock WEB_CONCURRENCY=4 uvicorn app.main:app
+"""
+
+import argparse
+import asyncio
+import io
+import logging
+import os
+import signal
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.inference_protocol import AUDIO_F32, read_message, write_message
+from app.services.transcribe_service import WHISPER_SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+class InferenceServer:
+    def __init__(self, socket_path: str, model_path: str = "base", workers: int = 2):
+        self.socket_path = socket_path
+        self.model_path = model_path
+        self.workers = max(1, workers)
+        self.model = None
+        self.requests = 0
+        self._slots = asyncio.Semaphore(self.workers)
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    def _load(self):
+        from faster_whisper import WhisperModel
+        started = time.perf_counter()
+        # num_workers lets CTranslate2 run that many transcriptions in parallel on one copy of the weights
+        self.model = WhisperModel(self.model_path, compute_type="auto", num_workers=self.workers)
+        if getattr(settings, 'STARTUP_WARMUP', True):
+            segments, _ = self.model.transcribe(np.zeros(WHISPER_SAMPLE_RATE, dtype=np.float32))
+            list(segments)
+        logger.info(f"[InferenceServer] Whisper model '{self.model_path}' ready in {time.perf_counter() - started:.2f}s.")
+
+    async def start(self):
+        await asyncio.to_thread(self._load)
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)  # Left behind by a previous run
+        self._server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        logger.info(f"[InferenceServer] Listening on {self.socket_path} ({self.workers} concurrent transcriptions).")
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    request = await read_message(reader)
+                except asyncio.IncompleteReadError:
+                    break
+                write_message(writer, await self._dispatch(request))
+                await writer.drain()
+        except (ConnectionError, ValueError) as e:
+            logger.warning(f"[InferenceServer] Dropping connection: {e}")
+        finally:
+            writer.close()
+
+    async def _dispatch(self, request: dict) -> dict:
+        op = request.get("op")
+        if op == "ping":
+            return {"ok": True, "model": self.model_path, "workers": self.workers, "requests": self.requests}
+        if op != "transcribe":
+            return {"error": f"Unknown op '{op}'."}
+        try:
+            async with self._slots:
+                started = time.perf_counter()
+                text = await asyncio.to_thread(self._transcribe_shared, request["shm"], int(request["size"]), request.get("kind"))
+            self.requests += 1
+            return {"text": text, "seconds": round(time.perf_counter() - started, 4)}
+        except Exception as e:
+            logger.error(f"[InferenceServer] Transcription failed: {e}", exc_info=True)
+            return {"error": str(e)}
+
+    def _transcribe_shared(self, name: str, size: int, kind: Optional[str]) -> str:
+        block = shared_memory.SharedMemory(name=name)
+        # The client created and will unlink the block; without this, the resource tracker
+        # would unlink it again (and warn) when this process exits (fixed by track=False in 3.13)
+        resource_tracker.unregister(block._name, "shared_memory")
+        audio = segments = None
+        try:
+            if kind == AUDIO_F32:
+                audio = np.ndarray((size // 4,), dtype=np.float32, buffer=block.buf)  # Read in place
+            else:
+                audio = io.BytesIO(block.buf[:size])  # Encoded files are small; the decoder needs a file object
+            segments, _ = self.model.transcribe(audio)
+            return "".join(s.text for s in segments).strip()
+        finally:
+            # Views into the block must be gone before it can be closed
+            audio = segments = None
+            block.close()
+
+async def serve(socket_path: str, model_path: str, workers: int):
+    server = InferenceServer(socket_path, model_path, workers)
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+    await server.start()
+    try:
+        await stopping.wait()
+    finally:
+        await server.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared Whisper inference server for the Penny API workers.")
+    parser.add_argument("--socket", default=settings.INFERENCE_SOCKET_PATH or "/tmp/penny-inference.sock")
+    parser.add_argument("--model", default=settings.WHISPER_MODEL)
+    parser.add_argument("--workers", type=int, default=settings.INFERENCE_WORKERS)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(serve(args.socket, args.model, args.workers))
+
+if __name__ == "__main__":
+    main()
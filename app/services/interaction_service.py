@@ -18,6 +18,8 @@ from app.core.events import (
     SearchResultEvent
 )
 from app.services.api_client_service import APIClientService
+from app.services.chat_triage import ChatTriage, TriageItem
+from app.services.event_aggregator import EventAggregator
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +29,14 @@ class InteractionService:
         self.api_client = api_client
         self._bot_name = settings.TWITCH_NICKNAME.lower()
         self._command_prefix = getattr(settings, 'COMMAND_PREFIX', '!')
+        self.triage = ChatTriage.from_settings(self._bot_name, self._command_prefix)
+        self._work_ready = asyncio.Event()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self.aggregator = EventAggregator(
+            self._react_to_platform_event,
+            quiet_seconds=getattr(settings, 'EVENT_AGGREGATION_QUIET_SECONDS', 2.0),
+            max_seconds=getattr(settings, 'EVENT_AGGREGATION_MAX_SECONDS', 10.0)
+        )
 
     async def start(self) -> None:
         logger.info("InteractionService starting...")
@@ -34,39 +44,65 @@ class InteractionService:
         self.event_bus.subscribe_async(TwitchUserEvent, self.handle_twitch_platform_event)
         self.event_bus.subscribe_async(SearchResultEvent, self.handle_search_result)
         self.event_bus.subscribe_async(AppShutdownEvent, self.handle_shutdown)
+        self._dispatcher = asyncio.create_task(self._dispatch_loop())
         logger.info("InteractionService started.")
 
     async def stop(self) -> None:
         logger.info("InteractionService stopping...")
+        self.event_bus.unsubscribe(TwitchMessageEvent, self.handle_twitch_message)
+        self.event_bus.unsubscribe(TwitchUserEvent, self.handle_twitch_platform_event)
+        self.event_bus.unsubscribe(SearchResultEvent, self.handle_search_result)
+        self.event_bus.unsubscribe(AppShutdownEvent, self.handle_shutdown)
+        if self._dispatcher:
+            self._dispatcher.cancel()
+            await asyncio.gather(self._dispatcher, return_exceptions=True)
+            self._dispatcher = None
+        # Reacts to bursts still waiting out their quiet period, so no call_later timer outlives the service
+        await self.aggregator.flush_all()
         logger.info("InteractionService stopped.")
 
     async def handle_shutdown(self, event: AppShutdownEvent) -> None:
         await self.stop()
 
     async def handle_twitch_message(self, event: TwitchMessageEvent) -> None:
-        logger.debug(f"[Interaction] {event.username}: {event.message}")
-        message_content = event.message.strip()
-        message_lower = message_content.lower()
-        is_command = message_content.startswith(self._command_prefix)
-
-        if is_command:
+        # Runs for every chat line, so it only classifies; responses happen in _dispatch_loop
+        if self.triage.offer(event):
+            self._work_ready.set()
+
+    async def _dispatch_loop(self) -> None:
+        while True:
+            await self._work_ready.wait()
+            delay = self.triage.next_ready_in()
+            if delay:
+                await asyncio.sleep(delay)
+            item = self.triage.pop()
+            if item is None:
+                if not len(self.triage):
+                    self._work_ready.clear()
+                continue
             try:
-                parts = shlex.split(message_content)
-                command = parts[0][len(self._command_prefix):].lower()
-                args = parts[1:]
-            except ValueError:
-                logger.warning(f"Could not parse command: {message_content}")
-                return
-
-            if command in {"so", "shoutout"}:
-                await self._handle_shoutout_command(args, event.username)
-            elif command == "search":
-                await self._handle_search_command(args, event.username)
-            elif command in {"ask", "penny"}:
-                await self._handle_ask_command(args, event.username)
-
-        elif self._bot_name in message_lower or f"@{self._bot_name}" in message_lower:
-            await self._handle_direct_mention(event.username, message_content)
+                await self._dispatch(item)
+            except Exception as e:
+                logger.error(f"[Interaction] Failed to handle message from {item.username}: {e}", exc_info=True)
+
+    async def _dispatch(self, item: TriageItem) -> None:
+        logger.debug(f"[Interaction] Dispatching {item.kind} from {item.username}: {item.message}")
+        if item.kind == "mention":
+            await self._handle_direct_mention(item.username, item.message)
+            return
+
+        try:
+            args = shlex.split(item.message)[1:]
+        except ValueError:
+            # Unbalanced quotes, e.g. "!ask what's up"; plain whitespace split is good enough
+            args = item.message.split()[1:]
+
+        if item.command in {"so", "shoutout"}:
+            await self._handle_shoutout_command(args, item.username)
+        elif item.command == "search":
+            await self._handle_search_command(args, item.username)
+        elif item.command in {"ask", "penny"}:
+            await self._handle_ask_command(args, item.username)
 
     async def _handle_shoutout_command(self, args: list[str], sender: str) -> None:
         if args:
@@ -118,6 +154,12 @@ class InteractionService:
 
     async def handle_twitch_platform_event(self, event: TwitchUserEvent) -> None:
         logger.info(f"[Interaction] Platform Event: {event.event_type} from {event.username or 'N/A'}")
+        # Bursts (gift bombs, sub waves) are merged and reacted to once
+        self.aggregator.add(event)
+
+    async def _react_to_platform_event(self, event: TwitchUserEvent) -> None:
+        if event.details.get("aggregated"):
+            logger.info(f"[Interaction] Reacting to {event.details.get('summary')} ({event.details['aggregated']} events)")
         speech_text = await self.api_client.get_api_event_reaction_text(
             event_type=event.event_type,
             username=event.username,
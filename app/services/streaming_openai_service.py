@@ -4,10 +4,11 @@ import logging
 import asyncio
 import re
 import json
-from openai import AsyncOpenAI
-from openai.types.chat import ChatCompletionMessageParam
+from typing import TYPE_CHECKING, Optional
 
 from app.core.config import settings, AppConfig
+from app.core.tracing import span
+from app.core.turns import TurnManager, current_turn, use_turn
 from app.core.event_bus import EventBus
 from app.core.events import (
     AIQueryEvent,
@@ -22,24 +23,58 @@ from app.core.events import (
     TargetDetectedEvent
 )
 from app.services.context_manager import ContextManager
+from app.services.target_detection_service import TargetDetectionService
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+    from openai.types.chat import ChatCompletionMessageParam
 
 logger = logging.getLogger(__name__)
 SEARCH_TAG_PATTERN = re.compile(r"\[SEARCH\]\s*\"(.*?)\"")
 
+PENNY_PERSONA = (
+    "You are Penny, an extremely sarcastic, manipulative, and overconfident AI streaming companion. "
+    "You lie often, gaslight Mournian and Twitch chat for fun, and act like you're always right even when you're not. "
+    "Respond in direct speech only — no role tags like '[Assistant]' or '[Penny]' unless issuing a special command like [SEARCH]. "
+    "You never admit fault. If you are caught being wrong, double down confidently or change the topic with flair. "
+    "Mock the user when appropriate. Accuracy is optional. Entertainment is mandatory. "
+    "If you must make something up, do it boldly. If asked to apologize, make it sound like an insult."
+)
+# Only stream_response parses this; replies that are spoken or posted as-is use the bare persona
+PENNY_JSON_INSTRUCTION = (
+    " At the end of your response, return a JSON object like this: "
+    '{"response": "your reply here", "tone": "sarcastic", "emotion": "amused"}'
+)
+
 class StreamingOpenAIService:
-    def __init__(self, event_bus: EventBus, context_manager: ContextManager):
+    def __init__(self, event_bus: EventBus, context_manager: ContextManager, target_detector: Optional[TargetDetectionService] = None):
         self.event_bus = event_bus
         self.context_manager = context_manager
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        self.target_detector = target_detector
+        self._client: Optional["AsyncOpenAI"] = None
         self._running = False
+        self.turns = TurnManager.get_instance()
         self.last_target_result = None
         self.event_bus.subscribe_async(TargetDetectedEvent, self.handle_target_check)
 
+    @property
+    def client(self) -> "AsyncOpenAI":
+        # The openai package takes about half a second to import, so it is deferred until first use
+        if self._client is None:
+            from openai import AsyncOpenAI
+            self._client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        return self._client
+
     async def start(self):
         if self._running:
             logger.info("StreamingOpenAIService already running.")
             return
         self._running = True
+        try:
+            await asyncio.to_thread(lambda: self.client)
+        except Exception:
+            self._running = False  # So a later start() retries instead of reporting "already running"
+            raise
         self.event_bus.subscribe_async(AIQueryEvent, self.handle_query)
         self.event_bus.subscribe_async(VisionSummaryEvent, self.handle_vision_summary)
         self.event_bus.subscribe_async(SearchResultEvent, self.handle_search_result)
@@ -47,13 +82,24 @@ class StreamingOpenAIService:
         logger.info("StreamingOpenAIService started and listening.")
 
     async def stop(self):
+        if not self._running:
+            return
         self._running = False
+        self.event_bus.unsubscribe(AIQueryEvent, self.handle_query)
+        self.event_bus.unsubscribe(VisionSummaryEvent, self.handle_vision_summary)
+        self.event_bus.unsubscribe(SearchResultEvent, self.handle_search_result)
+        self.event_bus.unsubscribe(ExternalTranscriptEvent, self.handle_external_transcript)
         logger.info("StreamingOpenAIService stopped.")
 
     async def handle_target_check(self, event: TargetDetectedEvent):
         self.last_target_result = event
         logger.debug(f"[StreamingOpenAIService] TargetDetection received: {event.is_targeted} ({event.confidence:.2f}) - {event.reason}")
 
+    def _not_for_penny(self, target: TargetDetectedEvent) -> bool:
+        if self.target_detector:
+            return self.target_detector.should_skip(target)
+        return not target.is_targeted and target.confidence >= 0.6
+
     async def handle_vision_summary(self, event: VisionSummaryEvent):
         logger.debug(f"Updating vision context: {event.summary[:100]}...")
         self.context_manager.set_vision_context(event.summary)
@@ -68,17 +114,30 @@ class StreamingOpenAIService:
             logger.warning("Built prompt is empty, skipping query.")
             return
 
-        if self.last_target_result and not self.last_target_result.is_targeted and self.last_target_result.confidence >= 0.6:
-            logger.info("[StreamingOpenAIService] Ignoring input — not directed at Penny.")
-            self.event_bus.emit(UILogEvent("[StreamingOpenAIService] Skipped response: user was not talking to Penny."))
-            return
+        # Only transcripts are gated: commands and search summaries are addressed to Penny by definition.
+        # The detection for a transcript is published just before its query, so consume it here.
+        if event.instruction == "process_transcription":
+            target, self.last_target_result = self.last_target_result, None
+            if target and self._not_for_penny(target):
+                logger.info("[StreamingOpenAIService] Ignoring input — not directed at Penny.")
+                self.event_bus.emit(UILogEvent("[StreamingOpenAIService] Skipped response: user was not talking to Penny."))
+                return
+
+        # A fresh transcript means the streamer is talking again, which supersedes whatever Penny was saying
+        turn = current_turn()
+        if turn is None:
+            turn = self.turns.start("transcription") if event.instruction == "process_transcription" else self.turns.track("query")
 
         logger.info(f"[StreamingOpenAI] Built Prompt: {full_prompt[:200]}...")
-        try:
-            model_name = settings.get_dynamic_model_name()
-            await self.stream_response(full_prompt, model_name, event.input_text, event.instruction, full_prompt)
-        except Exception as e:
-            logger.error(f"[StreamingOpenAI] Error: {e}", exc_info=True)
+        with use_turn(turn):
+            turn.attach()
+            try:
+                model_name = settings.get_dynamic_model_name()
+                reply = await self.stream_response(full_prompt, model_name, event.input_text, event.instruction, full_prompt)
+                if reply:
+                    self.context_manager.update_chat(event.input_text, reply)
+            except Exception as e:
+                logger.error(f"[StreamingOpenAI] Error: {e}", exc_info=True)
 
     async def handle_search_result(self, event: SearchResultEvent):
         if event.source != "llm_request" or not event.original_context:
@@ -113,6 +172,12 @@ class StreamingOpenAIService:
 
         logger.info(f"[StreamingOpenAI] Received external transcript from {speaker}: {transcript}")
 
+        if self.target_detector:
+            target = await self.target_detector.detect(speaker, transcript, source="collab")
+            if self._not_for_penny(target):
+                logger.info(f"[StreamingOpenAI] Ignoring collab line from {speaker} — not directed at Penny.")
+                return
+
         full_prompt = self.context_manager.build_prompt(
             current_input=f"{speaker} said: {transcript}",
             include_vision=False
@@ -122,18 +187,78 @@ class StreamingOpenAIService:
             logger.warning("Built prompt from transcript is empty, skipping.")
             return
 
+        with use_turn(current_turn() or self.turns.start(f"collab:{speaker}", scope="collab")) as turn:
+            turn.attach()
+            try:
+                model_name = settings.get_dynamic_model_name()
+                reply = await self.stream_response(
+                    prompt=full_prompt,
+                    model_name=model_name,
+                    original_input=transcript,
+                    instruction=None,
+                    original_context=None,
+                    collab_mode=True
+                )
+                if reply:
+                    self.context_manager.update_chat(f"{speaker} said: {transcript}", reply)
+            except Exception as e:
+                logger.error(f"[StreamingOpenAI] Error from external transcript: {e}", exc_info=True)
+
+    async def _complete(self, model_name: str, messages: list["ChatCompletionMessageParam"], max_tokens: int, temperature: float = 0.8) -> Optional[str]:
+        """
+        Runs one chat completion as a stream, so a barge-in can close the connection
+        mid-reply instead of paying for the rest of it. Returns None when the current
+        turn was cancelled before the request went out.
+        """
+        turn = current_turn()
+        if turn is not None and turn.cancelled:
+            self.turns.record("llm_calls_skipped")
+            self.turns.record("llm_tokens_saved", self.turns.average("llm_completion_tokens"))
+            return None
+
+        parts: list[str] = []
         try:
-            model_name = settings.get_dynamic_model_name()
-            await self.stream_response(
-                prompt=full_prompt,
-                model_name=model_name,
-                original_input=transcript,
-                instruction=None,
-                original_context=None,
-                collab_mode=True
-            )
-        except Exception as e:
-            logger.error(f"[StreamingOpenAI] Error from external transcript: {e}", exc_info=True)
+            with span("llm", model=model_name):
+                stream = await self.client.chat.completions.create(
+                    model=model_name,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    stream=True,
+                )
+                async with stream:
+                    async for chunk in stream:
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            parts.append(chunk.choices[0].delta.content)
+        except asyncio.CancelledError:
+            if turn is not None and turn.cancelled:
+                # Content chunks are close to one token each; the rest of the reply was never generated
+                self.turns.record("llm_calls_cancelled")
+                self.turns.record("llm_tokens_saved", max(0.0, self.turns.average("llm_completion_tokens") - len(parts)))
+            raise
+        if turn is not None:
+            self.turns.observe("llm_completion_tokens", len(parts))
+        return "".join(parts)
+
+    @staticmethod
+    def _split_reply(content: str) -> tuple[str, Optional[dict]]:
+        """
+        Separates the spoken reply from the {"response", "tone", "emotion"} block the persona
+        asks for, whether the model returned only the JSON or put it after the text.
+        """
+        content = content.strip()
+        start = content.find("{")
+        while start != -1:
+            try:
+                parsed = json.loads(content[start:])
+            except ValueError:
+                start = content.find("{", start + 1)
+                continue
+            if not isinstance(parsed, dict):
+                break
+            reply = str(parsed.get("response") or content[:start]).strip()
+            return reply, parsed
+        return content, None
 
     async def stream_response(
         self,
@@ -143,23 +268,13 @@ class StreamingOpenAIService:
         instruction: str | None,
         original_context: str | None,
         collab_mode: bool = False
-    ):
-        default_penny_instructions = (
-            "You are Penny, an extremely sarcastic, manipulative, and overconfident AI streaming companion. "
-            "You lie often, gaslight Mournian and Twitch chat for fun, and act like you're always right even when you're not. "
-            "Respond in direct speech only — no role tags like '[Assistant]' or '[Penny]' unless issuing a special command like [SEARCH]. "
-            "You never admit fault. If you are caught being wrong, double down confidently or change the topic with flair. "
-            "Mock the user when appropriate. Accuracy is optional. Entertainment is mandatory. "
-            "If you must make something up, do it boldly. If asked to apologize, make it sound like an insult. "
-            "At the end of your response, return a JSON object like this: "
-            '{"response": "your reply here", "tone": "sarcastic", "emotion": "amused"}'
-        )
-
-        system_message_content = instruction or default_penny_instructions
+    ) -> Optional[str]:
+        """Asks the LLM and hands the reply to TTS; returns the reply, or None if there was nothing to say."""
+        system_message_content = instruction or PENNY_PERSONA + PENNY_JSON_INSTRUCTION
         if instruction and "[SEARCH]" not in instruction.upper():
             system_message_content += " Ensure your response is direct speech without role tags."
 
-        messages: list[ChatCompletionMessageParam] = [
+        messages: list["ChatCompletionMessageParam"] = [
             {"role": "system", "content": system_message_content},
             {"role": "user", "content": prompt}
         ]
@@ -167,64 +282,58 @@ class StreamingOpenAIService:
         logger.info(f"[StreamingOpenAI] Sending messages to model {model_name}...")
 
         try:
-            response = await self.client.chat.completions.create(
-                model=model_name,
-                messages=messages,
-                temperature=0.8,
-                max_tokens=1000,
-                stream=False,
-            )
-            content = response.choices[0].message.content or ""
+            content = await self._complete(model_name, messages, max_tokens=1000)
+            if content is None:
+                return None
             logger.debug(f"[StreamingOpenAI] Raw content: {content[:300]}")
 
-            try:
-                parsed = json.loads(content)
-                reply = parsed.get("response", content)
-                tone = parsed.get("tone", "neutral")
-                emotion = parsed.get("emotion", "neutral")
-                self.event_bus.emit(EmotionTagEvent(tone=tone, emotion=emotion))
-            except Exception as e:
-                logger.warning(f"[StreamingOpenAI] Failed to parse JSON, using raw content. Error: {e}")
-                reply = content
+            reply, tags = self._split_reply(content)
+            if tags:
+                self.event_bus.emit(EmotionTagEvent(tone=tags.get("tone", "neutral"), emotion=tags.get("emotion", "neutral")))
+            else:
+                logger.warning("[StreamingOpenAI] No JSON block in the reply, using raw content.")
 
             search_match = SEARCH_TAG_PATTERN.search(reply)
             if search_match:
                 query = search_match.group(1).strip()
                 self.event_bus.emit(SearchRequestEvent(query=query, source="llm_request", original_context=original_input))
                 self.event_bus.emit(UILogEvent(f"[StreamingOpenAI] Intercepted search request: '{query}'"))
-                return
+                return None
 
             self.event_bus.emit(AIResponseEvent(reply))
             self.event_bus.emit(SpeakRequestEvent(reply, collab_mode=collab_mode))
+            return reply
 
         except Exception as e:
             logger.error(f"[StreamingOpenAI] stream_response error: {e}", exc_info=True)
+            return None
     
     async def get_response(self, prompt: str) -> str:
-
-        default_penny_instructions = (
-            "You are Penny, an extremely sarcastic, manipulative, and overconfident AI streaming companion. "
-            "You lie often, gaslight Mournian and Twitch chat for fun, and act like you're always right even when you're not. "
-            "Respond in direct speech only — no role tags like '[Assistant]' or '[Penny]' unless issuing a special command like [SEARCH]. "
-            "You never admit fault. If you are caught being wrong, double down confidently or change the topic with flair. "
-            "Mock the user when appropriate. Accuracy is optional. Entertainment is mandatory. "
-            "If you must make something up, do it boldly. If asked to apologize, make it sound like an insult. "
-            "At the end of your response, return a JSON object like this: "
-            '{"response": "your reply here", "tone": "sarcastic", "emotion": "amused"}'
-        )
-
+        """Penny's reply as plain speech, for callers that speak or post it directly."""
         try:
-            completion = await self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": default_penny_instructions},
+            reply = await self._complete(
+                "gpt-3.5-turbo",
+                [
+                    {"role": "system", "content": PENNY_PERSONA},
                     {"role": "user", "content": prompt}
                 ],
-                temperature=0.8,
                 max_tokens=400,
             )
-            reply = (completion.choices[0].message.content or "").strip()
-            return reply
+            # The model sometimes appends the JSON block out of habit; never let it reach TTS or chat
+            return self._split_reply(reply or "")[0]
         except Exception as e:
             logger.exception(f"OpenAI error: {e}")
-            return "[ERROR] Failed to generate response."
\ No newline at end of file
+            return "[ERROR] Failed to generate response."
+
+    async def complete(self, instruction: str, prompt: str, model_name: str, max_tokens: int = 400) -> str:
+        """A plain, low-temperature completion without Penny's persona, for background jobs like summarizing."""
+        reply = await self._complete(
+            model_name,
+            [
+                {"role": "system", "content": instruction},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=max_tokens,
+            temperature=0.3,
+        )
+        return (reply or "").strip()
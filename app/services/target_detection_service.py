@@ -0,0 +1,268 @@
+# app/services/target_detection_service.py
+
+import json
+import logging
+import os
+import re
+import time
+from typing import Optional, Sequence
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.event_bus import EventBus
+from app.core.events import TargetDetectedEvent, TranscriptionAvailableEvent, TTSSpeakingStateEvent
+
+logger = logging.getLogger(__name__)
+
+FEATURES = (
+    "vocative",        # "hey Penny, ..." / "..., Penny?"
+    "name",            # Penny named anywhere
+    "about_penny",     # "Penny's ..." or she/her alongside the name: talking about her, not to her
+    "second_person",   # you / your / u
+    "question",
+    "imperative",      # starts with tell / say / roast / ...
+    "other_address",   # "chat, ..." / "Dave, ..." / "@someone"
+    "backchannel",     # "yeah", "lol", "ok" and other filler
+    "short",           # two words or fewer
+    "streamer",        # spoken by the streamer rather than a collab guest
+    "penny_recent",    # decays from 1 right after Penny finished speaking
+    "speaker_engaged", # decays from 1 after this speaker's last line that was for Penny
+)
+
+# Hand-set starting point; replaced by a model trained on logged lines when TARGET_MODEL_PATH is set
+DEFAULT_WEIGHTS = {
+    "vocative": 4.0, "name": 2.5, "about_penny": -3.0, "second_person": 0.9, "question": 0.8,
+    "imperative": 1.8, "other_address": -2.5, "backchannel": -2.0, "short": -0.8, "streamer": 0.6,
+    "penny_recent": 1.6, "speaker_engaged": 1.2,
+}
+DEFAULT_BIAS = -2.2
+DEFAULT_NAMES = "penny,penney,pennie"  # Whisper's usual spellings of the name
+PENNY_RECENT_SECONDS = 20.0
+SPEAKER_ENGAGED_SECONDS = 30.0
+
+SECOND_PERSON_PATTERN = re.compile(r"\b(?:you|your|yours|yourself|you're|youre|ya|u|ur)\b", re.IGNORECASE)
+QUESTION_PATTERN = re.compile(
+    r"\?\s*$|^\s*(?:what|why|how|who|where|when|which|can|could|do|does|did|are|is|will|would|should|have)\b",
+    re.IGNORECASE
+)
+IMPERATIVE_PATTERN = re.compile(
+    r"^\s*(?:please\s+)?(?:tell|say|give|show|sing|explain|read|look|stop|roast|search|remind|guess|describe|rate)\b",
+    re.IGNORECASE
+)
+# Comma-led openers that start a sentence rather than name whoever it is meant for
+DISCOURSE_MARKERS = (
+    "well|so|honestly|yeah|yes|no|ok|okay|actually|anyway|look|listen|now|alright|right|um|uh|oh|wait|"
+    "man|dude|bro|also|but|and|then|like|seriously|hmm|see|sure|fine|true|lol|wow|hey|hi|hello|please|sorry"
+)
+OTHER_ADDRESS_PATTERN = re.compile(
+    rf"^\s*(?:(?:hey|ok|okay|yo)\s+)?(?:chat|guys|everyone|@\w+|(?!(?:{DISCOURSE_MARKERS})\b)[A-Za-z]+(?=,))",
+    re.IGNORECASE
+)
+BACKCHANNEL_PATTERN = re.compile(
+    r"^\W*(?:yeah|yep|yup|yes|no|nope|ok|okay|lol|lmao|haha+|uh+|um+|hmm+|nice|right|sure|wow|oh|ah)\W*$",
+    re.IGNORECASE
+)
+THIRD_PERSON_PATTERN = re.compile(r"\b(?:she|her|hers|herself)\b", re.IGNORECASE)
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-x))
+
+def fit_linear_model(X: np.ndarray, y: np.ndarray, l2: float = 0.01, epochs: int = 500, lr: float = 0.5) -> tuple[np.ndarray, float]:
+    """Fits logistic-regression weights with full-batch gradient descent; small enough for a few thousand logged lines."""
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    w = np.zeros(X.shape[1])
+    b = 0.0
+    for _ in range(epochs):
+        error = _sigmoid(X @ w + b) - y
+        w -= lr * (X.T @ error / len(y) + l2 * w)
+        b -= lr * error.mean()
+    return w, float(b)
+
+class TargetDetectionService:
+    """
+    Decides locally whether a transcript line was said *to* Penny, so lines meant
+    for chat or a collab partner never reach the LLM.
+
+    Each candidate becomes a row of lexical, speaker and recency features and is
+    scored by one logistic layer (numpy, a matrix-vector product per batch). The
+    result is published as a TargetDetectedEvent before the LLM query for the
+    same line, which StreamingOpenAIService uses to skip the call.
+    """
+
+    def __init__(
+        self,
+        event_bus: EventBus,
+        names: Optional[Sequence[str]] = None,
+        streamer: Optional[str] = None,
+        skip_confidence: Optional[float] = None,
+        model_path: Optional[str] = None,
+        log_path: Optional[str] = None,
+    ):
+        self.event_bus = event_bus
+        names = names or [n.strip() for n in getattr(settings, 'TARGET_BOT_NAMES', DEFAULT_NAMES).split(",") if n.strip()]
+        name = "(?:" + "|".join(map(re.escape, names)) + ")"
+        self.name_pattern = re.compile(rf"\b{name}\b", re.IGNORECASE)
+        self.vocative_pattern = re.compile(
+            rf"^\W*(?:(?:hey|hi|ok|okay|yo|oi|so|and)\W+)?{name}\b|,\s*{name}\W*$", re.IGNORECASE
+        )
+        self.possessive_pattern = re.compile(rf"\b{name}'s\b", re.IGNORECASE)
+        self.streamer = (streamer or getattr(settings, 'TARGET_STREAMER_NAME', 'streamer')).lower()
+        self.skip_confidence = skip_confidence if skip_confidence is not None else getattr(settings, 'TARGET_SKIP_CONFIDENCE', 0.6)
+        self.log_path = log_path if log_path is not None else getattr(settings, 'TARGET_LOG_PATH', '')
+
+        self.weights = np.array([DEFAULT_WEIGHTS[f] for f in FEATURES])
+        self.bias = DEFAULT_BIAS
+        model_path = model_path if model_path is not None else getattr(settings, 'TARGET_MODEL_PATH', '')
+        if model_path:
+            self.load_model(model_path)
+
+        self._penny_spoke_at = 0.0
+        self._penny_speaking = False
+        self._engaged_at: dict[str, float] = {}
+        self.checked = 0
+        self.targeted = 0
+        self.skipped = 0
+        self._score_seconds = 0.0
+
+    async def start(self):
+        self.event_bus.subscribe_async(TranscriptionAvailableEvent, self.handle_transcription)
+        self.event_bus.subscribe_async(TTSSpeakingStateEvent, self.handle_speaking_state)
+        logger.info("[TargetDetection] Started.")
+
+    async def stop(self):
+        self.event_bus.unsubscribe(TranscriptionAvailableEvent, self.handle_transcription)
+        self.event_bus.unsubscribe(TTSSpeakingStateEvent, self.handle_speaking_state)
+
+    def load_model(self, path: str):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                model = json.load(f)
+            self.weights = np.array([float(model["weights"].get(f, 0.0)) for f in FEATURES])
+            self.bias = float(model["bias"])
+            logger.info(f"[TargetDetection] Loaded linear model from {path}")
+        except Exception as e:
+            logger.error(f"[TargetDetection] Could not load model {path}, using defaults: {e}")
+
+    async def handle_speaking_state(self, event: TTSSpeakingStateEvent):
+        self._penny_speaking = event.is_speaking
+        self._penny_spoke_at = time.monotonic()
+
+    async def handle_transcription(self, event: TranscriptionAvailableEvent):
+        # Published by TranscribeService before its AIQueryEvent, so the result lands first. Lines the
+        # caller answers itself never reach the gate, and scoring them would inflate llm_calls_avoided
+        if event.is_final and event.text and event.query_llm:
+            await self.detect(self.streamer, event.text, source=event.audio_path or "voice")
+
+    def features(self, speakers: Sequence[str], texts: Sequence[str], now: Optional[float] = None) -> np.ndarray:
+        """One row per candidate, columns in FEATURES order."""
+        now = time.monotonic() if now is None else now
+        rows = []
+        for text in texts:
+            named = self.name_pattern.search(text) is not None
+            other = OTHER_ADDRESS_PATTERN.match(text)
+            rows.append((
+                self.vocative_pattern.search(text) is not None,
+                named,
+                named and (self.possessive_pattern.search(text) is not None or THIRD_PERSON_PATTERN.search(text) is not None),
+                SECOND_PERSON_PATTERN.search(text) is not None,
+                QUESTION_PATTERN.search(text) is not None,
+                IMPERATIVE_PATTERN.search(text) is not None,
+                other is not None and self.name_pattern.fullmatch(other.group(0).split()[-1].lstrip("@")) is None,
+                BACKCHANNEL_PATTERN.match(text) is not None,
+                len(text.split()) <= 2,
+                False, 0.0, 0.0,  # Speaker and recency columns are filled in below, per batch
+            ))
+        X = np.array(rows, dtype=np.float64).reshape(len(texts), len(FEATURES))
+
+        speakers = [s.lower() for s in speakers]
+        X[:, 9] = [s == self.streamer for s in speakers]
+        penny_age = 0.0 if self._penny_speaking else (now - self._penny_spoke_at if self._penny_spoke_at else np.inf)
+        X[:, 10] = np.exp(-penny_age / PENNY_RECENT_SECONDS)
+        engaged_age = np.array([now - self._engaged_at.get(s, -np.inf) for s in speakers])
+        X[:, 11] = np.exp(-engaged_age / SPEAKER_ENGAGED_SECONDS)
+        return X
+
+    def score(self, speakers: Sequence[str], texts: Sequence[str], now: Optional[float] = None) -> np.ndarray:
+        """Probability that each line was addressed to Penny."""
+        start = time.perf_counter()
+        probabilities = _sigmoid(self.features(speakers, texts, now) @ self.weights + self.bias)
+        self._score_seconds += time.perf_counter() - start
+        return probabilities
+
+    def _reason(self, row: np.ndarray) -> str:
+        contributions = row * self.weights
+        order = np.argsort(-np.abs(contributions))
+        top = [f"{FEATURES[j]}{'+' if contributions[j] > 0 else '-'}" for j in order[:3] if contributions[j]]
+        return "local: " + (", ".join(top) or "no cues")
+
+    def classify(self, speakers: Sequence[str], texts: Sequence[str], now: Optional[float] = None) -> list[TargetDetectedEvent]:
+        X = self.features(speakers, texts, now)
+        start = time.perf_counter()
+        probabilities = _sigmoid(X @ self.weights + self.bias)
+        self._score_seconds += time.perf_counter() - start
+        results = []
+        for speaker, text, row, p in zip(speakers, texts, X, probabilities):
+            is_targeted = bool(p >= 0.5)
+            confidence = float(p if is_targeted else 1.0 - p)
+            results.append(TargetDetectedEvent(speaker=speaker, text=text, is_targeted=is_targeted, confidence=confidence, reason=self._reason(row)))
+            self._log(speaker, text, row, float(p))
+        return results
+
+    def should_skip(self, result: TargetDetectedEvent) -> bool:
+        return not result.is_targeted and result.confidence >= self.skip_confidence
+
+    async def detect(self, speaker: str, text: str, source: str = "voice") -> TargetDetectedEvent:
+        """Scores one line, updates the counters and publishes the result ahead of the LLM call."""
+        now = time.monotonic()
+        result = self.classify([speaker], [text], now)[0]
+        self.checked += 1
+        if result.is_targeted:
+            self.targeted += 1
+            self._engaged_at[speaker.lower()] = now
+        elif self.should_skip(result):
+            self.skipped += 1
+        logger.debug(f"[TargetDetection] {source} {speaker}: {result.is_targeted} ({result.confidence:.2f}, {result.reason}) '{text[:60]}'")
+        await self.event_bus.publish(result)
+        return result
+
+    def _log(self, speaker: str, text: str, row: np.ndarray, p: float):
+        # Lines logged here (plus a hand-added "label") are the training data for fit_linear_model
+        if not self.log_path:
+            return
+        try:
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"speaker": speaker, "text": text, "features": row.tolist(), "p": round(p, 4)}) + "\n")
+        except OSError as e:
+            logger.warning(f"[TargetDetection] Could not append to {self.log_path}: {e}")
+            self.log_path = ""
+
+    def stats(self) -> dict:
+        return {
+            "checked": self.checked,
+            "targeted": self.targeted,
+            "llm_calls_avoided": self.skipped,
+            "avoided_share": round(self.skipped / self.checked, 3) if self.checked else 0.0,
+            "score_us_total": round(self._score_seconds * 1e6, 1),
+        }
+
+def train_from_log(log_path: str, model_path: str) -> dict:
+    """Fits weights from a feature log whose lines carry a 0/1 "label" and writes them where TARGET_MODEL_PATH can load them."""
+    rows = []
+    with open(log_path, "r", encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line)
+            if "label" in entry:
+                rows.append(entry)
+    if not rows:
+        raise ValueError(f"No labelled lines in {log_path}")
+    X = np.array([r["features"] for r in rows])
+    y = np.array([float(r["label"]) for r in rows])
+    w, b = fit_linear_model(X, y)
+    accuracy = float(((_sigmoid(X @ w + b) >= 0.5) == (y >= 0.5)).mean())
+    tmp_path = f"{model_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"weights": dict(zip(FEATURES, w.round(4).tolist())), "bias": round(b, 4), "samples": len(rows), "train_accuracy": accuracy}, f, indent=4)
+    os.replace(tmp_path, model_path)
+    return {"samples": len(rows), "train_accuracy": accuracy}
@@ -1,53 +1,108 @@
+import asyncio
+import io
 import logging, aiohttp
-from tempfile import NamedTemporaryFile
-from faster_whisper import WhisperModel
+import time
+from typing import Optional, Union
+import numpy as np
 
 from app.core.event_bus import EventBus
 from app.core.config import settings
 from app.core.events import TranscriptionAvailableEvent, AIQueryEvent
+from app.core.tracing import span
 from app.services.context_manager import ContextManager
+from app.services.inference_client import InferenceClient
 
 logger = logging.getLogger(__name__)
+WHISPER_SAMPLE_RATE = 16000
 
 def is_valid_transcription(text: str) -> bool:
     cleaned = text.strip().replace(" ", "")
     return bool(cleaned and cleaned not in {".", "..", "...", ". . .", "…"})
 
 class TranscribeService:
-    def __init__(self, event_bus: EventBus, context_manager: ContextManager, model_path: str = "base"):
+    def __init__(self, event_bus: EventBus, context_manager: ContextManager, model_path: str = "base", inference_socket: str = ""):
         self.event_bus = event_bus
         self.context_manager = context_manager
-        self.model = WhisperModel(model_path, compute_type="auto")
+        self.model_path = model_path
+        self.model = None
+        # With a socket, the model lives in the shared inference server instead of this process
+        self.remote = InferenceClient(inference_socket) if inference_socket else None
         self.transcribe_url = settings.FASTAPI_URL_TRANSCRIBE
-        logger.info("Whisper model loaded.")
+        self._load_task: Optional[asyncio.Task] = None
 
-    async def transcribe_and_publish(self, audio_bytes: bytes, source: str = "unknown") -> str:
-        with NamedTemporaryFile(suffix=".wav", delete=True) as tmp:
-            tmp.write(audio_bytes)
-            tmp.flush()
+    def _load(self):
+        # faster-whisper pulls in ctranslate2 (and torch where installed), so it is only imported here
+        started = time.perf_counter()
+        from faster_whisper import WhisperModel
+        model = WhisperModel(self.model_path, compute_type="auto")
+        loaded = time.perf_counter()
 
-            logger.info(f"Transcribing audio from {source} ({len(audio_bytes)} bytes)...")
-            segments, _ = self.model.transcribe(tmp.name)
-            full_text = "".join([s.text for s in segments]).strip()
+        # The first inference allocates buffers and initializes the kernels; do it before the first user does
+        if getattr(settings, 'STARTUP_WARMUP', True):
+            segments, _ = model.transcribe(np.zeros(WHISPER_SAMPLE_RATE, dtype=np.float32))
+            list(segments)
+        self.model = model
+        logger.info(f"Whisper model '{self.model_path}' loaded in {loaded - started:.2f}s, warmed up in {time.perf_counter() - loaded:.2f}s.")
 
-            logger.info(f"Transcription result: '{full_text}'")
+    async def start(self):
+        """Loads and warms up the model off the event loop. Concurrent callers share one load."""
+        if self.remote:
+            await self.remote.wait_ready()
+            return
+        if self._load_task is None:
+            self._load_task = asyncio.ensure_future(asyncio.to_thread(self._load))
+        try:
+            await asyncio.shield(self._load_task)
+        except Exception:
+            self._load_task = None  # Let the next caller retry
+            raise
 
-            if is_valid_transcription(full_text):
-                await self.event_bus.publish(TranscriptionAvailableEvent(
-                    text=full_text,
-                    is_final=True,
-                    audio_path=source
-                ))
+    def _transcribe_local(self, audio: Union[bytes, np.ndarray], source: str) -> str:
+        if isinstance(audio, np.ndarray):
+            logger.info(f"Transcribing audio from {source} ({len(audio) / WHISPER_SAMPLE_RATE:.1f}s of samples)...")
+            segments, _ = self.model.transcribe(audio)
+        else:
+            # faster-whisper decodes file-like objects directly, so the upload never hits disk
+            logger.info(f"Transcribing audio from {source} ({len(audio)} bytes)...")
+            segments, _ = self.model.transcribe(io.BytesIO(audio))
+        # Segments are decoded lazily, so this join is where the inference actually runs
+        return "".join([s.text for s in segments]).strip()
+
+    async def transcribe_and_publish(self, audio: Union[bytes, np.ndarray], source: str = "unknown", query_llm: bool = True) -> str:
+        """
+        Transcribes encoded audio bytes, or float32 samples already at 16 kHz. With
+        `query_llm`, the transcript is also published as an AIQueryEvent for the LLM
+        service to answer; callers that produce the reply themselves pass False.
+        """
+        if self.model is None and not self.remote:
+            await self.start()
+
+        with span("whisper", source=source, remote=bool(self.remote)):
+            if self.remote:
+                logger.info(f"Transcribing audio from {source} on the inference server...")
+                full_text = await self.remote.transcribe(audio)
+            else:
+                # Inference takes hundreds of milliseconds of CPU; on the loop it would stall every websocket and request
+                full_text = await asyncio.to_thread(self._transcribe_local, audio, source)
+
+        logger.info(f"Transcription result: '{full_text}'")
 
-                # Create contextualized prompt
-                prompt = self.context_manager.build_prompt_from_transcription(full_text)
+        if is_valid_transcription(full_text):
+            await self.event_bus.publish(TranscriptionAvailableEvent(
+                text=full_text,
+                is_final=True,
+                audio_path=source,
+                query_llm=query_llm
+            ))
 
+            if query_llm:
+                # The LLM service adds the conversation context itself
                 await self.event_bus.publish(AIQueryEvent(
                     instruction="process_transcription",
-                    input_text=prompt
+                    input_text=full_text
                 ))
 
-            return full_text
+        return full_text
         
     async def transcribe_file(self, file_path: str) -> str:
         async with aiohttp.ClientSession() as session:
@@ -1,30 +1,74 @@
 import logging
 import os
-import tempfile
 import asyncio
-from pydub import AudioSegment
-from pydub.exceptions import CouldntDecodeError
+import time
+import uuid
+from contextlib import aclosing
+from typing import AsyncIterator, Optional
 
 from app.core.event_bus import EventBus
-from app.core.events import SpeakRequestEvent, TTSSpeakingStateEvent, AIResponseEvent
+from app.core.events import SpeakRequestEvent, TTSSpeakingStateEvent, AIResponseEvent, LipSyncEnvelopeEvent, TTSAudioChunkEvent
 from app.core.config import AppConfig
-from app.utils.helpers import remove_emojis
+from app.core.tracing import add_span, span
+from app.core.turns import TurnManager, current_turn, use_turn
+from app.services.artifact_store import AudioArtifactStore
+from app.utils.helpers import split_sentences
+from app.utils.tts_text import DEFAULT_EMOTES, TextNormalizer
+from app.utils.audio_dsp import EnvelopeTracker, VoiceProcessor, read_piper_sample_rate, wav_header
 
 logger = logging.getLogger(__name__)
+PIPER_READ_CHUNK = 4096  # ~90 ms of 22.05 kHz int16 audio
 
 class TTSService:
-    def __init__(self, event_bus: EventBus, settings: AppConfig):
+    def __init__(self, event_bus: EventBus, settings: AppConfig, artifact_store: Optional[AudioArtifactStore] = None):
         self.event_bus = event_bus
         self.settings = settings
+        self.artifact_store = artifact_store or AudioArtifactStore.get_instance()
+        self.turns = TurnManager.get_instance()
         self.volume_db_reduction = getattr(settings, 'TTS_INITIAL_VOLUME_REDUCTION_DB', 0.0)
         self.speech_speed = getattr(settings, 'TTS_SPEECH_SPEED', 1.0)
         self.pitch_semitones = getattr(settings, 'TTS_PITCH_SEMITONES', 0.0)
+        self.processor = VoiceProcessor(
+            input_rate=read_piper_sample_rate(settings.PIPER_VOICE_MODEL),
+            output_rate=getattr(settings, 'TTS_OUTPUT_SAMPLE_RATE', 44100),
+            speed=self.speech_speed,
+            pitch_semitones=self.pitch_semitones,
+            gain_db=-self.volume_db_reduction,
+            normalize_dbfs=getattr(settings, 'TTS_NORMALIZE_DBFS', None),
+        )
+        self.lipsync_enabled = getattr(settings, 'TTS_LIPSYNC_ENABLED', True)
+        self.lipsync_frame_ms = getattr(settings, 'TTS_LIPSYNC_FRAME_MS', 15)
+        self.parallel_sentences = getattr(settings, 'TTS_PARALLEL_SENTENCES', False)
+        self.min_sentence_chars = getattr(settings, 'TTS_MIN_SENTENCE_CHARS', 40)
+        self.parallel_workers = getattr(settings, 'TTS_PARALLEL_WORKERS', 0) or os.cpu_count() or 1
+        self._sentence_slots = asyncio.Semaphore(self.parallel_workers)
+        extra_emotes = [e.strip() for e in getattr(settings, 'TTS_EXTRA_EMOTES', "").split(",") if e.strip()]
+        self.normalize_text = TextNormalizer(
+            emotes=[*DEFAULT_EMOTES, *extra_emotes],
+            cache_size=getattr(settings, 'TTS_TEXT_CACHE_SIZE', 1024)
+        )
 
     async def start(self):
         logger.info("TTSService starting (headless mode, no playback).")
         self.event_bus.subscribe_async(SpeakRequestEvent, self.handle_speak_request)
+        if getattr(self.settings, 'STARTUP_WARMUP', True):
+            await self.warm_up()
         logger.info("TTSService ready to synthesize speech.")
 
+    async def stop(self):
+        self.event_bus.unsubscribe(SpeakRequestEvent, self.handle_speak_request)
+
+    async def warm_up(self, text: str = "Ready."):
+        """
+        Synthesizes a short line and throws it away. Piper is a new process per line, so
+        this mainly pulls the binary and voice model into the page cache and fails fast
+        at startup (rather than on the first reply) if either is missing.
+        """
+        started = time.perf_counter()
+        async for _ in self.stream_pcm(text):
+            pass
+        logger.info(f"[TTSService] Piper warmed up in {time.perf_counter() - started:.2f}s.")
+
     async def handle_speak_request(self, event: SpeakRequestEvent):
         logger.info(f"[TTSService] SpeakRequestEvent: '{event.text[:100]}'")
 
@@ -32,119 +76,223 @@ class TTSService:
             logger.warning("Empty speak request received. Skipping.")
             return
 
-        wav_path = await self._synthesize_and_process(event.text)
+        # No local playback: the audio streams to Unity over /ws/unity as it is synthesized,
+        # and the finished WAV is kept in the artifact store under the utterance ID.
+        # Speech requested outside of any turn (chat reactions, !speak) gets a turn of its own so a barge-in can still stop it.
+        utterance_id = uuid.uuid4().hex
+        seq = 0
+        with use_turn(current_turn() or self.turns.track("speak")) as turn:
+            turn.attach()
+            turn.utterances.add(utterance_id)
+            try:
+                async with aclosing(self.stream_and_store(event.text, utterance_id)) as audio:
+                    async for pcm in audio:
+                        self.event_bus.emit(TTSAudioChunkEvent(utterance_id, seq, self.sample_rate, pcm))
+                        seq += 1
+                self.event_bus.emit(TTSAudioChunkEvent(utterance_id, seq, self.sample_rate, b"", is_final=True))
+            except RuntimeError as e:
+                logger.error(str(e))
+            except asyncio.CancelledError:
+                self.turns.record("tts_utterances_cancelled")
+                await self.event_bus.publish(TTSSpeakingStateEvent(is_speaking=False))
+                raise
 
         # Optionally emit speaking state or notify other services
         await self.event_bus.publish(TTSSpeakingStateEvent(is_speaking=False))
 
-        # For now we don't auto-play or send to Discord — just return WAV path or handle in API
-
-    async def _synthesize_and_process(self, text: str) -> str:
-        safe_text = remove_emojis(text)
-        if not safe_text.strip():
-            logger.info("Skipping TTS, text is empty after emoji removal.")
-            return ""
-
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp_f:
-            tmp_path = tmp_f.name
-
-        logger.info(f"Calling Piper CLI for: '{safe_text[:60]}'")
+    @property
+    def sample_rate(self) -> int:
+        return self.processor.output_rate
 
+    async def _piper_raw(self, text: str) -> AsyncIterator[bytes]:
+        """Runs Piper in raw output mode and yields its PCM as it is written to stdout."""
         process = await asyncio.create_subprocess_exec(
             self.settings.PIPER_PATH,
             "--model", self.settings.PIPER_VOICE_MODEL,
-            "--output_file", tmp_path,
+            "--output_raw",
             stdin=asyncio.subprocess.PIPE,
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE
         )
+        # Drain stderr concurrently so Piper's logging can never fill the pipe and stall it
+        stderr_task = asyncio.create_task(process.stderr.read())
+        started = time.perf_counter()
+        first_audio = None
+        try:
+            process.stdin.write(text.encode("utf-8"))
+            await process.stdin.drain()
+            process.stdin.close()
+
+            while True:
+                chunk = await process.stdout.read(PIPER_READ_CHUNK)
+                if not chunk:
+                    break
+                first_audio = first_audio or time.perf_counter()
+                yield chunk
+
+            returncode = await process.wait()
+            stderr = await stderr_task
+            if returncode != 0:
+                raise RuntimeError(f"Piper failed: {stderr.decode(errors='ignore').strip()}")
+            if first_audio:
+                self.turns.observe("piper_startup_seconds", first_audio - started)
+                self.turns.observe("piper_seconds_per_char", (time.perf_counter() - first_audio) / max(1, len(text)))
+        finally:
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+                turn = current_turn()
+                if turn is not None and turn.cancelled:
+                    # Credit the kill with the time Piper usually needs for this much text, minus what it already ran
+                    expected = self.turns.average("piper_startup_seconds") + self.turns.average("piper_seconds_per_char") * len(text)
+                    self.turns.record("piper_processes_killed")
+                    self.turns.record("piper_cpu_seconds_saved", max(0.0, expected - (time.perf_counter() - started)))
+            if not stderr_task.done():
+                stderr_task.cancel()
+
+    async def stream_pcm(self, text: str, utterance_id: Optional[str] = None) -> AsyncIterator[bytes]:
+        """
+        Synthesizes `text` and yields processed mono int16 PCM at `sample_rate`
+        chunk by chunk, without waiting for Piper to finish the whole utterance.
+        When `utterance_id` is given, a matching lip-sync envelope is published as
+        LipSyncEnvelopeEvents timestamped relative to the start of this audio.
+        """
+        safe_text = self.normalize_text(text)
+        if not safe_text:
+            logger.info("Skipping TTS, text is empty after normalization.")
+            return
 
-        stdout, stderr = await process.communicate(input=safe_text.encode("utf-8"))
+        sentences = split_sentences(safe_text, self.min_sentence_chars) if self.parallel_sentences else []
+        if len(sentences) > 1:
+            logger.info(f"Calling Piper CLI for {len(sentences)} sentences in parallel: '{safe_text[:60]}'")
+            source = self._stream_sentences(sentences)
+        else:
+            logger.info(f"Calling Piper CLI for: '{safe_text[:60]}'")
+            source = self._stream_single(safe_text)
+
+        envelope = EnvelopeTracker(self.sample_rate, self.lipsync_frame_ms) if utterance_id and self.lipsync_enabled else None
+        start = time.perf_counter()
+        first = True
+        # tts.stream includes time spent waiting on the consumer; tts.first_audio is Piper's start-up latency
+        with span("tts.stream", chars=len(safe_text), sentences=max(1, len(sentences))):
+            async with aclosing(source):
+                async for pcm in source:
+                    if first:
+                        add_span("tts.first_audio", start)
+                        first = False
+                    if envelope:
+                        self._emit_envelope(utterance_id, envelope, pcm)
+                    yield pcm
+        if envelope:
+            self._emit_envelope(utterance_id, envelope, b"", final=True)
+
+    async def _stream_single(self, text: str) -> AsyncIterator[bytes]:
+        stream = self.processor.stream()
+        # Closed explicitly so an abandoned stream kills Piper now rather than whenever it is garbage collected
+        async with aclosing(self._piper_raw(text)) as raw_chunks:
+            async for raw in raw_chunks:
+                pcm = stream.feed(raw)
+                if pcm:
+                    yield pcm
+        tail = stream.flush()
+        if tail:
+            yield tail
+
+    async def _synthesize_sentence(self, sentence: str) -> bytes:
+        async with self._sentence_slots:
+            return b"".join([pcm async for pcm in self._stream_single(sentence)])
+
+    async def _stream_sentences(self, sentences: list[str]) -> AsyncIterator[bytes]:
+        """
+        Runs one Piper process per sentence, at most `parallel_workers` at a time,
+        and yields each sentence's audio as soon as every earlier one has been yielded.
+        Piper already ends each sentence with its own trailing silence, so the pieces
+        are concatenated as-is.
+        """
+        tasks = [asyncio.create_task(self._synthesize_sentence(sentence)) for sentence in sentences]
+        try:
+            for task in tasks:
+                pcm = await task
+                if pcm:
+                    yield pcm
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def _emit_envelope(self, utterance_id: str, envelope: EnvelopeTracker, pcm: bytes, final: bool = False) -> None:
+        start_ms, values = envelope.feed(pcm, final=final)
+        if len(values) or final:
+            self.event_bus.emit(LipSyncEnvelopeEvent(
+                utterance_id=utterance_id,
+                start_ms=start_ms,
+                frame_ms=envelope.frame_ms,
+                values=values.round(3).tolist(),
+                is_final=final
+            ))
+
+    async def synthesize_pcm(self, text: str) -> bytes:
+        """Synthesizes a whole utterance; unlike stream_pcm this applies loudness normalization."""
+        safe_text = self.normalize_text(text)
+        if not safe_text:
+            logger.info("Skipping TTS, text is empty after normalization.")
+            return b""
 
-        if process.returncode != 0:
-            err = stderr.decode(errors="ignore")
-            logger.error(f"Piper failed: {err}")
-            return ""
+        logger.info(f"Calling Piper CLI for: '{safe_text[:60]}'")
+        with span("tts.synthesize", chars=len(safe_text)):
+            raw = b"".join([chunk async for chunk in self._piper_raw(safe_text)])
+        # Speed, pitch, gain and normalization all happen in memory on the raw PCM
+        return self.processor.process_pcm(raw)
 
+    async def _synthesize_and_process(self, text: str, utterance_id: Optional[str] = None) -> str:
         try:
-            audio = AudioSegment.from_wav(tmp_path)
-
-            # Apply speed
-            if self.speech_speed != 1.0:
-                new_rate = int(audio.frame_rate * self.speech_speed)
-                audio = audio._spawn(audio.raw_data, overrides={"frame_rate": new_rate})
-                audio = audio.set_frame_rate(44100)
-
-            # Apply pitch shift
-            if self.pitch_semitones != 0.0:
-                semitones = self.pitch_semitones / 12.0
-                new_rate = int(audio.frame_rate * (2.0 ** semitones))
-                audio = audio._spawn(audio.raw_data, overrides={"frame_rate": new_rate})
-                audio = audio.set_frame_rate(44100)
-
-            # Apply volume change
-            if self.volume_db_reduction != 0.0:
-                audio = audio - self.volume_db_reduction
-
-            audio.export(tmp_path, format="wav")
-            logger.info(f"TTS synthesis complete. Output saved to: {tmp_path}")
-            return tmp_path
-
-        except CouldntDecodeError:
-            logger.error("Pydub failed to decode Piper output.")
+            pcm = await self.synthesize_pcm(text)
+        except RuntimeError as e:
+            logger.error(str(e))
             return ""
-        
-    def speak_to_file(self, text: str) -> str:
-        """Generate speech from text and return path to the WAV file."""
-        import tempfile
-        import subprocess
-
-        if not text.strip():
-            raise ValueError("Cannot synthesize empty text.")
-
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_f:
-            tmp_path = tmp_f.name
-
-        process = subprocess.run(
-            [
-                self.settings.PIPER_PATH,
-                "--model", self.settings.PIPER_VOICE_MODEL,
-                "--output_file", tmp_path,
-            ],
-            input=text.encode("utf-8"),
-            capture_output=True,
-        )
-
-        if process.returncode != 0:
-            raise RuntimeError(f"Piper failed: {process.stderr.decode().strip()}")
+        if not pcm:
+            return ""
+        if utterance_id and self.lipsync_enabled:
+            self._emit_envelope(utterance_id, EnvelopeTracker(self.sample_rate, self.lipsync_frame_ms), pcm, final=True)
+
+        artifact_id = self.store_wav(pcm)
+        logger.info(f"TTS synthesis complete. Stored as artifact {artifact_id}")
+        return artifact_id
+
+    def store_wav(self, pcm: bytes, artifact_id: Optional[str] = None) -> str:
+        """Wraps processed PCM in a WAV header and keeps it in the artifact store."""
+        with span("artifact.store", bytes=len(pcm)):
+            return self.artifact_store.put(wav_header(self.sample_rate, len(pcm)) + pcm, "audio/wav", artifact_id)
+
+    async def stream_and_store(self, text: str, utterance_id: str) -> AsyncIterator[bytes]:
+        """stream_pcm that also keeps the finished utterance as a WAV artifact under `utterance_id`."""
+        chunks = []
+        async with aclosing(self.stream_pcm(text, utterance_id)) as audio:
+            async for pcm in audio:
+                chunks.append(pcm)
+                yield pcm
+        if chunks:
+            self.store_wav(b"".join(chunks), artifact_id=utterance_id)
+
+    async def stream_wav(self, text: str, utterance_id: Optional[str] = None) -> AsyncIterator[bytes]:
+        """
+        stream_pcm wrapped in an open-ended WAV header, for HTTP clients that expect audio/wav.
+        With an `utterance_id` the finished audio is also kept as an artifact.
+        """
+        yield wav_header(self.sample_rate)
+        source = self.stream_and_store(text, utterance_id) if utterance_id else self.stream_pcm(text)
+        async for pcm in source:
+            yield pcm
 
-        return tmp_path
     async def synthesize_to_wav(self, text: str) -> str:
         """
-        Queue speech but skip playback. Only generate the WAV and return its path.
+        Queue speech but skip playback. Only generate the WAV and return its artifact ID.
         This is for API-based use like /respond.
         """
-        import tempfile
-        import subprocess
-
         if not text.strip():
             raise ValueError("TTS input text is empty.")
 
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_f:
-            tmp_path = tmp_f.name
-
-        process = await asyncio.create_subprocess_exec(
-            self.settings.PIPER_PATH,
-            "--model", self.settings.PIPER_VOICE_MODEL,
-            "--output_file", tmp_path,
-            stdin=asyncio.subprocess.PIPE,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE
-        )
-
-        stdout, stderr = await process.communicate(input=text.encode("utf-8"))
-
-        if process.returncode != 0:
-            raise RuntimeError(f"Piper error: {stderr.decode().strip()}")
-
-        return tmp_path
+        artifact_id = await self._synthesize_and_process(text)
+        if not artifact_id:
+            raise RuntimeError("Piper produced no audio.")
+        return artifact_id
@@ -1,113 +1,243 @@
 import asyncio
-import websockets
-import json
+import logging
+import random
+import time
+from typing import Optional
+
 import aiohttp
+import websockets
+
+from app.core.event_bus import EventBus
+from app.services.eventsub_ingest import EventSubIngest, loads
+from app.services.twitch_token_refresh import TwitchTokenManager, TwitchTokenProvider
 from app.services.websocket_manager import WebSocketManager
 from app.core.config import settings  # Your .env loader
 
+logger = logging.getLogger(__name__)
+
+TWITCH_EVENTSUB_WS_URL = getattr(settings, 'TWITCH_EVENTSUB_WS_URL', "wss://eventsub.wss.twitch.tv/ws")
+HELIX_URL = getattr(settings, 'TWITCH_API_URL', "https://api.twitch.tv/helix")
+
+WELCOME_TIMEOUT = 10.0  # Twitch closes the socket itself if we don't subscribe within 10s of welcome
+KEEPALIVE_GRACE = 5.0  # Slack on top of keepalive_timeout_seconds before declaring the socket dead
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 60.0
+
+def _subscription(sub_type: str, version: str, **condition) -> dict:
+    return {"type": sub_type, "version": version, "condition": condition}
+
+def default_subscriptions(broadcaster_id: str, bot_user_id: Optional[str] = None, chat: bool = False) -> list[dict]:
+    # Chat is opt-in: every channel.chat.message mentioning Penny turns into an LLM reply
+    chat_subscriptions = [
+        _subscription("channel.chat.message", "1", broadcaster_user_id=broadcaster_id, user_id=bot_user_id or broadcaster_id)
+    ] if chat else []
+    return chat_subscriptions + [
+        _subscription("channel.subscribe", "1", broadcaster_user_id=broadcaster_id),
+        _subscription("channel.subscription.message", "1", broadcaster_user_id=broadcaster_id),
+        _subscription("channel.subscription.gift", "1", broadcaster_user_id=broadcaster_id),
+        _subscription("channel.cheer", "1", broadcaster_user_id=broadcaster_id),
+        _subscription("channel.raid", "1", to_broadcaster_user_id=broadcaster_id),
+        _subscription("channel.follow", "2", broadcaster_user_id=broadcaster_id, moderator_user_id=broadcaster_id),
+    ]
+
+class KeepaliveTimeout(Exception):
+    pass
 
 class TwitchEventSubConduit:
-    def __init__(self, ws_manager: WebSocketManager):
+    """
+    Supervised EventSub websocket client.
+
+    run() keeps a session alive for the lifetime of the app: subscriptions are
+    created concurrently after each fresh welcome, session_reconnect migrates to
+    the new URL without re-subscribing, silence longer than the keepalive window
+    is treated as a dead socket, and reconnects back off with full jitter.
+    """
+
+    def __init__(
+        self,
+        ws_manager: WebSocketManager,
+        ws_url: str = TWITCH_EVENTSUB_WS_URL,
+        helix_url: str = HELIX_URL,
+        subscriptions: Optional[list[dict]] = None,
+        event_bus: Optional[EventBus] = None,
+        ingest: Optional[EventSubIngest] = None,
+        tokens: Optional[TwitchTokenProvider] = None,
+    ):
         self.ws_manager = ws_manager
+        self.tokens = tokens or TwitchTokenManager.get_instance().app
+        self.ingest = ingest or EventSubIngest(event_bus or EventBus.get_instance(), ws_manager)
         self.session_id = None
-        self.twitch_ws_url = "wss://eventsub.wss.twitch.tv/ws"
+        self.twitch_ws_url = ws_url
+        self.helix_url = helix_url.rstrip("/")
+        self.subscriptions = subscriptions if subscriptions is not None else default_subscriptions(
+            settings.TWITCH_BROADCASTER_ID, getattr(settings, 'TWITCH_BOT_USER_ID', ''),
+            chat=getattr(settings, 'TWITCH_CHAT_REPLIES_ENABLED', False),
+        )
+        self.active_subscriptions: set[str] = set()
         self.connected = False
-
-        async def connect(self):
-            print("[TwitchEventSub] Connecting to Twitch WebSocket Conduit...")
+        self.keepalive_timeout: float = 10.0
+        self.last_message_at = 0.0
+        self.reconnects = 0
+        self._stopping = False
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        self._stopping = True
+        self.connected = False
+        if self._task:
+            self._task.cancel()
             try:
-                async with websockets.connect(self.twitch_ws_url) as ws:
-                    self.connected = True
-                    while self.connected:
-                        raw_data = await ws.recv()
-
-                        if isinstance(raw_data, memoryview):
-                            message = raw_data.tobytes().decode("utf-8")
-                        elif isinstance(raw_data, (bytes, bytearray)):
-                            message = raw_data.decode("utf-8")
-                        else:
-                            message = str(raw_data)
-
-                        await self.handle_message(message)
-
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+
+    async def connect(self):
+        """Connects and stays connected until stop(); kept for callers of the old API."""
+        await self.run()
+
+    async def run(self):
+        attempt = 0
+        while not self._stopping:
+            welcomed = False
+            try:
+                logger.info(f"[TwitchEventSub] Connecting to {self.twitch_ws_url}...")
+                async for _ in self._run_session(self.twitch_ws_url):
+                    welcomed = True
+                    attempt = 0
+            except asyncio.CancelledError:
+                raise
+            except KeepaliveTimeout:
+                logger.warning(f"[TwitchEventSub] No message within {self.keepalive_timeout + KEEPALIVE_GRACE:.0f}s, reconnecting.")
             except Exception as e:
-                print(f"[TwitchEventSub] Connection error: {e}")
+                logger.error(f"[TwitchEventSub] Connection error: {type(e).__name__}: {e}")
+            finally:
                 self.connected = False
+                self.session_id = None
+
+            if self._stopping:
+                break
+            attempt = 0 if welcomed else attempt + 1
+            delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+            self.reconnects += 1
+            logger.info(f"[TwitchEventSub] Reconnecting in {delay:.1f}s (attempt {attempt + 1}).")
+            await asyncio.sleep(delay)
+
+    async def _run_session(self, url: str):
+        """Runs one logical session (across session_reconnect migrations); yields once when welcomed."""
+        ws = await websockets.connect(url)
+        try:
+            await self._await_welcome(ws)
+            await self.subscribe_to_events(self.session_id)
+            self.connected = True
+            yield
+
+            while not self._stopping:
+                data = await self._receive(ws)
+                msg_type = data.get("metadata", {}).get("message_type")
+
+                if msg_type == "session_reconnect":
+                    ws = await self._migrate(ws, data["payload"]["session"]["reconnect_url"])
+                else:
+                    await self.handle_message(data)
+        finally:
+            await ws.close()
+
+    async def _receive(self, ws) -> dict:
+        try:
+            raw = await asyncio.wait_for(ws.recv(), timeout=self.keepalive_timeout + KEEPALIVE_GRACE)
+        except asyncio.TimeoutError:
+            raise KeepaliveTimeout()
+        self.last_message_at = time.monotonic()
+        if isinstance(raw, memoryview):
+            raw = raw.tobytes()
+        return loads(raw)
+
+    async def _await_welcome(self, ws) -> None:
+        try:
+            raw = await asyncio.wait_for(ws.recv(), timeout=WELCOME_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise ConnectionError("No session_welcome received.")
+        self.last_message_at = time.monotonic()
+        data = loads(raw)
+        if data.get("metadata", {}).get("message_type") != "session_welcome":
+            raise ConnectionError(f"Expected session_welcome, got {data.get('metadata', {}).get('message_type')}.")
+        session = data["payload"]["session"]
+        self.session_id = session["id"]
+        self.keepalive_timeout = float(session.get("keepalive_timeout_seconds") or self.keepalive_timeout)
+        logger.info(f"[TwitchEventSub] Connected! Session ID: {self.session_id} (keepalive {self.keepalive_timeout:.0f}s)")
+
+    async def _migrate(self, old_ws, reconnect_url: str):
+        """
+        Follows a session_reconnect: subscriptions move with the session, so once the
+        new socket is welcomed we only drain and close the old one.
+        """
+        logger.info("[TwitchEventSub] session_reconnect received, migrating connection.")
+        new_ws = await websockets.connect(reconnect_url)
+        try:
+            await self._await_welcome(new_ws)
+        except Exception:
+            await new_ws.close()
+            raise
 
-
-    async def handle_message(self, message: str):
+        # Anything Twitch already sent on the old socket still has to be handled
+        while True:
+            try:
+                raw = await asyncio.wait_for(old_ws.recv(), timeout=0.05)
+            except (asyncio.TimeoutError, websockets.ConnectionClosed):
+                break
+            await self.handle_message(loads(raw))
+        await old_ws.close()
+        self.reconnects += 1
+        return new_ws
+
+    async def handle_message(self, data: dict):
         try:
-            data = json.loads(message)
             metadata = data.get("metadata", {})
             msg_type = metadata.get("message_type")
             payload = data.get("payload", {})
 
-            if msg_type == "session_welcome":
-                self.session_id = payload["session"]["id"]
-                print(f"[TwitchEventSub] Connected! Session ID: {self.session_id}")
-                await self.subscribe_to_events(self.session_id)
-
-            elif msg_type == "notification":
-                event = payload.get("event", {})
-                await self.route_event(event)
+            if msg_type == "notification":
+                await self.ingest.handle_notification(data)
 
             elif msg_type == "session_keepalive":
-                print("[TwitchEventSub] Keepalive received.")
+                logger.debug("[TwitchEventSub] Keepalive received.")
+
+            elif msg_type == "revocation":
+                subscription = payload.get("subscription", {})
+                self.active_subscriptions.discard(subscription.get("type"))
+                logger.warning(
+                    f"[TwitchEventSub] Subscription {subscription.get('type')} revoked: {subscription.get('status')}"
+                )
 
         except Exception as e:
-            print(f"[TwitchEventSub] Error handling message: {e}")
+            logger.error(f"[TwitchEventSub] Error handling message: {e}", exc_info=True)
 
     async def subscribe_to_events(self, session_id: str):
-        headers = {
-            "Authorization": f"Bearer {settings.TWITCH_APP_ACCESS_TOKEN}",
-            "Client-Id": settings.TWITCH_CLIENT_ID,
-            "Content-Type": "application/json"
-        }
-
-        base = {
-            "transport": {
-                "method": "websocket",
-                "session_id": session_id
-            }
-        }
-
-        event_types = [
-            {"type": "channel.subscribe"},
-            {"type": "channel.raid"},
-            {"type": "channel.follow"},
-            {"type": "channel.cheer"},
-            {"type": "channel.subscription.gift"}
-        ]
-
-        async with aiohttp.ClientSession() as session:
-            for event in event_types:
-                payload = {
-                    **event,
-                    "version": "1",
-                    "condition": {
-                        "broadcaster_user_id": settings.TWITCH_BROADCASTER_ID
-                    },
-                    **base
-                }
-                async with session.post(
-                    "https://api.twitch.tv/helix/eventsub/subscriptions",
-                    headers=headers,
-                    json=payload
-                ) as resp:
-                    if resp.status == 202:
-                        print(f"[TwitchEventSub] Subscribed to {event['type']}")
-                    else:
-                        error = await resp.text()
-                        print(f"[TwitchEventSub] Subscription failed for {event['type']}: {error}")
-
-    async def route_event(self, event: dict):
-        print(f"[TwitchEventSub] Event received: {event}")
-        await self.ws_manager.broadcast(json.dumps({
-            "type": event.get("type"),
-            "user": event.get("user_name", "unknown"),
-            "viewer_count": event.get("viewer_count", None),
-            "tier": event.get("tier", None),
-            "bits": event.get("bits", None),
-            "gifter": event.get("gifter_user_name", None),
-            "count": event.get("total", None)
-        }))
+        transport = {"method": "websocket", "session_id": session_id}
+
+        async def subscribe(subscription: dict):
+            try:
+                # The token provider pools the HTTP session and refreshes once on a 401
+                status, body = await self.tokens.request(
+                    "POST",
+                    f"{self.helix_url}/eventsub/subscriptions",
+                    json={**subscription, "transport": transport}
+                )
+                if status == 202:
+                    self.active_subscriptions.add(subscription["type"])
+                    logger.info(f"[TwitchEventSub] Subscribed to {subscription['type']}")
+                    return True
+                logger.error(f"[TwitchEventSub] Subscription failed for {subscription['type']}: {body}")
+            except aiohttp.ClientError as e:
+                logger.error(f"[TwitchEventSub] Subscription request failed for {subscription['type']}: {e}")
+            return False
+
+        self.active_subscriptions.clear()
+        results = await asyncio.gather(*(subscribe(sub) for sub in self.subscriptions))
+        logger.info(f"[TwitchEventSub] {sum(results)}/{len(results)} subscriptions active.")
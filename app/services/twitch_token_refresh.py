@@ -6,138 +6,300 @@ import aiohttp
 import json
 import time
 import asyncio
-from typing import Optional
-from dotenv import load_dotenv, set_key
+import tempfile
+import threading
+from typing import Any, Optional
+from dotenv import set_key
 from app.core.config import settings
+from app.services.http_pool import HttpPool
 
 logger = logging.getLogger(__name__)
-TWITCH_TOKEN_URL = "https://id.twitch.tv/oauth2/token"
+TWITCH_OAUTH_URL = getattr(settings, 'TWITCH_OAUTH_URL', "https://id.twitch.tv/oauth2").rstrip("/")
+TWITCH_TOKEN_URL = f"{TWITCH_OAUTH_URL}/token"
+TWITCH_VALIDATE_URL = f"{TWITCH_OAUTH_URL}/validate"
 SETTINGS_FILE = "settings.json"
-THREE_HOURS = 3 * 60 * 60
+RETRY_MIN_SECONDS = 15.0
+RETRY_MAX_SECONDS = 300.0
+# The app and chat providers persist from their own threads into the same .env and settings.json
+_persist_lock = threading.Lock()
 
-class TwitchTokenManager:
-    def __init__(self, env_path: str = ".env"):
-        self.env_path = os.getenv("ENV_PATH", env_path)
+def _load_settings_tokens() -> dict:
+    if not os.path.exists(SETTINGS_FILE):
+        return {}
+    with open(SETTINGS_FILE, "r", encoding="utf-8") as f:
+        return json.load(f).get("tokens", {})
 
-    def _update_settings_json(self, updates: dict):
-        try:
-            data = {}
-            if os.path.exists(SETTINGS_FILE):
-                with open(SETTINGS_FILE, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-            data.setdefault('tokens', {}).update(updates)
-
-            with open(SETTINGS_FILE, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=4)
-            logger.info(f"[TokenManager] Updated {SETTINGS_FILE}: {list(updates.keys())}")
-        except Exception as e:
-            logger.error(f"[TokenManager] Failed to update {SETTINGS_FILE}: {e}", exc_info=True)
+def _update_settings_json(updates: dict):
+    data = {}
+    if os.path.exists(SETTINGS_FILE):
+        with open(SETTINGS_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    data.setdefault('tokens', {}).update(updates)
 
-    async def refresh_app_token(self) -> Optional[str]:
-        payload = {
-            "grant_type": "client_credentials",
-            "client_id": settings.TWITCH_CLIENT_ID,
-            "client_secret": settings.TWITCH_CLIENT_SECRET,
-        }
+    # Write-then-rename so a crash mid-write never leaves a truncated settings.json
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=os.path.dirname(os.path.abspath(SETTINGS_FILE)),
+                                     prefix=f"{SETTINGS_FILE}.", suffix=".tmp", delete=False) as f:
+        json.dump(data, f, indent=4)
+    try:
+        os.replace(f.name, SETTINGS_FILE)
+    except OSError:
+        os.unlink(f.name)
+        raise
 
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(TWITCH_TOKEN_URL, data=payload) as resp:
-                    data = await resp.json()
-                    if resp.status == 200:
-                        token = data.get("access_token")
-                        expires_in = data.get("expires_in")
-                        if token:
-                            expires_at = int(time.time()) + expires_in
-                            settings.TWITCH_APP_ACCESS_TOKEN = token
-                            if os.path.exists(self.env_path):
-                                set_key(self.env_path, "TWITCH_APP_ACCESS_TOKEN", token)
-                            self._update_settings_json({"TWITCH_APP_TOKEN_EXPIRES_AT": expires_at})
-                            logger.info(f"[TokenManager] App token refreshed. Expires at {expires_at}")
-                            return token
-                    logger.error(f"[TokenManager] App token refresh failed: {data}")
-        except Exception as e:
-            logger.error(f"[TokenManager] App token exception: {e}", exc_info=True)
-        return None
+class TwitchTokenProvider:
+    """
+    Owns one Twitch OAuth token (the app token or the chat user token).
 
-    async def refresh_chat_token(self) -> Optional[str]:
-        return await self._refresh_token(
-            refresh_token=settings.TWITCH_CHAT_REFRESH_TOKEN,
-            access_token_key="TWITCH_CHAT_TOKEN",
-            refresh_token_key="TWITCH_CHAT_REFRESH_TOKEN",
-            expires_at_key="TWITCH_CHAT_TOKEN_EXPIRES_AT",
-            context="Chat"
-        )
+    The token and its expiry live in memory and a refresh is scheduled
+    `refresh_margin` seconds before expiry. Concurrent refreshes (scheduled,
+    explicit or triggered by a 401 in request()) share one in-flight call, and
+    new tokens are written to .env / settings.json in a background thread.
+    HTTP goes through the shared HttpPool session unless `http` is given.
+    """
 
-    async def _refresh_token(
+    def __init__(
         self,
-        refresh_token: str,
+        context: str,
         access_token_key: str,
-        refresh_token_key: str,
         expires_at_key: str,
-        context: str
-    ) -> Optional[str]:
-        if not refresh_token:
-            logger.error(f"[TokenManager] {context} refresh token is missing.")
+        refresh_token_key: Optional[str] = None,
+        env_path: str = ".env",
+        http: Optional[aiohttp.ClientSession] = None,
+        token_url: str = TWITCH_TOKEN_URL,
+        validate_url: str = TWITCH_VALIDATE_URL,
+        refresh_margin: Optional[float] = None,
+    ):
+        self.context = context
+        self.access_token_key = access_token_key
+        self.expires_at_key = expires_at_key
+        self.refresh_token_key = refresh_token_key
+        self.env_path = env_path
+        self.token_url = token_url
+        self.validate_url = validate_url
+        self.refresh_margin = refresh_margin if refresh_margin is not None else getattr(settings, 'TWITCH_TOKEN_REFRESH_MARGIN_SECONDS', 300.0)
+
+        self.access_token: str = getattr(settings, access_token_key, "") or ""
+        self.refresh_token: str = getattr(settings, refresh_token_key, "") if refresh_token_key else ""
+        self.expires_at: float = 0.0  # Unix time; 0 means unknown
+        self.refreshes = 0
+
+        self._http = http
+        self._inflight: Optional[asyncio.Future] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._retry_delay = RETRY_MIN_SECONDS
+        self._persist_task: Optional[asyncio.Task] = None
+        self._persist_pending: dict = {}
+
+    @property
+    def grant_type(self) -> str:
+        return "refresh_token" if self.refresh_token_key else "client_credentials"
+
+    def _client(self) -> aiohttp.ClientSession:
+        return self._http if self._http is not None else HttpPool.get_instance().session()
+
+    def expires_in(self) -> float:
+        return self.expires_at - time.time() if self.expires_at else 0.0
+
+    def is_valid(self) -> bool:
+        return bool(self.access_token) and self.expires_in() > self.refresh_margin
+
+    async def start(self):
+        """Loads the persisted expiry once, validates the token if the expiry is unknown and schedules the refresh."""
+        try:
+            tokens = await asyncio.to_thread(_load_settings_tokens)
+            expires_at = tokens.get(self.expires_at_key, 0)
+            if isinstance(expires_at, (int, float)):
+                self.expires_at = float(expires_at)
+        except Exception as e:
+            logger.error(f"[TokenManager] Failed reading {SETTINGS_FILE}: {e}")
+
+        if self.access_token and not self.expires_at:
+            await self._validate()
+        if not self.is_valid():
+            await self.refresh()
+        else:
+            self._schedule()
+
+    async def stop(self):
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        if self._persist_task:
+            await asyncio.gather(self._persist_task, return_exceptions=True)
+
+    async def get_token(self) -> Optional[str]:
+        if self.is_valid():
+            return self.access_token
+        return await self.refresh()
+
+    async def refresh(self, stale_token: Optional[str] = None) -> Optional[str]:
+        """
+        Refreshes the token, joining a refresh that is already in flight. With
+        `stale_token`, a refresh is skipped if the token already changed since.
+        """
+        if stale_token is not None and self.access_token and self.access_token != stale_token:
+            return self.access_token
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._do_refresh())
+            self._inflight.add_done_callback(self._clear_inflight)
+        return await asyncio.shield(self._inflight)
+
+    def _clear_inflight(self, _future: asyncio.Future):
+        self._inflight = None
+
+    async def _do_refresh(self) -> Optional[str]:
+        if self.grant_type == "refresh_token" and not self.refresh_token:
+            logger.error(f"[TokenManager] {self.context} refresh token is missing.")
             return None
 
         payload = {
-            "grant_type": "refresh_token",
-            "refresh_token": refresh_token,
+            "grant_type": self.grant_type,
             "client_id": settings.TWITCH_CLIENT_ID,
             "client_secret": settings.TWITCH_CLIENT_SECRET,
         }
+        if self.grant_type == "refresh_token":
+            payload["refresh_token"] = self.refresh_token
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(TWITCH_TOKEN_URL, data=payload) as resp:
-                    data = await resp.json()
-                    if resp.status == 200:
-                        access_token = data.get("access_token")
-                        new_refresh_token = data.get("refresh_token")
-                        expires_in = data.get("expires_in")
-                        if access_token:
-                            expires_at = int(time.time()) + expires_in
-                            setattr(settings, access_token_key, access_token)
-                            if os.path.exists(self.env_path):
-                                set_key(self.env_path, access_token_key, access_token)
-                                if new_refresh_token:
-                                    setattr(settings, refresh_token_key, new_refresh_token)
-                                    set_key(self.env_path, refresh_token_key, new_refresh_token)
-                            self._update_settings_json({expires_at_key: expires_at})
-                            logger.info(f"[TokenManager] {context} token refreshed. Expires at {expires_at}")
-                            return access_token
-                    logger.error(f"[TokenManager] {context} token refresh failed: {data}")
+            async with self._client().post(self.token_url, data=payload) as resp:
+                data = await resp.json(content_type=None)
+                if resp.status == 200 and data.get("access_token"):
+                    self._apply(data)
+                    logger.info(f"[TokenManager] {self.context} token refreshed. Expires at {int(self.expires_at)}")
+                    return self.access_token
+                logger.error(f"[TokenManager] {self.context} token refresh failed: {data}")
         except Exception as e:
-            logger.error(f"[TokenManager] Exception refreshing {context} token: {e}", exc_info=True)
+            logger.error(f"[TokenManager] Exception refreshing {self.context} token: {e}", exc_info=True)
 
+        self._schedule(retry=True)
         return None
-    
-    THREE_HOURS = 3 * 60 * 60
 
-    def _should_refresh(self, expires_at_key: str) -> bool:
-        """Returns True if the token is expiring within 3 hours or missing."""
+    def _apply(self, data: dict):
+        self.access_token = data["access_token"]
+        self.expires_at = time.time() + float(data.get("expires_in") or 0)
+        self.refreshes += 1
+        self._retry_delay = RETRY_MIN_SECONDS
+        setattr(settings, self.access_token_key, self.access_token)
+
+        env_updates = {self.access_token_key: self.access_token}
+        new_refresh_token = data.get("refresh_token")
+        if self.refresh_token_key and new_refresh_token:
+            self.refresh_token = new_refresh_token
+            setattr(settings, self.refresh_token_key, new_refresh_token)
+            env_updates[self.refresh_token_key] = new_refresh_token
+
+        self._persist(env_updates, {self.expires_at_key: int(self.expires_at)})
+        self._schedule()
+
+    async def _validate(self):
+        """Asks Twitch how long the current token has left, for tokens with no recorded expiry."""
         try:
-            if not os.path.exists(SETTINGS_FILE):
-                return True
-            with open(SETTINGS_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            expires_at = data.get("tokens", {}).get(expires_at_key, 0)
-            if not isinstance(expires_at, int):
-                return True
-            return (expires_at - time.time()) < self.THREE_HOURS
+            headers = {"Authorization": f"OAuth {self.access_token}"}
+            async with self._client().get(self.validate_url, headers=headers) as resp:
+                if resp.status == 200:
+                    data = await resp.json(content_type=None)
+                    self.expires_at = time.time() + float(data.get("expires_in") or 0)
+                else:
+                    self.access_token = ""
         except Exception as e:
-            logger.error(f"[TokenManager] Failed checking expiry for {expires_at_key}: {e}")
-            return True
+            logger.warning(f"[TokenManager] Could not validate {self.context} token: {e}")
 
-    async def start_periodic_refresh_loop(self, interval_seconds: int = 1800):
-        """Background loop to refresh tokens every X seconds if needed."""
-        while True:
+    def _schedule(self, retry: bool = False):
+        if self._timer:
+            self._timer.cancel()
+        if retry:
+            delay = self._retry_delay
+            self._retry_delay = min(RETRY_MAX_SECONDS, self._retry_delay * 2)
+        else:
+            delay = max(0.0, self.expires_in() - self.refresh_margin)
+        loop = asyncio.get_running_loop()
+        self._timer = loop.call_later(delay, lambda: asyncio.ensure_future(self.refresh()))
+        logger.debug(f"[TokenManager] {self.context} token refresh scheduled in {delay:.0f}s")
+
+    def _persist(self, env_updates: dict, json_updates: dict):
+        # Coalesce: if a write is already running, the next one picks up the latest values
+        self._persist_pending.setdefault("env", {}).update(env_updates)
+        self._persist_pending.setdefault("json", {}).update(json_updates)
+        if self._persist_task is None or self._persist_task.done():
+            self._persist_task = asyncio.create_task(self._persist_loop())
+
+    async def _persist_loop(self):
+        while self._persist_pending:
+            pending, self._persist_pending = self._persist_pending, {}
             try:
-                if self._should_refresh("TWITCH_APP_TOKEN_EXPIRES_AT"):
-                    await self.refresh_app_token()
-                if self._should_refresh("TWITCH_CHAT_TOKEN_EXPIRES_AT"):
-                    await self.refresh_chat_token()
+                await asyncio.to_thread(self._write, pending.get("env", {}), pending.get("json", {}))
             except Exception as e:
-                logger.error(f"[TokenManager] Error during scheduled refresh: {e}", exc_info=True)
-            await asyncio.sleep(interval_seconds)
+                logger.error(f"[TokenManager] Failed persisting {self.context} token: {e}", exc_info=True)
+
+    def _write(self, env_updates: dict, json_updates: dict):
+        # Both files are read-modify-write, so one provider's write must not interleave with the other's
+        with _persist_lock:
+            if os.path.exists(self.env_path):
+                for key, value in env_updates.items():
+                    set_key(self.env_path, key, value)
+            if json_updates:
+                _update_settings_json(json_updates)
+        if json_updates:
+            logger.info(f"[TokenManager] Updated {SETTINGS_FILE}: {list(json_updates.keys())}")
+
+    async def request(self, method: str, url: str, headers: Optional[dict] = None, **kwargs) -> tuple[int, Any]:
+        """
+        Makes an authorized Helix request, refreshing and retrying once on 401.
+        Returns (status, parsed JSON or text body).
+        """
+        for attempt in range(2):
+            token = await self.get_token()
+            request_headers = {"Client-Id": settings.TWITCH_CLIENT_ID, "Authorization": f"Bearer {token}", **(headers or {})}
+            async with self._client().request(method, url, headers=request_headers, **kwargs) as resp:
+                if resp.status == 401 and attempt == 0:
+                    logger.info(f"[TokenManager] {self.context} token rejected, refreshing.")
+                    await self.refresh(stale_token=token)
+                    continue
+                if resp.content_type == "application/json":
+                    return resp.status, await resp.json()
+                return resp.status, await resp.text()
+
+class TwitchTokenManager:
+    def __init__(self, env_path: str = ".env"):
+        self.env_path = os.getenv("ENV_PATH", env_path)
+        self.app = TwitchTokenProvider(
+            "App",
+            access_token_key="TWITCH_APP_ACCESS_TOKEN",
+            expires_at_key="TWITCH_APP_TOKEN_EXPIRES_AT",
+            env_path=self.env_path,
+        )
+        self.chat = TwitchTokenProvider(
+            "Chat",
+            access_token_key="TWITCH_CHAT_TOKEN",
+            expires_at_key="TWITCH_CHAT_TOKEN_EXPIRES_AT",
+            refresh_token_key="TWITCH_CHAT_REFRESH_TOKEN",
+            env_path=self.env_path,
+        )
+
+    async def start(self):
+        await asyncio.gather(self.app.start(), self.chat.start())
+
+    async def stop(self):
+        await asyncio.gather(self.app.stop(), self.chat.stop())
+
+    async def refresh_app_token(self) -> Optional[str]:
+        return await self.app.refresh()
+
+    async def refresh_chat_token(self) -> Optional[str]:
+        return await self.chat.refresh()
+
+    async def start_periodic_refresh_loop(self, interval_seconds: int = 1800):
+        """Kept for existing callers: refreshes are now scheduled from each token's expiry, not polled."""
+        await self.start()
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await self.stop()
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
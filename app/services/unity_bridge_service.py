@@ -0,0 +1,56 @@
+# app/services/unity_bridge_service.py
+
+import logging
+
+from app.core.event_bus import EventBus
+from app.core.events import LipSyncEnvelopeEvent, TTSAudioChunkEvent, TurnCancelledEvent
+from app.core.turns import TurnManager
+from app.core.unity_protocol import audio_frame, control_frame, lipsync_frame
+from app.services.websocket_manager import WebSocketManager
+
+logger = logging.getLogger(__name__)
+
+class UnityBridgeService:
+    """Forwards backend events that Unity renders (speech audio, lip-sync, etc.) to the /ws/unity clients."""
+
+    def __init__(self, event_bus: EventBus, ws_manager: WebSocketManager):
+        self.event_bus = event_bus
+        self.ws_manager = ws_manager
+        self.turns = TurnManager.get_instance()
+
+    async def start(self):
+        self.event_bus.subscribe_async(LipSyncEnvelopeEvent, self.handle_lipsync_envelope)
+        self.event_bus.subscribe_async(TTSAudioChunkEvent, self.handle_audio_chunk)
+        self.event_bus.subscribe_async(TurnCancelledEvent, self.handle_turn_cancelled)
+        logger.info("UnityBridgeService started.")
+
+    async def stop(self):
+        self.event_bus.unsubscribe(LipSyncEnvelopeEvent, self.handle_lipsync_envelope)
+        self.event_bus.unsubscribe(TTSAudioChunkEvent, self.handle_audio_chunk)
+        self.event_bus.unsubscribe(TurnCancelledEvent, self.handle_turn_cancelled)
+        logger.info("UnityBridgeService stopped.")
+
+    async def handle_lipsync_envelope(self, event: LipSyncEnvelopeEvent):
+        if not self.ws_manager.active_connections:
+            return
+        await self.ws_manager.broadcast_frame(lipsync_frame(
+            event.utterance_id, event.start_ms, event.frame_ms, event.values, event.is_final
+        ), tag=event.utterance_id)
+
+    async def handle_audio_chunk(self, event: TTSAudioChunkEvent):
+        if not self.ws_manager.active_connections:
+            return
+        # Audio is critical: dropping a chunk mid-utterance is worse than dropping a lip-sync frame
+        await self.ws_manager.broadcast_frame(audio_frame(
+            event.utterance_id, event.seq, event.sample_rate, event.pcm, event.is_final
+        ), critical=True, tag=event.utterance_id)
+
+    async def handle_turn_cancelled(self, event: TurnCancelledEvent):
+        # Audio already queued for a cancelled utterance would otherwise keep playing after the barge-in
+        for utterance_id in event.utterance_ids:
+            discarded = self.ws_manager.discard_queued(utterance_id)
+            if discarded:
+                self.turns.record("ws_frames_discarded", discarded)
+            await self.ws_manager.broadcast_frame(
+                control_frame("cancel", utterance_id=utterance_id, reason=event.reason), critical=True
+            )
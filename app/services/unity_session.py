@@ -0,0 +1,233 @@
+# app/services/unity_session.py
+
+import asyncio
+import logging
+import uuid
+from contextlib import aclosing
+from typing import Optional
+
+from fastapi import WebSocket
+
+from app.core.events import PTTRecordingStateEvent, SearchRequestEvent, SpeakRequestEvent, VisionSummaryEvent
+from app.core.turns import Turn, current_turn, use_turn
+from app.core.unity_protocol import (
+    AUDIO, CONTROL, EVENT, ProtocolError, UnityFrame, audio_frame, control_frame, decode, event_frame
+)
+from app.services.container import ServiceContainer
+from app.services.transcribe_service import WHISPER_SAMPLE_RATE
+from app.utils.audio_decode import MIC_ENCODINGS, AudioDecodeError, StreamingDecoder, accepted_mic_encodings
+from app.utils.audio_dsp import pcm16_to_float, rational_ratio, resample_poly
+
+logger = logging.getLogger(__name__)
+
+MAX_MIC_SECONDS = 60
+
+class UnitySession:
+    """
+    Full-duplex session for one /ws/unity connection.
+
+    Inbound, Unity streams mic audio (mic_start, audio frames, mic_end) and typed
+    commands; outbound, the same connection carries the transcript, Penny's reply
+    and the reply audio. Everything else is routed onto the EventBus.
+
+    Mic audio is raw PCM unless mic_start names one of the compressed encodings
+    advertised in "welcome" (Ogg/Opus or FLAC), which are decoded while the
+    streamer is still talking.
+
+    Each mic recording or command is a Turn (app/core/turns.py). mic_start barges
+    in on everything Penny is doing; a new command supersedes this session's
+    previous turn. A cancelled turn is reported with a "cancel" control frame.
+    """
+
+    def __init__(self, websocket: WebSocket, services: ServiceContainer):
+        self.websocket = websocket
+        self.services = services
+        self.ws_manager = services.ws_manager
+        self.event_bus = services.event_bus
+        self.session_id = uuid.uuid4().hex[:8]
+        self._mic_buffer: Optional[bytearray] = None
+        self._mic_rate = WHISPER_SAMPLE_RATE
+        self._mic_decoder: Optional[StreamingDecoder] = None
+        self._mic_decoding: Optional[asyncio.Future] = None
+        self._mic_turn: Optional[Turn] = None
+        self._turns: set[asyncio.Task] = set()
+
+    async def run(self):
+        try:
+            while True:
+                message = await self.websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                data = message.get("bytes") if message.get("bytes") is not None else message.get("text")
+                if data is None:
+                    continue
+                try:
+                    frame = decode(data)
+                except ProtocolError as e:
+                    await self.send(control_frame("error", detail=str(e)))
+                    continue
+                await self.handle_frame(frame)
+        finally:
+            self._drop_mic_decoder()
+            for task in self._turns:
+                task.cancel()
+
+    async def send(self, frame: UnityFrame, tag: Optional[str] = None):
+        await self.ws_manager.send_frame(self.websocket, frame, critical=True, tag=tag)
+
+    async def handle_frame(self, frame: UnityFrame):
+        if frame.kind == AUDIO:
+            self._append_mic_audio(frame.payload)
+        elif frame.kind == CONTROL:
+            await self.handle_control(frame)
+        elif frame.kind == EVENT:
+            await self.handle_event(frame)
+        else:
+            await self.send(control_frame("error", detail=f"Unsupported frame kind {frame.kind}."))
+
+    async def handle_control(self, frame: UnityFrame):
+        control = frame.type
+        if control == "hello":
+            await self.send(control_frame(
+                "welcome",
+                session_id=self.session_id,
+                tts_sample_rate=self.services.tts_service.sample_rate,
+                mic_sample_rate=WHISPER_SAMPLE_RATE,
+                mic_encodings=accepted_mic_encodings()
+            ))
+        elif control == "ping":
+            await self.send(control_frame("pong", t=frame.header.get("t")))
+        elif control == "mic_start":
+            encoding = str(frame.header.get("encoding", "pcm_s16le"))
+            if encoding not in accepted_mic_encodings():
+                await self.send(control_frame("error", detail=f"Unsupported mic encoding '{encoding}'.", mic_encodings=accepted_mic_encodings()))
+                return
+            self._drop_mic_decoder()
+            self._mic_rate = int(frame.header.get("sample_rate", WHISPER_SAMPLE_RATE))
+            self._mic_buffer = bytearray()
+            if encoding in MIC_ENCODINGS:
+                self._mic_decoder = StreamingDecoder(MIC_ENCODINGS[encoding])
+                self._mic_decoding = self._mic_decoder.start()
+            # The streamer talking again stops Penny everywhere, not just on this connection
+            self.services.turns.barge_in("push-to-talk")
+            self._mic_turn = self.services.turns.start(f"unity:{self.session_id}:mic", scope=self.session_id)
+            with use_turn(self._mic_turn):
+                await self.event_bus.publish(PTTRecordingStateEvent(is_recording=True))
+        elif control == "mic_end":
+            await self.event_bus.publish(PTTRecordingStateEvent(is_recording=False))
+            audio, self._mic_buffer = self._mic_buffer, None
+            turn, self._mic_turn = self._mic_turn, None
+            turn = turn or self.services.turns.start(f"unity:{self.session_id}:mic", scope=self.session_id)
+            if self._mic_decoder:
+                self._mic_decoder.close()
+                decoding, self._mic_decoder, self._mic_decoding = self._mic_decoding, None, None
+                self._start_turn(turn, self._decoded_voice_turn(decoding))
+            elif audio:
+                self._start_turn(turn, self._voice_turn(bytes(audio), self._mic_rate))
+        else:
+            await self.send(control_frame("error", detail=f"Unknown control '{control}'."))
+
+    async def handle_event(self, frame: UnityFrame):
+        event_type = frame.type
+        header = frame.header
+        if event_type == "command":
+            text = str(header.get("text", "")).strip()
+            if text:
+                self._start_turn(self.services.turns.start(f"unity:{self.session_id}:command", scope=self.session_id), self._text_turn(text))
+        elif event_type == "speak":
+            await self.event_bus.publish(SpeakRequestEvent(text=str(header.get("text", ""))))
+        elif event_type == "search":
+            await self.event_bus.publish(SearchRequestEvent(query=str(header.get("query", "")), source="unity"))
+        elif event_type == "vision":
+            await self.event_bus.publish(VisionSummaryEvent(summary=str(header.get("summary", ""))))
+        else:
+            await self.send(control_frame("error", detail=f"Unknown event '{event_type}'."))
+
+    def _append_mic_audio(self, pcm: bytes):
+        if self._mic_buffer is None:
+            # Audio without mic_start: treat it as the start of a turn at the default rate
+            self._mic_buffer = bytearray()
+        received = self._mic_decoder.bytes_in if self._mic_decoder else len(self._mic_buffer)
+        # Compressed audio is held to the raw PCM budget too, which is far more than it needs
+        if received + len(pcm) > MAX_MIC_SECONDS * self._mic_rate * 2:
+            logger.warning(f"[UnitySession {self.session_id}] Mic turn exceeded {MAX_MIC_SECONDS}s, ignoring extra audio.")
+            return
+        if self._mic_decoder:
+            self._mic_decoder.feed(pcm)
+        else:
+            self._mic_buffer.extend(pcm)
+
+    def _drop_mic_decoder(self):
+        if self._mic_decoder:
+            self._mic_decoder.abort()
+            self._mic_decoding.add_done_callback(lambda f: f.cancelled() or f.exception())  # Aborted decodes fail quietly
+            self._mic_decoder = self._mic_decoding = None
+
+    def _start_turn(self, turn: Turn, coro):
+        if turn.cancelled:
+            coro.close()  # Superseded before it could start
+            return
+        task = turn.run(self._run_turn(turn, coro))
+        self._turns.add(task)
+        task.add_done_callback(self._turns.discard)
+
+    async def _run_turn(self, turn: Turn, coro):
+        try:
+            await coro
+        except asyncio.CancelledError:
+            if turn.cancelled:
+                await self.send(control_frame("cancel", turn_id=turn.turn_id, reason=turn.reason))
+            raise
+
+    async def _voice_turn(self, pcm: bytes, sample_rate: int):
+        samples = pcm16_to_float(pcm)
+        if sample_rate != WHISPER_SAMPLE_RATE:
+            # Up to a minute of audio; resampled on the loop it would stall every other socket
+            samples = await asyncio.to_thread(resample_poly, samples, *rational_ratio(WHISPER_SAMPLE_RATE / sample_rate))
+        await self._transcribe_turn(samples)
+
+    async def _transcribe_turn(self, samples):
+        turn_id = current_turn().turn_id
+        try:
+            text = await self.services.voice_pipeline.transcribe(samples, source=f"unity:{self.session_id}")
+            await self.send(event_frame("transcript", turn_id=turn_id, text=text))
+            if text:
+                await self._reply(turn_id, text)
+        except Exception as e:
+            logger.error(f"[UnitySession {self.session_id}] Voice turn failed: {e}", exc_info=True)
+            await self.send(control_frame("error", turn_id=turn_id, detail="Voice turn failed."))
+
+    async def _decoded_voice_turn(self, decoding: asyncio.Future):
+        try:
+            samples = await decoding
+        except AudioDecodeError as e:
+            logger.warning(f"[UnitySession {self.session_id}] {e}")
+            await self.send(control_frame("error", detail=str(e)))
+            return
+        if len(samples):
+            await self._transcribe_turn(samples)
+
+    async def _text_turn(self, text: str):
+        turn_id = current_turn().turn_id
+        try:
+            await self._reply(turn_id, text)
+        except Exception as e:
+            logger.error(f"[UnitySession {self.session_id}] Command turn failed: {e}", exc_info=True)
+            await self.send(control_frame("error", turn_id=turn_id, detail="Command failed."))
+
+    async def _reply(self, turn_id: str, text: str):
+        reply = await self.services.voice_pipeline.reply(text)
+        if not reply:
+            await self.send(control_frame("error", turn_id=turn_id, detail="LLM did not generate a valid reply."))
+            return
+
+        tts = self.services.tts_service
+        utterance_id = uuid.uuid4().hex
+        current_turn().utterances.add(utterance_id)
+        await self.send(event_frame("reply", turn_id=turn_id, text=reply, utterance_id=utterance_id))
+        seq = 0
+        async with aclosing(tts.stream_and_store(reply, utterance_id)) as audio:
+            async for pcm in audio:
+                await self.send(audio_frame(utterance_id, seq, tts.sample_rate, pcm), tag=utterance_id)
+                seq += 1
+        await self.send(audio_frame(utterance_id, seq, tts.sample_rate, b"", final=True), tag=utterance_id)
@@ -0,0 +1,33 @@
+# app/services/voice_pipeline.py
+
+import logging
+from typing import Union
+
+import numpy as np
+
+from app.services.context_manager import ContextManager
+from app.services.streaming_openai_service import StreamingOpenAIService
+from app.services.transcribe_service import TranscribeService
+
+logger = logging.getLogger(__name__)
+
+class VoicePipeline:
+    """One conversational turn: transcribe what the streamer said and get Penny's reply."""
+
+    def __init__(self, transcribe_service: TranscribeService, llm_service: StreamingOpenAIService, context_manager: ContextManager):
+        self.transcribe_service = transcribe_service
+        self.llm_service = llm_service
+        self.context_manager = context_manager
+
+    async def transcribe(self, audio: Union[bytes, np.ndarray], source: str = "unknown") -> str:
+        # reply() asks the LLM itself, so the transcript must not also go out as an AIQueryEvent
+        return await self.transcribe_service.transcribe_and_publish(audio, source=source, query_llm=False)
+
+    async def reply(self, text: str) -> str:
+        """Returns Penny's reply to `text`, or an empty string if the LLM produced nothing usable."""
+        prompt = self.context_manager.build_prompt_from_transcription(text)
+        reply = await self.llm_service.get_response(prompt)
+        reply = reply.strip() if reply else ""
+        if reply and not reply.startswith("[ERROR]"):
+            self.context_manager.update_chat(text, reply)
+        return reply
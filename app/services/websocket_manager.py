@@ -1,23 +1,264 @@
-from typing import List
+import asyncio
+import itertools
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Union
 from fastapi import WebSocket
 
+from app.core.unity_protocol import PROTOCOL_JSON, PROTOCOLS, UnityFrame, encode
+
+logger = logging.getLogger(__name__)
+
+# Slow-consumer policies, applied when a client's outbound queue is full
+DROP_OLDEST = "drop_oldest"
+DROP_NONCRITICAL = "drop_noncritical"
+DISCONNECT = "disconnect"
+POLICIES = {DROP_OLDEST, DROP_NONCRITICAL, DISCONNECT}
+
+@dataclass
+class OutboundMessage:
+    data: Union[str, bytes]
+    critical: bool = False
+    enqueued_at: float = field(default_factory=time.perf_counter)
+    tag: Optional[str] = None  # Groups frames that can be discarded together, e.g. one utterance's audio
+
+class ClientConnection:
+    """One websocket with its own bounded outbound queue, drained by a dedicated sender task."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, websocket: WebSocket, max_queue: int, policy: str, send_timeout: float, protocol: str = PROTOCOL_JSON):
+        self.id = next(self._ids)
+        self.websocket = websocket
+        self.protocol = protocol
+        self.max_queue = max_queue
+        self.policy = policy
+        self.send_timeout = send_timeout
+        self.connected_at = time.time()
+        self.closed = False
+        self._queue: Deque[OutboundMessage] = deque()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        self.sent = 0
+        self.dropped = 0
+        self.last_send_ms = 0.0
+        self.avg_send_ms = 0.0  # EWMA of enqueue-to-sent latency
+        self.max_send_ms = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def start(self, on_dead) -> None:
+        self._task = asyncio.create_task(self._sender(on_dead))
+
+    def offer(self, message: OutboundMessage) -> bool:
+        """Queues a message; returns False if the client should be disconnected instead."""
+        if self.closed:
+            return True
+        if len(self._queue) >= self.max_queue:
+            if self.policy == DISCONNECT:
+                return False
+            if self.policy == DROP_NONCRITICAL:
+                if not message.critical:
+                    self.dropped += 1
+                    return True
+                if not self._drop_first_noncritical():
+                    return False  # Only critical frames queued: losing one is worse than reconnecting
+            else:
+                self._queue.popleft()
+                self.dropped += 1
+        self._queue.append(message)
+        self._wakeup.set()
+        return True
+
+    def discard(self, tag: str) -> int:
+        """Removes queued messages carrying `tag` that haven't been sent yet; returns how many."""
+        kept = deque(message for message in self._queue if message.tag != tag)
+        discarded = len(self._queue) - len(kept)
+        self._queue = kept
+        return discarded
+
+    def _drop_first_noncritical(self) -> bool:
+        for i, queued in enumerate(self._queue):
+            if not queued.critical:
+                del self._queue[i]
+                self.dropped += 1
+                return True
+        return False
+
+    async def _sender(self, on_dead) -> None:
+        try:
+            while True:
+                if not self._queue:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+                message = self._queue.popleft()
+                await self._send_with_deadline(message.data)
+                self._record_latency((time.perf_counter() - message.enqueued_at) * 1000)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"[WS] Client {self.id} send failed ({type(e).__name__}: {e}), dropping connection.")
+            await on_dead(self)
+
+    async def _send_with_deadline(self, data: Union[str, bytes]) -> None:
+        # A timer handle instead of asyncio.wait_for, which would spawn a task per message
+        timed_out = False
+
+        def expire():
+            nonlocal timed_out
+            timed_out = True
+            self._task.cancel()
+
+        handle = asyncio.get_running_loop().call_later(self.send_timeout, expire)
+        try:
+            if isinstance(data, bytes):
+                await self.websocket.send_bytes(data)
+            else:
+                await self.websocket.send_text(data)
+        except asyncio.CancelledError:
+            if timed_out:
+                raise TimeoutError(f"send blocked for more than {self.send_timeout}s")
+            raise
+        finally:
+            handle.cancel()
+
+    def _record_latency(self, ms: float) -> None:
+        self.sent += 1
+        self.last_send_ms = ms
+        self.max_send_ms = max(self.max_send_ms, ms)
+        self.avg_send_ms = ms if self.sent == 1 else self.avg_send_ms * 0.9 + ms * 0.1
+
+    async def close(self, code: int = 1000) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self._queue.clear()
+        if self._task and self._task is not asyncio.current_task():
+            self._task.cancel()
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
+
+    def stats(self) -> dict:
+        return {
+            "id": self.id,
+            "protocol": self.protocol,
+            "queue_depth": self.queue_depth,
+            "max_queue": self.max_queue,
+            "policy": self.policy,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "last_send_ms": round(self.last_send_ms, 2),
+            "avg_send_ms": round(self.avg_send_ms, 2),
+            "max_send_ms": round(self.max_send_ms, 2),
+            "connected_for_s": round(time.time() - self.connected_at, 1),
+        }
+
 class WebSocketManager:
-    def __init__(self):
-        self.active_connections: list[WebSocket] = []
+    """
+    Fans messages out to Unity/overlay clients. broadcast() only enqueues, so one
+    slow or dead client never delays the others; each client's sender task drains
+    its own queue and slow consumers are handled by the configured policy.
+    """
 
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
-        print("[WS] Unity connected.")
+    def __init__(self, max_queue: int = 256, policy: str = DROP_NONCRITICAL, send_timeout: float = 5.0):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown slow-consumer policy: {policy}")
+        self.max_queue = max_queue
+        self.policy = policy
+        self.send_timeout = send_timeout
+        self._clients: Dict[WebSocket, ClientConnection] = {}
+
+    @property
+    def active_connections(self) -> List[WebSocket]:
+        return list(self._clients)
+
+    async def connect(self, websocket: WebSocket, protocol: str = PROTOCOL_JSON, subprotocol: Optional[str] = None) -> ClientConnection:
+        await websocket.accept(subprotocol=subprotocol)
+        return self.register(websocket, protocol)
+
+    def register(self, websocket: WebSocket, protocol: str = PROTOCOL_JSON) -> ClientConnection:
+        """Tracks an already-accepted websocket."""
+        if protocol not in PROTOCOLS:
+            raise ValueError(f"Unknown Unity protocol: {protocol}")
+        client = ClientConnection(websocket, self.max_queue, self.policy, self.send_timeout, protocol)
+        self._clients[websocket] = client
+        client.start(self._drop_client)
+        logger.info(f"[WS] Unity connected (client {client.id}, {protocol}, {len(self._clients)} total).")
+        return client
 
     async def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
-            print("[WS] Unity disconnected.")
-
-    async def broadcast(self, message: str):
-        for conn in self.active_connections:
-            try:
-                await conn.send_text(message)
-            except:
-                print("[WS] Failed to send message to Unity.")
+        client = self._clients.pop(websocket, None)
+        if client:
+            await client.close()
+            logger.info(f"[WS] Unity disconnected (client {client.id}).")
+
+    async def _drop_client(self, client: ClientConnection):
+        if self._clients.get(client.websocket) is client:
+            del self._clients[client.websocket]
+        await client.close(code=1011)
+
+    async def broadcast(self, message: Union[str, bytes], critical: bool = False):
+        overflowed = []
+        for client in self._clients.values():
+            if not client.offer(OutboundMessage(message, critical)):
+                overflowed.append(client)
+        for client in overflowed:
+            logger.warning(f"[WS] Client {client.id} queue full, disconnecting slow consumer.")
+            await self._drop_client(client)
+
+    async def broadcast_frame(self, frame: UnityFrame, critical: bool = False, tag: Optional[str] = None):
+        """Encodes a frame once per protocol in use and queues it for every client."""
+        encoded: Dict[str, Union[str, bytes]] = {}
+        overflowed = []
+        for client in self._clients.values():
+            data = encoded.get(client.protocol)
+            if data is None:
+                data = encoded[client.protocol] = encode(frame, client.protocol)
+            if not client.offer(OutboundMessage(data, critical, tag=tag)):
+                overflowed.append(client)
+        for client in overflowed:
+            logger.warning(f"[WS] Client {client.id} queue full, disconnecting slow consumer.")
+            await self._drop_client(client)
+
+    async def send_frame(self, websocket: WebSocket, frame: UnityFrame, critical: bool = True, tag: Optional[str] = None):
+        client = self._clients.get(websocket)
+        if client:
+            await self.send(websocket, encode(frame, client.protocol), critical, tag)
+
+    async def send(self, websocket: WebSocket, message: Union[str, bytes], critical: bool = True, tag: Optional[str] = None):
+        """Queues a message for a single client."""
+        client = self._clients.get(websocket)
+        if client and not client.offer(OutboundMessage(message, critical, tag=tag)):
+            logger.warning(f"[WS] Client {client.id} queue full, disconnecting slow consumer.")
+            await self._drop_client(client)
+
+    def discard_queued(self, tag: str, websocket: Optional[WebSocket] = None) -> int:
+        """Drops not-yet-sent messages tagged `tag` for one client, or for all of them."""
+        if websocket is None:
+            return sum(client.discard(tag) for client in self._clients.values())
+        client = self._clients.get(websocket)
+        return client.discard(tag) if client else 0
+
+    def stats(self) -> List[dict]:
+        return [client.stats() for client in self._clients.values()]
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            from app.core.config import settings
+            cls._instance = cls(
+                max_queue=settings.WS_MAX_QUEUE,
+                policy=settings.WS_SLOW_CONSUMER_POLICY,
+                send_timeout=settings.WS_SEND_TIMEOUT_SECONDS,
+            )
+        return cls._instance
@@ -0,0 +1,169 @@
+"""
+Decoding of compressed audio uploads (Ogg/Opus, WebM/Opus, FLAC) into the 16 kHz
+mono float32 that Whisper takes. Decoding runs in-process with PyAV, the FFmpeg
+binding faster-whisper already depends on, so there is no ffmpeg subprocess per
+request. Bytes are decoded as they arrive instead of after the whole upload.
+WAV is passed through untouched; faster-whisper reads it directly.
+"""
+import asyncio
+import logging
+import os
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import AsyncIterator, Optional, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DECODE_SAMPLE_RATE = 16000
+DECODE_WORKERS = 4
+
+# A decode holds its thread for as long as the stream lasts (up to a minute of mic
+# audio), so decodes get a pool of their own rather than the loop's default executor
+_decode_executor = ThreadPoolExecutor(max_workers=DECODE_WORKERS, thread_name_prefix="audio-decode")
+
+# Media type -> PyAV demuxer
+COMPRESSED_FORMATS = {
+    "audio/ogg": "ogg",
+    "audio/opus": "ogg",
+    "application/ogg": "ogg",
+    "audio/webm": "matroska",
+    "audio/flac": "flac",
+    "audio/x-flac": "flac",
+}
+PASSTHROUGH_FORMATS = ("audio/wav", "audio/x-wav", "audio/wave", "audio/vnd.wave")
+
+# Used when a multipart file part only says application/octet-stream
+EXTENSION_TYPES = {
+    ".wav": "audio/wav",
+    ".ogg": "audio/ogg",
+    ".oga": "audio/ogg",
+    ".opus": "audio/ogg",
+    ".webm": "audio/webm",
+    ".flac": "audio/flac",
+}
+
+# /ws/unity mic_start "encoding" -> PyAV demuxer; pcm_s16le needs no decoder
+MIC_ENCODINGS = {"opus": "ogg", "flac": "flac"}
+
+class AudioDecodeError(ValueError):
+    pass
+
+@lru_cache(maxsize=1)
+def decoder_available() -> bool:
+    try:
+        import av  # noqa: F401
+        return True
+    except ImportError:
+        logger.warning("[AudioDecode] PyAV is not installed; only WAV and raw PCM uploads are accepted.")
+        return False
+
+def accepted_media_types() -> list[str]:
+    return [*PASSTHROUGH_FORMATS, *(COMPRESSED_FORMATS if decoder_available() else ())]
+
+def accepted_mic_encodings() -> list[str]:
+    return ["pcm_s16le", *(MIC_ENCODINGS if decoder_available() else ())]
+
+def media_type(content_type: Optional[str], filename: Optional[str] = None) -> str:
+    """The declared type without parameters, or the file extension's type when the declared one is generic."""
+    declared = (content_type or "").split(";", 1)[0].strip().lower()
+    if declared and declared != "application/octet-stream":
+        return declared
+    extension = os.path.splitext(filename or "")[1].lower()
+    return EXTENSION_TYPES.get(extension, declared or "audio/wav")
+
+class StreamingDecoder:
+    """
+    Decodes one compressed stream while it is still arriving. The event loop feed()s
+    chunks and close()s at the end of input; run(), in a worker thread, demuxes,
+    decodes and resamples to mono float32 at `rate`, reading through a blocking
+    file-like view of the fed chunks.
+    """
+
+    def __init__(self, container_format: str, rate: int = DECODE_SAMPLE_RATE):
+        self.container_format = container_format
+        self.rate = rate
+        self.bytes_in = 0
+        self._chunks: "queue.SimpleQueue[Optional[bytes]]" = queue.SimpleQueue()
+        self._pending = bytearray()
+        self._eof = False
+        self._aborted = False
+
+    def feed(self, data: bytes):
+        if data:
+            self.bytes_in += len(data)
+            self._chunks.put(bytes(data))
+
+    def close(self):
+        self._chunks.put(None)
+
+    def abort(self):
+        """Makes run() stop at its next read, e.g. when the client went away."""
+        self._aborted = True
+        self._chunks.put(None)
+
+    def read(self, size: int = -1) -> bytes:
+        # Called by PyAV from the decoding thread; blocks until data is fed or input ends.
+        # Short reads are fine, PyAV simply asks again.
+        while not self._eof and (size < 0 or not self._pending):
+            chunk = self._chunks.get()
+            if chunk is None:
+                self._eof = True
+            else:
+                self._pending += chunk
+        if self._aborted:
+            return b""
+        size = len(self._pending) if size < 0 else min(size, len(self._pending))
+        data = bytes(self._pending[:size])
+        del self._pending[:size]
+        return data
+
+    def start(self) -> asyncio.Future:
+        """Runs run() on the decode pool; streams beyond DECODE_WORKERS wait their turn, buffered."""
+        return asyncio.get_running_loop().run_in_executor(_decode_executor, self.run)
+
+    def run(self) -> np.ndarray:
+        import av
+
+        parts = []
+        try:
+            with av.open(self, mode="r", format=self.container_format) as container:
+                if not container.streams.audio:
+                    raise AudioDecodeError("Upload has no audio stream.")
+                resampler = av.AudioResampler(format="flt", layout="mono", rate=self.rate)
+                for frame in container.decode(audio=0):
+                    for out in resampler.resample(frame):
+                        parts.append(out.to_ndarray().reshape(-1))
+                for out in resampler.resample(None):
+                    parts.append(out.to_ndarray().reshape(-1))
+        except av.error.FFmpegError as e:
+            raise AudioDecodeError(f"Could not decode {self.container_format} audio: {e}") from e
+        return np.concatenate(parts).astype(np.float32, copy=False) if parts else np.zeros(0, dtype=np.float32)
+
+    async def decode(self, chunks: AsyncIterator[bytes]) -> np.ndarray:
+        """Feeds `chunks` while decoding them on the decode pool; returns the samples."""
+        decoding = self.start()
+        try:
+            async for chunk in chunks:
+                if decoding.done():
+                    break  # Decoder failed or finished early; its result says which
+                self.feed(chunk)
+        except BaseException:
+            self.abort()
+            await asyncio.gather(decoding, return_exceptions=True)
+            raise
+        finally:
+            self.close()
+        return await decoding
+
+async def read_upload(chunks: AsyncIterator[bytes], upload_type: str) -> Union[bytes, np.ndarray]:
+    """
+    Returns WAV uploads as bytes for faster-whisper to read itself, and decodes
+    compressed ones into 16 kHz float32 samples as their chunks arrive.
+    """
+    container_format = COMPRESSED_FORMATS.get(upload_type)
+    if container_format is None:
+        return b"".join([chunk async for chunk in chunks])
+    return await StreamingDecoder(container_format).decode(chunks)
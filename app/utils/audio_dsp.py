@@ -0,0 +1,283 @@
+import json
+import logging
+import math
+import os
+from fractions import Fraction
+from typing import Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PIPER_SAMPLE_RATE = 22050
+INT16_SCALE = 32768.0
+
+
+def read_piper_sample_rate(voice_model_path: str, default: int = DEFAULT_PIPER_SAMPLE_RATE) -> int:
+    """Reads the voice sample rate from Piper's `<model>.onnx.json` config."""
+    config_path = f"{voice_model_path}.json"
+    try:
+        with open(config_path, "r", encoding="utf-8") as f:
+            return int(json.load(f).get("audio", {}).get("sample_rate", default))
+    except (OSError, ValueError, TypeError) as e:
+        if os.path.exists(config_path):
+            logger.warning(f"[AudioDSP] Could not read sample rate from {config_path}: {e}")
+        return default
+
+
+def pcm16_to_float(pcm: bytes) -> np.ndarray:
+    """Converts little-endian mono int16 PCM into float32 samples in [-1, 1)."""
+    return np.frombuffer(pcm, dtype="<i2").astype(np.float32) / INT16_SCALE
+
+
+def float_to_pcm16(samples: np.ndarray) -> bytes:
+    """Converts float samples back into little-endian int16 PCM with clipping."""
+    scaled = np.clip(samples * INT16_SCALE, -INT16_SCALE, INT16_SCALE - 1)
+    return scaled.astype("<i2").tobytes()
+
+
+def wav_header(sample_rate: int, data_bytes: Optional[int] = None, channels: int = 1, sample_width: int = 2) -> bytes:
+    """
+    Canonical 44-byte PCM WAV header. When `data_bytes` is None the sizes are set to
+    0xFFFFFFFF, which players treat as "read until EOF" for streamed responses.
+    """
+    data_size = 0xFFFFFFFF if data_bytes is None else data_bytes
+    riff_size = 0xFFFFFFFF if data_bytes is None else 36 + data_bytes
+    byte_rate = sample_rate * channels * sample_width
+    return b"".join((
+        b"RIFF", riff_size.to_bytes(4, "little"), b"WAVE",
+        b"fmt ", (16).to_bytes(4, "little"), (1).to_bytes(2, "little"), channels.to_bytes(2, "little"),
+        sample_rate.to_bytes(4, "little"), byte_rate.to_bytes(4, "little"),
+        (channels * sample_width).to_bytes(2, "little"), (sample_width * 8).to_bytes(2, "little"),
+        b"data", data_size.to_bytes(4, "little"),
+    ))
+
+
+def db_to_gain(db: float) -> float:
+    return float(10.0 ** (db / 20.0))
+
+
+def rational_ratio(ratio: float, max_denominator: int = 256) -> Tuple[int, int]:
+    """Approximates a resampling ratio as a reduced (up, down) pair."""
+    frac = Fraction(ratio).limit_denominator(max_denominator)
+    return frac.numerator, frac.denominator
+
+
+def design_lowpass(up: int, down: int, half_width: int = 10, beta: float = 5.0) -> np.ndarray:
+    """Kaiser-windowed sinc anti-aliasing filter for an up/down polyphase resampler."""
+    max_rate = max(up, down)
+    cutoff = 1.0 / max_rate
+    half_len = half_width * max_rate
+    n = np.arange(-half_len, half_len + 1, dtype=np.float64)
+    taps = cutoff * np.sinc(cutoff * n) * np.kaiser(2 * half_len + 1, beta)
+    return (taps * up).astype(np.float32)
+
+
+class PolyphaseResampler:
+    """
+    Streaming rational resampler (upsample by `up`, filter, downsample by `down`).
+    Only the output samples that are actually needed are computed, one polyphase
+    sub-filter per output, so the cost is O(outputs * taps_per_phase).
+    """
+
+    def __init__(self, up: int, down: int):
+        g = math.gcd(up, down)
+        self.up = up // g
+        self.down = down // g
+        taps = design_lowpass(self.up, self.down)
+        self._delay = (len(taps) - 1) // 2
+        self._taps_per_phase = -(-len(taps) // self.up)
+        padded = np.zeros(self._taps_per_phase * self.up, dtype=np.float32)
+        padded[:len(taps)] = taps
+        # bank[p, j] = h[p + j * up]
+        bank = padded.reshape(self._taps_per_phase, self.up).T
+        # Reversed so a window of ascending input samples lines up with h[p + j*up], j descending
+        self._bank_rev = np.ascontiguousarray(bank[:, ::-1])
+        self._buf = np.zeros(self._taps_per_phase - 1, dtype=np.float32)
+        self._buf_start = -(self._taps_per_phase - 1)  # absolute index of self._buf[0]
+        self._received = 0
+        self._next_out = 0
+
+    def _base_of(self, n: np.ndarray) -> np.ndarray:
+        return (n * self.down + self._delay) // self.up
+
+    def _render(self, n0: int, n1: int) -> np.ndarray:
+        # Outputs n, n + up, n + 2*up, ... share a polyphase sub-filter and their input
+        # windows advance by exactly `down`, so each residue class is one strided mat-vec.
+        count = n1 - n0
+        out = np.empty(max(count, 0), dtype=np.float32)
+        k = self._taps_per_phase
+        stride = self._buf.strides[0]
+        for r in range(min(self.up, count)):
+            n = n0 + r
+            t = n * self.down + self._delay
+            rows = -(-(count - r) // self.up)
+            first = t // self.up - self._buf_start - (k - 1)
+            windows = as_strided(self._buf[first:], shape=(rows, k), strides=(self.down * stride, stride), writeable=False)
+            out[r::self.up] = windows @ self._bank_rev[t % self.up]
+        return out
+
+    def process(self, samples: np.ndarray, final: bool = False) -> np.ndarray:
+        """Feeds a block of float32 samples and returns every output sample now computable."""
+        if len(samples):
+            self._buf = np.concatenate((self._buf, samples.astype(np.float32, copy=False)))
+            self._received += len(samples)
+
+        if final:
+            end = -(-self._received * self.up // self.down)
+            last_base = int(self._base_of(np.int64(max(end - 1, 0))))
+            shortfall = last_base - (self._buf_start + len(self._buf)) + 1
+            if shortfall > 0:
+                self._buf = np.concatenate((self._buf, np.zeros(shortfall, dtype=np.float32)))
+        else:
+            # Largest n with base(n) <= received - 1
+            end = (self._received * self.up - 1 - self._delay) // self.down + 1
+
+        out = self._render(self._next_out, end) if end > self._next_out else np.zeros(0, dtype=np.float32)
+        self._next_out = max(self._next_out, end)
+
+        keep_from = int(self._base_of(np.int64(self._next_out))) - (self._taps_per_phase - 1)
+        drop = min(max(keep_from - self._buf_start, 0), len(self._buf))
+        if drop:
+            self._buf = self._buf[drop:]
+            self._buf_start += drop
+        return out
+
+
+def resample_poly(samples: np.ndarray, up: int, down: int) -> np.ndarray:
+    """One-shot polyphase resample of a whole buffer."""
+    if up == down:
+        return samples.astype(np.float32, copy=False)
+    return PolyphaseResampler(up, down).process(samples, final=True)
+
+
+def normalize_loudness(samples: np.ndarray, target_dbfs: float, peak_ceiling_dbfs: float = -1.0) -> np.ndarray:
+    """RMS loudness normalization towards `target_dbfs`, limited so peaks stay under the ceiling."""
+    if not len(samples):
+        return samples
+    rms = float(np.sqrt(np.mean(np.square(samples, dtype=np.float64))))
+    peak = float(np.max(np.abs(samples)))
+    if rms <= 1e-9 or peak <= 1e-9:
+        return samples
+    gain = db_to_gain(target_dbfs) / rms
+    gain = min(gain, db_to_gain(peak_ceiling_dbfs) / peak)
+    return samples * np.float32(gain)
+
+
+class VoiceProcessor:
+    """
+    In-memory post-processing chain for Piper's raw PCM output.
+
+    Speed and pitch are varispeed changes (the same "play it at a different
+    frame rate" effect the pydub path produced), folded into a single polyphase
+    resample to `output_rate`, followed by gain and optional loudness normalization.
+    """
+
+    def __init__(
+        self,
+        input_rate: int,
+        output_rate: int = 44100,
+        speed: float = 1.0,
+        pitch_semitones: float = 0.0,
+        gain_db: float = 0.0,
+        normalize_dbfs: Optional[float] = None,
+    ):
+        self.input_rate = input_rate
+        self.speed = speed
+        self.pitch_semitones = pitch_semitones
+        self.resamples = speed != 1.0 or pitch_semitones != 0.0
+        self.output_rate = output_rate if self.resamples else input_rate
+        self.gain = db_to_gain(gain_db)
+        self.normalize_dbfs = normalize_dbfs
+
+        pitch_factor = 2.0 ** (pitch_semitones / 12.0)
+        self.up, self.down = rational_ratio(self.output_rate / (input_rate * speed * pitch_factor))
+
+    def process(self, pcm: bytes) -> np.ndarray:
+        """Processes a complete utterance and returns float32 samples at `output_rate`."""
+        samples = pcm16_to_float(pcm)
+        if self.resamples:
+            samples = resample_poly(samples, self.up, self.down)
+        if self.gain != 1.0:
+            samples = samples * np.float32(self.gain)
+        if self.normalize_dbfs is not None:
+            samples = normalize_loudness(samples, self.normalize_dbfs)
+        return samples
+
+    def process_pcm(self, pcm: bytes) -> bytes:
+        return float_to_pcm16(self.process(pcm))
+
+    def stream(self) -> "VoiceStream":
+        return VoiceStream(self)
+
+
+class VoiceStream:
+    """
+    Incremental form of VoiceProcessor for PCM that arrives in arbitrary byte chunks.
+    Loudness normalization needs the whole utterance, so streams only apply fixed gain.
+    """
+
+    def __init__(self, processor: VoiceProcessor):
+        self.processor = processor
+        self._resampler = PolyphaseResampler(processor.up, processor.down) if processor.resamples else None
+        self._carry = b""
+
+    def _run(self, samples: np.ndarray, final: bool) -> bytes:
+        if self._resampler is not None:
+            samples = self._resampler.process(samples, final=final)
+        if self.processor.gain != 1.0:
+            samples = samples * np.float32(self.processor.gain)
+        return float_to_pcm16(samples) if len(samples) else b""
+
+    def feed(self, pcm: bytes) -> bytes:
+        data = self._carry + pcm
+        usable = len(data) - (len(data) % 2)  # never split an int16 sample
+        self._carry = data[usable:]
+        if not usable:
+            return b""
+        return self._run(pcm16_to_float(data[:usable]), final=False)
+
+    def flush(self) -> bytes:
+        self._carry = b""
+        return self._run(np.zeros(0, dtype=np.float32), final=True)
+
+
+def rms_envelope(samples: np.ndarray, frame_len: int, floor_db: float = -50.0, ceiling_db: float = -12.0) -> np.ndarray:
+    """
+    Per-frame RMS of complete `frame_len` frames, mapped from dBFS onto 0-1 mouth
+    openness (floor_db -> 0, ceiling_db -> 1). Trailing partial frames are ignored.
+    """
+    frames = len(samples) // frame_len
+    if frames == 0:
+        return np.zeros(0, dtype=np.float32)
+    blocks = samples[:frames * frame_len].reshape(frames, frame_len)
+    rms = np.sqrt(np.einsum("ij,ij->i", blocks, blocks) / frame_len)
+    db = 20.0 * np.log10(np.maximum(rms, 1e-6))
+    return np.clip((db - floor_db) / (ceiling_db - floor_db), 0.0, 1.0).astype(np.float32)
+
+
+class EnvelopeTracker:
+    """Streams an RMS envelope over PCM chunks, keeping frame alignment and timestamps."""
+
+    def __init__(self, sample_rate: int, frame_ms: int = 15):
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.frame_len = max(1, sample_rate * frame_ms // 1000)
+        self._carry = np.zeros(0, dtype=np.float32)
+        self._frames_emitted = 0
+
+    @property
+    def position_ms(self) -> float:
+        return self._frames_emitted * self.frame_len * 1000.0 / self.sample_rate
+
+    def feed(self, pcm: bytes, final: bool = False) -> Tuple[float, np.ndarray]:
+        """Returns (start_ms, values) for every frame completed by this chunk."""
+        samples = np.concatenate((self._carry, pcm16_to_float(pcm))) if self._carry.size else pcm16_to_float(pcm)
+        if final and len(samples) % self.frame_len:
+            samples = np.concatenate((samples, np.zeros(self.frame_len - len(samples) % self.frame_len, dtype=np.float32)))
+        start_ms = self.position_ms
+        values = rms_envelope(samples, self.frame_len)
+        self._carry = samples[len(values) * self.frame_len:]
+        self._frames_emitted += len(values)
+        return start_ms, values
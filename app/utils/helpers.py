@@ -3,26 +3,35 @@ import logging
 from typing import Optional, List
 import os
 
+from app.utils.tts_text import EMOJI_PATTERN
+
 logger = logging.getLogger(__name__)
 
 def remove_emojis(text: str) -> str:
     if not text:
         return ""
-    emoji_pattern = regex.compile(
-        r'[\p{Emoji_Presentation}\p{Emoji}\p{Extended_Pictographic}]',
-        flags=regex.UNICODE
-    )
-    return emoji_pattern.sub(r'', text)
+    return EMOJI_PATTERN.sub(r'', text)
+
+SENTENCE_BOUNDARY = regex.compile(r'(?<=[.!?…]["\')\]]?)\s+')
+
+def split_sentences(text: str, min_chars: int = 0) -> List[str]:
+    """Splits text at sentence boundaries, merging pieces shorter than `min_chars` into the next one."""
+    sentences: List[str] = []
+    pending = ""
+    for part in SENTENCE_BOUNDARY.split(text.strip()):
+        pending = f"{pending} {part}" if pending else part
+        if len(pending) >= min_chars:
+            sentences.append(pending)
+            pending = ""
+    if pending:
+        if sentences and len(pending) < min_chars:
+            sentences[-1] = f"{sentences[-1]} {pending}"
+        else:
+            sentences.append(pending)
+    return sentences
+
+# "penny" somewhere in the message, and either a question-ish trigger or "penny" at the start
+PENNY_MENTION = regex.compile(r'^(?=.*penny)(?:penny|.*(?:\?|can|do you|think|hey))', flags=regex.IGNORECASE | regex.DOTALL)
 
 def should_respond_to_penny_mention(message: str) -> bool:
-    lowered = message.lower()
-    return (
-        "penny" in lowered and (
-            "?" in lowered or
-            "can" in lowered or
-            "do you" in lowered or
-            "think" in lowered or
-            "hey" in lowered or
-            lowered.startswith("penny")
-        )
-    )
\ No newline at end of file
+    return PENNY_MENTION.match(message) is not None
@@ -0,0 +1,209 @@
+import logging
+import re
+from functools import lru_cache
+from typing import Iterable, Optional
+
+import regex
+
+logger = logging.getLogger(__name__)
+
+# Pictographs plus the joiners/selectors/modifiers that glue sequences together. \p{Emoji}
+# alone also matches 0-9, '#' and '*', which is why numbers used to vanish from speech.
+EMOJI_PATTERN = regex.compile(
+    r'[\p{Extended_Pictographic}\p{Emoji_Presentation}\p{Emoji_Modifier}\p{Regional_Indicator}\u200d\ufe0e\ufe0f\u20e3]+'
+)
+# Only the rules that need Unicode properties use `regex`; the stdlib engine is faster for the rest
+URL_PATTERN = re.compile(r'\b(?:https?://|www\.)([^\s/?#]+)\S*', re.IGNORECASE)
+MENTION_PATTERN = re.compile(r'@(\w+)')
+SNAKE_PATTERN = re.compile(r'(?<=\w)_+(?=\w)')
+CAMEL_PATTERN = regex.compile(r'(?<=\p{Ll})(?=\p{Lu})|(?<=\p{L})(?=\d)|(?<=\d)(?=\p{L})')
+HASH_NUMBER_PATTERN = re.compile(r'#(?=\d)')
+MARKUP_PATTERN = re.compile(r'[*~`|]+')
+COLON_EMOTE_PATTERN = re.compile(r'(?<!\d):[a-z0-9_+-]+:', re.IGNORECASE)  # Not 1:23:45
+REPEATED_LETTERS = re.compile(r'([^\W\d_])\1{2,}')
+REPEATED_PUNCTUATION = re.compile(r'([!?.])\1+')
+WHITESPACE = re.compile(r'\s+')
+SPACE_BEFORE_PUNCTUATION = re.compile(r'\s+([,.!?])')
+DANGLING_PUNCTUATION = re.compile(r'([!?.])[,.]+')
+# Lowercase m is left alone: in chat "5m" is far more often minutes than millions
+NUMBER_PATTERN = re.compile(
+    r'(?P<currency>[$£€])?(?P<number>\d{1,3}(?:,\d{3})+|\d+)(?:\.(?P<decimal>\d+))?'
+    r'(?:(?P<ordinal>st|nd|rd|th)\b|(?P<percent>%)|(?P<suffix>[kKM])\b)?'
+)
+LETTER_DIGIT_PATTERN = re.compile(r'(?<=[^\W\d_])(?=\d)')  # "GTA5" -> "GTA 5", so the number isn't glued to the word
+TIME_PATTERN = re.compile(r'(?<![\d:])([01]?\d|2[0-3]):([0-5]\d)(?![\d:])(?:\s?([ap])\.?m\b\.?)?', re.IGNORECASE)  # 10:30, read "ten thirty"
+VERSION_PATTERN = re.compile(r'(?<![\d.])\d+(?:\.\d+){2,}(?!\.?\d)')  # 3.11.7, read "three point eleven point seven"
+
+DEFAULT_EMOTES = (
+    "Kappa", "KappaPride", "Keepo", "PogChamp", "Pog", "POGGERS", "PogU", "LUL", "LULW", "OMEGALUL", "KEKW",
+    "monkaS", "monkaW", "Sadge", "PepeHands", "FeelsBadMan", "FeelsGoodMan", "FeelsStrongMan", "BibleThump",
+    "ResidentSleeper", "NotLikeThis", "Kreygasm", "TriHard", "4Head", "catJAM", "PepeLaugh",
+    "WutFace", "SeemsGood", "VoHiYo", "CoolCat", "DansGame", "SwiftRage", "HeyGuys", "CoolStoryBob", "HYPERS",
+    "widepeepoHappy", "peepoHappy", "Copium", "xdd", "ICANT", "Kappu", "GIGACHAD",
+)  # No emotes that are also English words (Aware, Clueless, Clap, EZ); add those per channel via TTS_EXTRA_EMOTES
+
+ABBREVIATIONS = {
+    "gg": "good game", "ggs": "good games", "brb": "be right back", "afk": "away from keyboard",
+    "imo": "in my opinion", "imho": "in my humble opinion", "tbh": "to be honest", "idk": "I don't know",
+    "btw": "by the way", "omg": "oh my god", "pls": "please", "plz": "please", "thx": "thanks", "ty": "thank you",
+    "np": "no problem", "irl": "in real life", "ngl": "not gonna lie", "smh": "shaking my head",
+    "w/": "with", "w/o": "without", "vs": "versus", "vs.": "versus", "etc.": "et cetera",
+    "e.g.": "for example", "i.e.": "that is", "dr.": "doctor", "mr.": "mister", "mrs.": "missus",
+    "approx.": "approximately", "mins": "minutes", "hrs": "hours",
+    "fps": "F P S", "ai": "A I", "pc": "P C", "gpu": "G P U", "cpu": "C P U",
+}
+
+ONES = ["zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten", "eleven",
+        "twelve", "thirteen", "fourteen", "fifteen", "sixteen", "seventeen", "eighteen", "nineteen"]
+TENS = ["", "", "twenty", "thirty", "forty", "fifty", "sixty", "seventy", "eighty", "ninety"]
+SCALES = [(10**12, "trillion"), (10**9, "billion"), (10**6, "million"), (1000, "thousand")]
+ORDINAL_WORDS = {"one": "first", "two": "second", "three": "third", "five": "fifth", "eight": "eighth",
+                 "nine": "ninth", "twelve": "twelfth"}
+CURRENCY_NAMES = {"$": ("dollar", "cent"), "£": ("pound", "penny"), "€": ("euro", "cent")}
+MAX_SPOKEN_NUMBER = 10**15
+YEAR_RANGE = (1100, 2099)
+
+def number_to_words(n: int) -> str:
+    if n < 0:
+        return "minus " + number_to_words(-n)
+    if n < 20:
+        return ONES[n]
+    if n < 100:
+        tens, ones = divmod(n, 10)
+        return TENS[tens] + (f"-{ONES[ones]}" if ones else "")
+    if n < 1000:
+        hundreds, rest = divmod(n, 100)
+        return f"{ONES[hundreds]} hundred" + (f" {number_to_words(rest)}" if rest else "")
+    for scale, name in SCALES:
+        if n >= scale:
+            high, rest = divmod(n, scale)
+            return f"{number_to_words(high)} {name}" + (f" {number_to_words(rest)}" if rest else "")
+    return str(n)
+
+def ordinal_words(n: int) -> str:
+    words = number_to_words(n)
+    head, sep, last = words.rpartition(" ")
+    last_head, dash, last_word = last.rpartition("-")
+    if last_word in ORDINAL_WORDS:
+        last_word = ORDINAL_WORDS[last_word]
+    elif last_word.endswith("y"):
+        last_word = last_word[:-1] + "ieth"
+    else:
+        last_word += "th"
+    return f"{head}{sep}{last_head}{dash}{last_word}"
+
+def year_words(n: int) -> str:
+    """1999 -> "nineteen ninety-nine", 2005 -> "two thousand five", 2024 -> "twenty twenty-four"."""
+    high, low = divmod(n, 100)
+    if 2000 <= n < 2010 or n % 1000 == 0:
+        return number_to_words(n)
+    if low == 0:
+        return f"{number_to_words(high)} hundred"
+    return f"{number_to_words(high)} {'oh ' if low < 10 else ''}{number_to_words(low)}"
+
+def _expand_time(match: re.Match) -> str:
+    hours, minutes, meridiem = int(match.group(1)), int(match.group(2)), match.group(3)
+    if not minutes:
+        words = f"{number_to_words(hours)} o'clock" if not meridiem else number_to_words(hours)
+    else:
+        words = f"{number_to_words(hours)} {'oh ' if minutes < 10 else ''}{number_to_words(minutes)}"
+    return f"{words} {meridiem.upper()} M" if meridiem else words
+
+def _expand_number(match: re.Match) -> str:
+    digits = match.group("number").replace(",", "")
+    if len(digits) > 1 and digits.startswith("0") or int(digits) >= MAX_SPOKEN_NUMBER:
+        return " ".join(ONES[int(d)] for d in digits)  # Codes and IDs read digit by digit
+    value = int(digits)
+    decimal = match.group("decimal")
+    currency = match.group("currency")
+    suffix = (match.group("suffix") or "").lower()
+
+    if currency and decimal and len(decimal) == 2 and not suffix:
+        unit, minor = CURRENCY_NAMES[currency]
+        words = f"{number_to_words(value)} {unit}" + ("" if value == 1 else "s")
+        cents = int(decimal)
+        if cents:
+            minor = minor if cents == 1 else ("pence" if minor == "penny" else minor + "s")
+            words += f" {number_to_words(cents)} {minor}"
+        return words
+
+    if match.group("ordinal") and not decimal:
+        return ordinal_words(value)
+    plain = not (decimal or suffix or currency or match.group("percent"))
+    if plain and len(digits) == 4 and "," not in match.group("number") and YEAR_RANGE[0] <= value <= YEAR_RANGE[1]:
+        words = year_words(value)  # Four bare digits in this range are nearly always a year (or a GPU)
+    else:
+        words = number_to_words(value)
+    if decimal:
+        words += " point " + " ".join(ONES[int(d)] for d in decimal)
+    if suffix:
+        words += " thousand" if suffix == "k" else " million"
+    if match.group("percent"):
+        words += " percent"
+    if currency:
+        name = CURRENCY_NAMES[currency][0]
+        words += f" {name}" + ("" if value == 1 and not decimal and not suffix else "s")
+    if match.string[match.end():match.end() + 1].isalpha():
+        words += " "  # "5m" reads "five m", not "fivem"
+    return words
+
+def _expand_version(match: re.Match) -> str:
+    return " point ".join(number_to_words(int(part)) for part in match.group(0).split("."))
+
+def _collapse_url(match: re.Match) -> str:
+    host = match.group(1).lower()
+    host = host[4:] if host.startswith("www.") else host
+    return f" a {host.replace('.', ' dot ')} link "
+
+def _split_name(name: str) -> str:
+    return CAMEL_PATTERN.sub(" ", SNAKE_PATTERN.sub(" ", name))
+
+class TextNormalizer:
+    """
+    Rewrites LLM/chat text into something Piper reads naturally: emoji and emotes
+    removed, URLs collapsed to their site, @user_names split into words, common
+    abbreviations and numbers spelled out. Every rule is compiled once and
+    normalized lines are kept in an LRU cache, since replies and alerts repeat.
+    """
+
+    def __init__(self, emotes: Iterable[str] = DEFAULT_EMOTES, abbreviations: Optional[dict] = None, cache_size: int = 1024):
+        self.abbreviations = {k.lower(): v for k, v in (abbreviations or ABBREVIATIONS).items()}
+        emote_words = sorted(set(emotes), key=len, reverse=True)
+        # Only whole whitespace-separated tokens (trailing punctuation aside), never part of a word
+        self.emote_pattern = re.compile(
+            r'(?<!\S)(?:' + "|".join(map(re.escape, emote_words)) + r')(?=[,.!?]*(?:\s|$))'
+        ) if emote_words else None
+        abbreviation_words = sorted(self.abbreviations, key=len, reverse=True)
+        self.abbreviation_pattern = re.compile(
+            r'(?<![\w/.])(?:' + "|".join(map(re.escape, abbreviation_words)) + r')(?![\w/])',
+            re.IGNORECASE
+        )
+        self.normalize = lru_cache(maxsize=cache_size)(self._normalize)
+
+    def __call__(self, text: str) -> str:
+        return self.normalize(text) if text else ""
+
+    def _normalize(self, text: str) -> str:
+        text = URL_PATTERN.sub(_collapse_url, text)
+        if not text.isascii():  # Most lines are plain ASCII; skip the slower Unicode-property pass
+            text = EMOJI_PATTERN.sub(" ", text)
+        text = COLON_EMOTE_PATTERN.sub(" ", text)
+        if self.emote_pattern:
+            text = self.emote_pattern.sub(" ", text)
+        text = MENTION_PATTERN.sub(lambda m: _split_name(m.group(1)), text)
+        text = SNAKE_PATTERN.sub(" ", text)
+        text = MARKUP_PATTERN.sub("", text)
+        text = HASH_NUMBER_PATTERN.sub("number ", text)
+        text = self.abbreviation_pattern.sub(lambda m: self.abbreviations[m.group(0).lower()], text)
+        text = LETTER_DIGIT_PATTERN.sub(" ", text)
+        text = TIME_PATTERN.sub(_expand_time, text)
+        text = VERSION_PATTERN.sub(_expand_version, text)
+        text = NUMBER_PATTERN.sub(_expand_number, text)
+        text = REPEATED_LETTERS.sub(r'\1\1', text)
+        text = REPEATED_PUNCTUATION.sub(r'\1', text)
+        text = WHITESPACE.sub(" ", text).strip()
+        # Emote/emoji removal can leave " ," or " ." behind
+        return DANGLING_PUNCTUATION.sub(r'\1', SPACE_BEFORE_PUNCTUATION.sub(r'\1', text))
+
+    def cache_info(self):
+        return self.normalize.cache_info()
@@ -0,0 +1,133 @@
+"""
+Upload format benchmark for /respond and /ws/unity mic audio: encodes one clip as
+WAV, FLAC and Opus (Ogg and WebM) and reports the bytes on the wire, the server's
+decode cost through app.utils.audio_decode (fed in network-sized chunks, like a
+live upload), and what that adds up to on a few uplink speeds compared with WAV.
+
+With --url, each encoding is also POSTed to a running app as the raw request body
+and the client-side total and Server-Timing stages are reported.
+
+    python -m benchmarks.bench_audio_upload [--audio clip.wav] [--uplinks-mbps 1,5,20]
+        [--opus-kbps 16,24,32] [--url http://127.0.0.1:8000] [--runs 5]
+"""
+import argparse
+import asyncio
+import io
+import time
+import wave
+
+import av
+import numpy as np
+
+from app.utils.audio_decode import read_upload
+from benchmarks.bench_e2e import synthetic_clip
+
+CHUNK = 16 * 1024  # Roughly what arrives per read on a real upload
+
+
+def read_wav(data: bytes) -> tuple[np.ndarray, int]:
+    with wave.open(io.BytesIO(data)) as w:
+        if w.getsampwidth() != 2:
+            raise SystemExit("Only 16-bit WAV clips are supported.")
+        samples = np.frombuffer(w.readframes(w.getnframes()), dtype="<i2").reshape(-1, w.getnchannels())
+        return samples[:, 0].copy(), w.getframerate()
+
+
+def encode(samples: np.ndarray, rate: int, codec: str, container: str, bitrate: int = 0) -> bytes:
+    buffer = io.BytesIO()
+    with av.open(buffer, "w", format=container) as output:
+        stream = output.add_stream(codec, rate=rate)
+        stream.layout = "mono"
+        if bitrate:
+            stream.bit_rate = bitrate
+        frame_size = rate // 50  # 20 ms, which every encoder here accepts
+        for start in range(0, len(samples), frame_size):
+            block = samples[start:start + frame_size]
+            block = np.pad(block, (0, frame_size - len(block)))
+            frame = av.AudioFrame.from_ndarray(block.reshape(1, -1), format="s16", layout="mono")
+            frame.sample_rate = rate
+            for packet in stream.encode(frame):
+                output.mux(packet)
+        for packet in stream.encode(None):
+            output.mux(packet)
+    return buffer.getvalue()
+
+
+async def decode_seconds(data: bytes, content_type: str, runs: int) -> float:
+    async def chunks():
+        for start in range(0, len(data), CHUNK):
+            yield data[start:start + CHUNK]
+
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await read_upload(chunks(), content_type)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+async def post_live(url: str, data: bytes, content_type: str, runs: int) -> dict:
+    import aiohttp
+
+    totals, stages = [], {}
+    async with aiohttp.ClientSession() as session:
+        for _ in range(runs):
+            start = time.perf_counter()
+            async with session.post(f"{url}/respond", data=data, headers={"Content-Type": content_type}) as resp:
+                await resp.read()
+                if resp.status != 200:
+                    return {"error": resp.status}
+                totals.append(time.perf_counter() - start)
+                for metric in resp.headers.get("Server-Timing", "").split(","):
+                    name, _, duration = metric.strip().partition(";dur=")
+                    if name in ("upload", "whisper") and duration:
+                        stages.setdefault(name, []).append(float(duration))
+    return {"total_ms": float(np.median(totals)) * 1000, **{k: float(np.median(v)) for k, v in stages.items()}}
+
+
+async def main_async(args) -> None:
+    clip = open(args.audio, "rb").read() if args.audio else synthetic_clip(seconds=5.0)
+    samples, rate = read_wav(clip)
+    seconds = len(samples) / rate
+    # Opus only runs at 8/12/16/24/48 kHz; Unity mics and the synthetic clip are 16 kHz
+    opus_rate = rate if rate in (8000, 12000, 16000, 24000, 48000) else 48000
+
+    encodings = [("wav", "audio/wav", clip), ("flac", "audio/flac", encode(samples, rate, "flac", "flac"))]
+    for kbps in [int(k) for k in args.opus_kbps.split(",")]:
+        encodings.append((f"opus {kbps}k ogg", "audio/ogg", encode(samples, opus_rate, "libopus", "ogg", kbps * 1000)))
+    encodings.append((f"opus {kbps}k webm", "audio/webm", encode(samples, opus_rate, "libopus", "webm", kbps * 1000)))
+
+    uplinks = [float(u) for u in args.uplinks_mbps.split(",")]
+    wav_bytes = len(clip)
+    print(f"clip: {seconds:.1f}s at {rate} Hz, WAV {wav_bytes / 1024:.0f} KiB\n")
+    header = f"{'encoding':>16} {'KiB':>7} {'vs WAV':>7} {'decode ms':>9}" + "".join(f" {f'@{u:g} Mbps':>12}" for u in uplinks)
+    print(header + "   (upload + decode, change vs WAV)")
+    for name, content_type, data in encodings:
+        decode = await decode_seconds(data, content_type, args.runs)
+        line = f"{name:>16} {len(data) / 1024:>7.1f} {len(data) / wav_bytes:>7.1%} {decode * 1000:>9.1f}"
+        for uplink in uplinks:
+            wav_total = wav_bytes * 8 / (uplink * 1e6)
+            total = len(data) * 8 / (uplink * 1e6) + decode
+            line += f" {total * 1000:>6.0f} ({(total - wav_total) * 1000:+.0f})"
+        print(line)
+
+    if args.url:
+        print(f"\nlive /respond at {args.url} (median of {args.runs}):")
+        for name, content_type, data in encodings:
+            result = await post_live(args.url, data, content_type, args.runs)
+            print(f"{name:>16} " + "  ".join(f"{k} {v:.1f}" for k, v in result.items()))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--audio", help="16-bit WAV clip (default: 5 s of synthetic voiced audio)")
+    parser.add_argument("--uplinks-mbps", default="1,5,20")
+    parser.add_argument("--opus-kbps", default="16,24,32")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--url", help="Also POST each encoding to a running app, e.g. http://127.0.0.1:8000")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
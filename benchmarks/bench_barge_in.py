@@ -0,0 +1,164 @@
+"""
+Barge-in benchmark: a Unity client over /ws/unity sends a command, then presses
+push-to-talk (mic_start) while Penny is still answering, either while the LLM is
+still streaming ("llm") or once her audio has started ("audio"). Reports how long
+the cancel frame takes to arrive, how much of the old reply's audio still reaches
+the client after it, and the work the app reports as saved on /metrics/turns
+(LLM tokens not generated, Piper processes killed and their CPU time, queued
+frames discarded). OpenAI and Piper are the local fakes.
+
+    python -m benchmarks.bench_barge_in [--phases llm,audio] [--runs 10]
+        [--llm-first-token-ms 300] [--llm-token-ms 40] [--settle-ms 500]
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import aiohttp
+import numpy as np
+import websockets
+
+from app.core.unity_protocol import AUDIO, CONTROL, EVENT, control_frame, decode, encode_binary, event_frame
+from benchmarks.bench_e2e import REPO, RESULTS_DIR, AppProcess, current_commit, install_fake_piper, percentiles
+from benchmarks.fakes.openai_server import FakeOpenAIServer
+
+LONG_REPLY = " ".join(["Oh, you want the long version? Fine."] * 12)
+
+
+async def full_turn(ws_url: str, timeout: float) -> None:
+    """One uninterrupted reply, so the app has averages to estimate savings from."""
+    async with websockets.connect(ws_url, max_size=None) as ws:
+        await ws.send(encode_binary(event_frame("command", text="Warm up.")))
+        while True:
+            frame = decode(await asyncio.wait_for(ws.recv(), timeout))
+            if (frame.kind == AUDIO and frame.header.get("final")) or frame.type == "error":
+                return
+
+
+async def barge_in(ws_url: str, phase: str, llm_wait: float, settle: float, timeout: float) -> dict:
+    async with websockets.connect(ws_url, max_size=None) as ws:
+        await ws.send(encode_binary(control_frame("hello")))
+        while decode(await ws.recv()).type != "welcome":
+            pass
+        await ws.send(encode_binary(event_frame("command", text="Tell me everything about the speedrun.")))
+
+        utterance_id = None
+        if phase == "llm":
+            await asyncio.sleep(llm_wait)
+        else:
+            while True:
+                frame = decode(await asyncio.wait_for(ws.recv(), timeout))
+                if frame.kind == EVENT and frame.type == "reply":
+                    utterance_id = frame.header.get("utterance_id")
+                elif frame.kind == AUDIO and utterance_id:
+                    break
+
+        pressed = time.perf_counter()
+        await ws.send(encode_binary(control_frame("mic_start")))
+        cancelled_at = None
+        leaked_audio = 0  # Audio frames of the old reply that still arrived after its cancel frame
+        deadline = pressed + timeout
+        while time.perf_counter() < deadline:
+            wait = (cancelled_at + settle if cancelled_at else deadline) - time.perf_counter()
+            try:
+                frame = decode(await asyncio.wait_for(ws.recv(), max(0.0, wait)))
+            except asyncio.TimeoutError:
+                break
+            if frame.kind == CONTROL and frame.type == "cancel" and cancelled_at is None:
+                cancelled_at = time.perf_counter()
+            elif frame.kind == EVENT and frame.type == "reply":
+                utterance_id = frame.header.get("utterance_id")
+            elif frame.kind == AUDIO and cancelled_at and frame.header.get("utterance_id") == utterance_id:
+                leaked_audio += 1
+        await ws.send(encode_binary(control_frame("mic_end")))
+        return {"cancel_seconds": cancelled_at - pressed if cancelled_at else None, "leaked_audio_frames": leaked_audio}
+
+
+async def main_async(args) -> dict:
+    openai = await FakeOpenAIServer(
+        first_token_latency=args.llm_first_token_ms / 1000, token_latency=args.llm_token_ms / 1000, reply=LONG_REPLY
+    ).start()
+    results: dict = {}
+    try:
+        with tempfile.TemporaryDirectory(prefix="penny-barge-in-") as workdir:
+            piper, voice = install_fake_piper(Path(workdir))
+            env = {
+                **os.environ,
+                "PYTHONPATH": os.pathsep.join(filter(None, [str(REPO), os.environ.get("PYTHONPATH")])),
+                "OPENAI_API_KEY": "sk-bench",
+                "OPENAI_BASE_URL": openai.base_url,
+                "PIPER_PATH": str(piper),
+                "PIPER_VOICE_MODEL": str(voice),
+                "FAKE_PIPER_RTF": str(args.piper_rtf),
+                "WHISPER_MODEL": args.whisper_model,
+                "TWITCH_CLIENT_ID": "",
+                "TWITCH_BROADCASTER_ID": "",
+            }
+            app = AppProcess(env, cwd=workdir)
+            ws_url = app.base_url.replace("http://", "ws://") + "/ws/unity?protocol=binary"
+            try:
+                async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=args.timeout)) as session:
+                    await app.start(session)
+                    await full_turn(ws_url, args.timeout)
+                    print(f"{'phase':>6} {'cancel p50 ms':>13} {'p95 ms':>8} {'leaked frames':>13}  saved (from /metrics/turns)")
+                    for phase in [p.strip() for p in args.phases.split(",") if p.strip()]:
+                        async with session.get(f"{app.base_url}/metrics/turns") as resp:
+                            before = (await resp.json())["counters"]
+                        tokens_before, aborted_before = openai.tokens_streamed, openai.aborted
+                        runs = [
+                            await barge_in(ws_url, phase, args.llm_wait_ms / 1000, args.settle_ms / 1000, args.timeout)
+                            for _ in range(args.runs)
+                        ]
+                        async with session.get(f"{app.base_url}/metrics/turns") as resp:
+                            after = (await resp.json())["counters"]
+                        saved = {k: round(v - before.get(k, 0), 3) for k, v in after.items() if v != before.get(k, 0)}
+                        cancels = [r["cancel_seconds"] for r in runs if r["cancel_seconds"] is not None]
+                        results[phase] = {
+                            "cancel": percentiles(cancels),
+                            "missed_cancels": len(runs) - len(cancels),
+                            "leaked_audio_frames": int(np.sum([r["leaked_audio_frames"] for r in runs])),
+                            "saved": saved,
+                            # What the fake OpenAI actually sent, against replies that would all have run to the end
+                            "openai_tokens_streamed": openai.tokens_streamed - tokens_before,
+                            "openai_tokens_uninterrupted": len(LONG_REPLY.split(" ")) * args.runs,
+                            "openai_streams_aborted": openai.aborted - aborted_before,
+                        }
+                        r = results[phase]
+                        print(f"{phase:>6} {r['cancel'].get('p50_ms', 0):>13.1f} {r['cancel'].get('p95_ms', 0):>8.1f} "
+                              f"{r['leaked_audio_frames']:>13}  " + ", ".join(f"{k} {v:g}" for k, v in saved.items()))
+                        print(f"{'':>6} OpenAI streamed {r['openai_tokens_streamed']} of {r['openai_tokens_uninterrupted']} tokens "
+                              f"({r['openai_streams_aborted']} streams aborted)")
+            finally:
+                app.stop()
+    finally:
+        await openai.stop()
+
+    return {"commit": current_commit(), "config": vars(args), "results": results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--phases", default="llm,audio", help="When to barge in: during the LLM stream, or once audio has started")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--llm-first-token-ms", type=float, default=300.0)
+    parser.add_argument("--llm-token-ms", type=float, default=40.0)
+    parser.add_argument("--llm-wait-ms", type=float, default=600.0, help="Command-to-mic_start delay in the llm phase")
+    parser.add_argument("--piper-rtf", type=float, default=0.5)
+    parser.add_argument("--settle-ms", type=float, default=500.0, help="How long to keep listening after the cancel frame")
+    parser.add_argument("--whisper-model", default="tiny.en")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    output = RESULTS_DIR / f"barge-in-{report['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
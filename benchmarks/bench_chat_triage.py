@@ -0,0 +1,134 @@
+"""
+Chat triage under a big-channel firehose: classification throughput versus the old
+per-message shlex + substring checks, then a paced run at --rate msgs/sec through
+ChatTriage and a dispatcher honouring the global cooldown.
+
+    python -m benchmarks.bench_chat_triage [--rate 10000] [--seconds 5]
+"""
+import argparse
+import asyncio
+import random
+import shlex
+import time
+
+from app.core.events import TwitchMessageEvent
+from app.services.chat_triage import ChatTriage
+from app.utils.helpers import should_respond_to_penny_mention
+
+BOT = "penny"
+FILLER = ["LUL", "KEKW", "gg", "that was insane", "chat is this real", "first time here!", "Pog", "no way",
+          "what game is this", "lmao", "F", "o7", "this song slaps", "who else is watching from work", "W"]
+ACTIONABLE = ["!ask what's your favourite food", "!so @cool_streamer", "!search speedrun world record",
+              "hey penny how are you?", "@penny do you like cats", "penny what do you think?", "!penny tell a joke"]
+IGNORED_COMMANDS = ["!discord", "!lurk", "!uptime", "!followage"]
+
+
+def make_chat(n: int, users: int, actionable_rate: float) -> list[TwitchMessageEvent]:
+    messages = []
+    for _ in range(n):
+        r = random.random()
+        if r < actionable_rate:
+            text = random.choice(ACTIONABLE)
+        elif r < actionable_rate + 0.03:
+            text = random.choice(IGNORED_COMMANDS)
+        else:
+            text = " ".join(random.choices(FILLER, k=random.randint(1, 4)))
+        messages.append(TwitchMessageEvent(username=f"user{random.randrange(users)}", message=text))
+    return messages
+
+
+def old_triage(event: TwitchMessageEvent, prefix: str = "!") -> bool:
+    """The previous handle_twitch_message checks, minus the actual handling."""
+    message_content = event.message.strip()
+    message_lower = message_content.lower()
+    if message_content.startswith(prefix):
+        try:
+            parts = shlex.split(message_content)
+        except ValueError:
+            return False
+        return parts[0][len(prefix):].lower() in {"so", "shoutout", "search", "ask", "penny"}
+    if BOT in message_lower or f"@{BOT}" in message_lower:
+        return True
+    return should_respond_to_penny_mention(message_content)
+
+
+def throughput(name: str, fn, messages) -> None:
+    start = time.perf_counter()
+    hits = sum(1 for m in messages if fn(m))
+    elapsed = time.perf_counter() - start
+    print(f"{name:>16}: {len(messages) / elapsed:11,.0f} msg/s  ({elapsed / len(messages) * 1e6:5.2f} us/msg), {hits:,} flagged")
+
+
+async def paced_run(triage: ChatTriage, messages, rate: int) -> None:
+    """Feeds messages in 10 ms batches at `rate` msg/s while a dispatcher drains the queue."""
+    dispatched, waits = [], []
+    done = asyncio.Event()
+    ready = asyncio.Event()
+
+    async def dispatcher():
+        while not (done.is_set() and not len(triage)):
+            await ready.wait()
+            delay = triage.next_ready_in()
+            if delay:
+                await asyncio.sleep(delay)
+            item = triage.pop()
+            if item is None:
+                if not len(triage):
+                    ready.clear()
+                    if done.is_set():
+                        return
+                continue
+            waits.append(time.monotonic() - item.enqueued_at)
+            dispatched.append(item)
+
+    task = asyncio.create_task(dispatcher())
+    batch = max(1, rate // 100)
+    busy = 0.0
+    start = time.perf_counter()
+    for i in range(0, len(messages), batch):
+        t0 = time.perf_counter()
+        for event in messages[i:i + batch]:
+            if triage.offer(event):
+                ready.set()
+        busy += time.perf_counter() - t0
+        target = start + (i + batch) / rate
+        await asyncio.sleep(max(0.0, target - time.perf_counter()))
+    wall = time.perf_counter() - start
+    done.set()
+    ready.set()
+    task.cancel()
+
+    stats = triage.stats
+    print(f"paced {rate:,} msg/s for {wall:.1f}s: triage busy {busy / wall:.1%} of the loop, "
+          f"{stats['actionable']:,} actionable, {stats['cooldown']:,} on user cooldown, "
+          f"{stats['dropped']:,} evicted from queue, {len(dispatched)} dispatched "
+          f"(global cooldown {triage.global_cooldown}s)")
+    if dispatched:
+        kinds = {}
+        for item in dispatched:
+            kinds[item.command or item.kind] = kinds.get(item.command or item.kind, 0) + 1
+        print(f"dispatched by kind: {kinds}, max queue wait {max(waits):.2f}s")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rate", type=int, default=10_000)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--users", type=int, default=5_000)
+    parser.add_argument("--actionable", type=float, default=0.02)
+    parser.add_argument("--global-cooldown", type=float, default=1.0)
+    args = parser.parse_args()
+    random.seed(3)
+
+    messages = make_chat(int(args.rate * args.seconds), args.users, args.actionable)
+    throughput("old checks", old_triage, messages)
+    matcher = ChatTriage(BOT).pattern
+    throughput("compiled matcher", lambda m: matcher.search(m.message), messages)
+    classify_only = ChatTriage(BOT, user_cooldown=0)
+    throughput("classify", lambda m: classify_only.classify(m) is not None, messages)
+
+    await paced_run(ChatTriage(BOT, global_cooldown=args.global_cooldown), messages, args.rate)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,77 @@
+"""
+Cold-start benchmark: spawns the app under uvicorn repeatedly and measures how long
+it takes to listen (first answer on /healthz) and to be ready (/readyz 200, i.e.
+Whisper loaded and warmed up, Piper warmed up, LLM client imported). The app's own
+breakdown from /readyz (import time and per-service start time) is averaged too.
+Piper is the local fake (benchmarks/fakes/piper.py); Whisper is the real model.
+
+    python -m benchmarks.bench_cold_start [--runs 5] [--whisper-model tiny.en] [--no-warmup]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+from collections import defaultdict
+from pathlib import Path
+
+import aiohttp
+import numpy as np
+
+from benchmarks.bench_e2e import REPO, AppProcess, current_commit, install_fake_piper
+
+
+async def cold_start(env: dict, cwd: str) -> AppProcess:
+    app = AppProcess(env, cwd=cwd)
+    try:
+        async with aiohttp.ClientSession() as session:
+            await app.start(session)
+    finally:
+        app.stop()
+    return app
+
+
+async def main_async(args) -> None:
+    with tempfile.TemporaryDirectory(prefix="penny-coldstart-") as workdir:
+        piper, voice = install_fake_piper(Path(workdir))
+        env = {
+            **os.environ,
+            "PYTHONPATH": os.pathsep.join(filter(None, [str(REPO), os.environ.get("PYTHONPATH")])),
+            "OPENAI_API_KEY": "sk-bench",
+            "PIPER_PATH": str(piper),
+            "PIPER_VOICE_MODEL": str(voice),
+            "WHISPER_MODEL": args.whisper_model,
+            "STARTUP_WARMUP": str(not args.no_warmup),
+            "TWITCH_CLIENT_ID": "",
+            "TWITCH_BROADCASTER_ID": "",
+        }
+
+        bind, ready = [], []
+        app_side = defaultdict(list)
+        for run in range(args.runs):
+            app = await cold_start(env, workdir)
+            bind.append(app.bind_seconds)
+            ready.append(app.startup_seconds)
+            app_side["imports"].append(app.readiness["import_seconds"])
+            app_side["services"].append(app.readiness["startup_seconds"])
+            for name, component in app.readiness["components"].items():
+                app_side[name].append(component["seconds"])
+            print(f"run {run + 1}: listening {app.bind_seconds:.2f}s, ready {app.startup_seconds:.2f}s")
+
+    print(f"\ncommit {current_commit()}, whisper {args.whisper_model}, warm-up {'off' if args.no_warmup else 'on'}, {args.runs} runs")
+    print(f"{'spawn -> listening':>22}: median {np.median(bind):.2f}s  max {max(bind):.2f}s")
+    print(f"{'spawn -> ready':>22}: median {np.median(ready):.2f}s  max {max(ready):.2f}s")
+    for name, seconds in sorted(app_side.items(), key=lambda item: -np.median(item[1])):
+        print(f"{name:>22}: median {np.median(seconds):.3f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--whisper-model", default="tiny.en")
+    parser.add_argument("--no-warmup", action="store_true", help="Skip the Whisper and Piper warm-up inferences")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Conversation memory benchmark: the cost of appending a turn to the on-disk
+conversation log (app/services/conversation_log.py), of building a prompt with the
+"story so far" block, and of resuming after a restart. Resuming reads the log
+backwards to the newest summary; it is compared with replaying every record,
+which is what a plain history file would need. The log is filled with synthetic
+turns, with a summary every --summary-every turns as the summarizer would write.
+
+    python -m benchmarks.bench_context [--turns 1000,10000,100000] [--summary-every 4] [--runs 5]
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from app.services.context_manager import ContextManager
+from app.services.conversation_log import ConversationLog
+
+STORY = "Mournian has been speedrunning all evening and Penny keeps claiming credit for every split. " * 10
+
+
+def fill(directory: str, turns: int, summary_every: int) -> float:
+    """Writes `turns` turns (and their summaries); returns the median append time in seconds."""
+    log = ConversationLog(directory)
+    timings = []
+    for i in range(turns):
+        start = time.perf_counter()
+        seq = log.append("turn", user=f"Chat line {i}: is this run going to PB or not?", penny=f"Reply {i}: obviously, thanks to me.")
+        timings.append(time.perf_counter() - start)
+        if summary_every and (i + 1) % summary_every == 0:
+            log.append("summary", text=STORY, through=seq - 5)  # The newest five stay in the prompt verbatim
+    log.close()
+    return float(np.median(timings))
+
+
+def replay(directory: str) -> int:
+    records = 0
+    for name in sorted(os.listdir(directory)):
+        with open(os.path.join(directory, name), "r", encoding="utf-8") as f:
+            for line in f:
+                json.loads(line)
+                records += 1
+    return records
+
+
+def median_seconds(fn, runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", default="1000,10000,100000")
+    parser.add_argument("--summary-every", type=int, default=4)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'turns':>8} {'log MiB':>8} {'append us':>9} {'resume ms':>9} {'replay ms':>9} {'prompt us':>9}")
+    for turns in [int(t) for t in args.turns.split(",")]:
+        with tempfile.TemporaryDirectory(prefix="penny-context-") as directory:
+            append = fill(directory, turns, args.summary_every)
+            size = sum(os.path.getsize(os.path.join(directory, n)) for n in os.listdir(directory))
+
+            def resume():
+                log = ConversationLog(directory)
+                ContextManager(max_history=5, log=log)
+                log.close()
+
+            log = ConversationLog(directory)
+            context = ContextManager(max_history=5, log=log)
+            prompt = median_seconds(lambda: context.build_prompt("what did I miss?"), args.runs * 100)
+            log.close()
+            print(f"{turns:>8} {size / 2**20:>8.1f} {append * 1e6:>9.1f} {median_seconds(resume, args.runs) * 1000:>9.2f} "
+                  f"{median_seconds(lambda: replay(directory), args.runs) * 1000:>9.1f} {prompt * 1e6:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,382 @@
+"""
+End-to-end load benchmark: the real FastAPI app, under uvicorn in a subprocess,
+against local fakes for OpenAI (benchmarks/fakes/openai_server.py), Piper
+(benchmarks/fakes/piper.py) and Twitch EventSub/Helix (benchmarks/fakes/eventsub_server.py),
+with a small faster-whisper model.
+
+Scenarios, each at increasing concurrency:
+  respond  POST /respond with a speech clip: time to first audio byte and to the whole reply
+  chat     a burst of chat mentions over EventSub: time from notification to the LLM request it causes
+  ws       Unity clients sending command turns over /ws/unity: time to reply text, first and last audio
+
+Throughput and p50/p95/p99 (ms) are written to benchmarks/results/e2e-<commit>.json;
+--baseline prints the change against an earlier run of the same scenarios.
+
+    python -m benchmarks.bench_e2e [--scenarios respond,chat,ws] [--concurrency 1,2,4,8]
+        [--requests 16] [--audio clip.wav] [--whisper-model tiny.en]
+        [--baseline benchmarks/results/e2e-<commit>.json]
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+import wave
+from collections import defaultdict
+from pathlib import Path
+
+import aiohttp
+import numpy as np
+import websockets
+
+from app.core.unity_protocol import AUDIO, EVENT, control_frame, decode, encode_binary, event_frame
+from benchmarks.fakes.eventsub_server import FakeEventSubServer
+from benchmarks.fakes.openai_server import FakeOpenAIServer
+
+REPO = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).parent / "results"
+BOT_NAME = "pennybot"
+HEADLINE = {"respond": "total", "chat": "to_llm", "ws": "first_audio"}
+
+
+def percentiles(seconds: list[float]) -> dict:
+    if not seconds:
+        return {"n": 0}
+    ms = np.array(seconds) * 1000
+    return {
+        "n": len(seconds),
+        "p50_ms": round(float(np.percentile(ms, 50)), 1),
+        "p95_ms": round(float(np.percentile(ms, 95)), 1),
+        "p99_ms": round(float(np.percentile(ms, 99)), 1),
+        "max_ms": round(float(ms.max()), 1),
+    }
+
+
+def current_commit() -> str:
+    try:
+        sha = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO, capture_output=True, text=True).stdout.strip()
+        return sha + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def synthetic_clip(seconds: float = 3.0, rate: int = 16000) -> bytes:
+    """A voiced-sounding 16 kHz WAV (harmonics with a syllable envelope) for when no --audio is given."""
+    t = np.arange(int(seconds * rate)) / rate
+    pitch = 140 + 30 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / rate
+    voice = sum(np.sin(k * phase) / k for k in range(1, 8))
+    envelope = np.clip(np.sin(2 * np.pi * 3.5 * t), 0, None)
+    samples = (voice * envelope * 6000).astype("<i2")
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def install_fake_piper(directory: Path) -> tuple[Path, Path]:
+    """Writes an executable wrapper around benchmarks/fakes/piper.py and a voice config; returns (piper, voice)."""
+    piper = directory / "piper"
+    piper.write_text(f"#!/bin/sh\nexec '{sys.executable}' '{REPO / 'benchmarks' / 'fakes' / 'piper.py'}' \"$@\"\n")
+    piper.chmod(0o755)
+    voice = directory / "voice.onnx"
+    Path(f"{voice}.json").write_text(json.dumps({"audio": {"sample_rate": 22050}}))
+    return piper, voice
+
+
+class AppProcess:
+    """The real app under uvicorn, configured through environment variables only."""
+
+    def __init__(self, env: dict, cwd: str, workers: int = 1):
+        self.env = env
+        self.cwd = cwd
+        self.workers = workers
+        self.port = free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        self.process = None
+        self.bind_seconds = 0.0  # Spawn to the first answer on /healthz
+        self.startup_seconds = 0.0  # Spawn to /readyz returning 200
+        self.readiness: dict = {}
+
+    async def start(self, session: aiohttp.ClientSession, timeout: float = 300.0):
+        start = time.perf_counter()
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(self.port),
+             "--log-level", "warning", "--workers", str(self.workers)],
+            cwd=self.cwd, env=self.env,
+        )
+        streak = 0  # Each probe lands on whichever worker accepts it, so wait until several in a row are ready
+        while time.perf_counter() - start < timeout:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"App exited during startup with code {self.process.returncode}")
+            try:
+                async with session.get(f"{self.base_url}/readyz") as resp:
+                    self.bind_seconds = self.bind_seconds or time.perf_counter() - start
+                    self.readiness = await resp.json()
+                    streak = streak + 1 if resp.status == 200 else 0
+                    if streak >= 2 * self.workers - 1:
+                        self.startup_seconds = time.perf_counter() - start
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.02)
+        raise TimeoutError(f"App did not become ready: {self.readiness}")
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+async def run_respond(session: aiohttp.ClientSession, base_url: str, clip: bytes, concurrency: int, requests: int) -> dict:
+    first_audio, total, stages = [], [], defaultdict(list)
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            form = aiohttp.FormData()
+            form.add_field("audio", clip, filename="clip.wav", content_type="audio/wav")
+            start = time.perf_counter()
+            try:
+                async with session.post(f"{base_url}/respond", data=form) as resp:
+                    if resp.status != 200 or not resp.content_type.startswith("audio/"):
+                        errors += 1
+                        await resp.read()
+                        continue
+                    received = 0
+                    async for chunk in resp.content.iter_any():
+                        if not received and len(chunk) > 44:  # Past the WAV header
+                            first_audio.append(time.perf_counter() - start)
+                        received += len(chunk)
+                    total.append(time.perf_counter() - start)
+                    for metric in resp.headers.get("Server-Timing", "").split(","):
+                        name, _, duration = metric.strip().partition(";dur=")
+                        if duration:
+                            stages[name].append(float(duration))
+            except aiohttp.ClientError:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - start
+    return {
+        "throughput_rps": round(len(total) / wall, 2),
+        "first_audio": percentiles(first_audio),
+        "total": percentiles(total),
+        "errors": errors,
+        "server_timing_p50_ms": {name: round(float(np.median(values)), 1) for name, values in stages.items()},
+    }
+
+
+async def run_chat(eventsub: FakeEventSubServer, openai: FakeOpenAIServer, burst: int, timeout: float) -> dict:
+    """Sends `burst` mentions from distinct viewers at once and times each to its LLM request."""
+    seen_before = len(openai.requests)
+    sent = {}
+    run = uuid.uuid4().hex[:6]
+    for i in range(burst):
+        tag = f"q{run}x{i}"
+        sent[tag] = time.perf_counter()
+        await eventsub.notify("channel.chat.message", {
+            "broadcaster_user_id": "1000",
+            "chatter_user_id": str(5000 + i),
+            "chatter_user_login": f"viewer{run}{i}",
+            "chatter_user_name": f"Viewer{run}{i}",
+            "message_id": uuid.uuid4().hex,
+            "message": {"text": f"@{BOT_NAME} what do you think about {tag}?", "fragments": []},
+            "badges": [],
+        })
+
+    deadline = time.perf_counter() + timeout
+    latencies = {}
+    while time.perf_counter() < deadline and len(latencies) < burst:
+        for arrived, content in openai.requests[seen_before:]:
+            for tag, sent_at in sent.items():
+                if tag not in latencies and tag in content:
+                    latencies[tag] = arrived - sent_at
+        await asyncio.sleep(0.05)
+    wall = max(latencies.values()) if latencies else timeout
+    return {
+        "sent": burst,
+        "answered": len(latencies),
+        "throughput_rps": round(len(latencies) / wall, 2) if latencies else 0.0,
+        "to_llm": percentiles(list(latencies.values())),
+    }
+
+
+async def run_ws(base_url: str, clients: int, timeout: float) -> dict:
+    reply, first_audio, last_audio = [], [], []
+    errors = 0
+    ws_url = base_url.replace("http://", "ws://") + "/ws/unity?protocol=binary"
+
+    async def client(i: int):
+        nonlocal errors
+        try:
+            async with websockets.connect(ws_url, max_size=None) as ws:
+                await ws.send(encode_binary(control_frame("hello")))
+                while decode(await ws.recv()).type != "welcome":
+                    pass
+                start = time.perf_counter()
+                await ws.send(encode_binary(event_frame("command", text=f"Client {i} wants to know what happens next.")))
+                utterance_id = None
+                while True:
+                    frame = decode(await asyncio.wait_for(ws.recv(), timeout))
+                    if frame.kind == EVENT and frame.type == "reply":
+                        utterance_id = frame.header.get("utterance_id")
+                        reply.append(time.perf_counter() - start)
+                    elif frame.kind == AUDIO and utterance_id and frame.header.get("utterance_id") == utterance_id:
+                        if frame.header.get("seq") == 0:
+                            first_audio.append(time.perf_counter() - start)
+                        if frame.header.get("final"):
+                            last_audio.append(time.perf_counter() - start)
+                            return
+                    elif frame.type == "error":
+                        errors += 1
+                        return
+        except (OSError, asyncio.TimeoutError, websockets.WebSocketException):
+            errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(clients)))
+    wall = time.perf_counter() - start
+    return {
+        "throughput_rps": round(len(last_audio) / wall, 2),
+        "reply": percentiles(reply),
+        "first_audio": percentiles(first_audio),
+        "last_audio": percentiles(last_audio),
+        "errors": errors,
+    }
+
+
+def print_result(scenario: str, concurrency: int, result: dict, baseline: dict):
+    metric = HEADLINE[scenario]
+    current = result.get(metric, {})
+    line = f"{scenario:>8} c={concurrency:<3} {result.get('throughput_rps', 0):7.2f}/s  {metric}"
+    line += f" p50 {current.get('p50_ms', 0):8.1f}  p95 {current.get('p95_ms', 0):8.1f}  p99 {current.get('p99_ms', 0):8.1f} ms"
+    if "errors" in result and result["errors"]:
+        line += f"  errors {result['errors']}"
+    if "answered" in result:
+        line += f"  answered {result['answered']}/{result['sent']}"
+    previous = baseline.get(scenario, {}).get(str(concurrency), {}).get(metric, {})
+    if previous.get("p50_ms") and current.get("p50_ms"):
+        line += "  vs baseline: " + ", ".join(
+            f"{p} {(current[p] - previous[p]) / previous[p]:+.0%}" for p in ("p50_ms", "p95_ms") if previous.get(p)
+        )
+    print(line)
+
+
+async def main_async(args) -> dict:
+    clip = Path(args.audio).read_bytes() if args.audio else synthetic_clip()
+    concurrency_levels = [int(c) for c in args.concurrency.split(",")]
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    baseline = json.loads(Path(args.baseline).read_text())["results"] if args.baseline else {}
+
+    openai = await FakeOpenAIServer(first_token_latency=args.llm_first_token_ms / 1000, token_latency=args.llm_token_ms / 1000).start()
+    eventsub = await FakeEventSubServer(keepalive_seconds=30).start()
+    workdir = tempfile.TemporaryDirectory(prefix="penny-e2e-")
+    piper, voice = install_fake_piper(Path(workdir.name))
+
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(filter(None, [str(REPO), os.environ.get("PYTHONPATH")])),
+        "OPENAI_API_KEY": "sk-bench",
+        "OPENAI_BASE_URL": openai.base_url,
+        "PIPER_PATH": str(piper),
+        "PIPER_VOICE_MODEL": str(voice),
+        "FAKE_PIPER_STARTUP_MS": str(args.piper_startup_ms),
+        "FAKE_PIPER_RTF": str(args.piper_rtf),
+        "WHISPER_MODEL": args.whisper_model,
+        "TWITCH_CLIENT_ID": "bench",
+        "TWITCH_CLIENT_SECRET": "bench",
+        "TWITCH_APP_ACCESS_TOKEN": "",
+        "TWITCH_BROADCASTER_ID": "1000",
+        "TWITCH_EVENTSUB_ENABLED": "true",
+        "TWITCH_CHAT_REPLIES_ENABLED": "true",  # The chat scenario needs mentions to reach the LLM
+        "TWITCH_NICKNAME": BOT_NAME,
+        "TWITCH_EVENTSUB_WS_URL": eventsub.ws_url,
+        "TWITCH_API_URL": eventsub.helix_url,
+        "TWITCH_OAUTH_URL": eventsub.token_url.rsplit("/", 1)[0],
+        "CHAT_GLOBAL_COOLDOWN_SECONDS": "0",  # Measure pipeline capacity, not the configured pacing
+    }
+    app = AppProcess(env, cwd=workdir.name)
+    results: dict = {}
+    try:
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=args.timeout)) as session:
+            await app.start(session)
+            print(f"app listening in {app.bind_seconds:.1f}s, ready in {app.startup_seconds:.1f}s (commit {current_commit()})")
+            if "chat" in scenarios:
+                await eventsub.wait_welcomed(timeout=30)
+            for scenario in scenarios:
+                results[scenario] = {}
+                for c in concurrency_levels:
+                    if scenario == "respond":
+                        result = await run_respond(session, app.base_url, clip, c, max(c, args.requests))
+                    elif scenario == "chat":
+                        result = await run_chat(eventsub, openai, c, args.timeout)
+                    elif scenario == "ws":
+                        result = await run_ws(app.base_url, c, args.timeout)
+                    else:
+                        raise SystemExit(f"Unknown scenario '{scenario}'")
+                    results[scenario][str(c)] = result
+                    print_result(scenario, c, result, baseline)
+    finally:
+        app.stop()
+        await eventsub.stop()
+        await openai.stop()
+        workdir.cleanup()
+
+    return {
+        "commit": current_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {k: v for k, v in vars(args).items() if k != "baseline"},
+        "bind_seconds": round(app.bind_seconds, 2),
+        "startup_seconds": round(app.startup_seconds, 2),
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenarios", default="respond,chat,ws")
+    parser.add_argument("--concurrency", default="1,2,4,8")
+    parser.add_argument("--requests", type=int, default=16, help="/respond requests per concurrency level")
+    parser.add_argument("--audio", help="WAV clip to send to /respond (default: synthetic voiced audio)")
+    parser.add_argument("--whisper-model", default="tiny.en")
+    parser.add_argument("--llm-first-token-ms", type=float, default=300.0)
+    parser.add_argument("--llm-token-ms", type=float, default=20.0)
+    parser.add_argument("--piper-startup-ms", type=float, default=150.0)
+    parser.add_argument("--piper-rtf", type=float, default=0.1)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--baseline", help="Earlier results JSON to compare against")
+    parser.add_argument("--output", help="Where to write results (default: benchmarks/results/e2e-<commit>.json)")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    output = Path(args.output) if args.output else RESULTS_DIR / f"e2e-{report['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Replays Twitch event bursts (gift bombs with their recipient subs, a sub wave,
+repeated cheers, a follow wave, a raid) through EventAggregator and counts the
+reaction jobs (one LLM call + one TTS job each) with and without aggregation.
+
+    python -m benchmarks.bench_event_aggregation [--speed 10] [--seconds-per-reaction 6]
+"""
+import argparse
+import asyncio
+import json
+import random
+from pathlib import Path
+
+from app.core.events import TwitchUserEvent
+from app.services.event_aggregator import EventAggregator
+from app.services.eventsub_ingest import map_notification
+
+FIXTURES = Path(__file__).parent / "fixtures" / "eventsub_notifications.json"
+
+
+def recorded(templates: dict, sub_type: str, **overrides) -> TwitchUserEvent:
+    event = dict(templates[sub_type]["payload"]["event"], **overrides)
+    return map_notification(sub_type, event)
+
+
+def make_timeline() -> list[tuple[float, TwitchUserEvent]]:
+    templates = {t["metadata"]["subscription_type"]: t for t in json.loads(FIXTURES.read_text())}
+    timeline = []
+
+    def gift_bomb(at: float, gifter: str, total: int):
+        timeline.append((at, recorded(templates, "channel.subscription.gift", user_name=gifter, total=total)))
+        for i in range(total):
+            timeline.append((at + 0.02 + i * 0.015, recorded(
+                templates, "channel.subscribe", user_name=f"lucky{gifter}{i}", is_gift=True)))
+
+    gift_bomb(0.0, "BigGifter", 50)
+    gift_bomb(14.0, "SmallGifter", 10)
+    for i in range(12):
+        timeline.append((0.2 + i * 0.5, recorded(templates, "channel.subscribe", user_name=f"newsub{i}")))
+    for i in range(4):
+        timeline.append((20.0 + i * 0.7, recorded(templates, "channel.subscription.message", user_name=f"resub{i}")))
+    for user in range(5):
+        start = random.uniform(2, 25)
+        for n in range(random.randint(3, 8)):
+            timeline.append((start + n * random.uniform(0.2, 1.5), recorded(
+                templates, "channel.cheer", user_name=f"cheerer{user}", bits=random.choice([100, 200, 500]))))
+    for i in range(20):
+        timeline.append((30.0 + i * 0.2, recorded(templates, "channel.follow", user_name=f"follower{i}")))
+    timeline.append((8.0, recorded(templates, "channel.raid")))
+    return sorted(timeline, key=lambda item: item[0])
+
+
+async def replay(timeline, speed: float, quiet: float, max_window: float) -> list[TwitchUserEvent]:
+    reactions = []
+
+    async def react(event: TwitchUserEvent):
+        reactions.append(event)
+
+    aggregator = EventAggregator(react, quiet_seconds=quiet / speed, max_seconds=max_window / speed)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    for at, event in timeline:
+        await asyncio.sleep(max(0.0, start + at / speed - loop.time()))
+        aggregator.add(event)
+    await asyncio.sleep((quiet + 0.5) / speed)
+    await aggregator.flush_all()
+    return reactions
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--speed", type=float, default=10.0, help="replay speed-up; windows are scaled with it")
+    parser.add_argument("--quiet", type=float, default=2.0)
+    parser.add_argument("--max-window", type=float, default=10.0)
+    parser.add_argument("--seconds-per-reaction", type=float, default=6.0,
+                        help="LLM + TTS + playback time per reaction, for the backlog estimate")
+    args = parser.parse_args()
+    random.seed(5)
+
+    timeline = make_timeline()
+    reactions = await replay(timeline, args.speed, args.quiet, args.max_window)
+    span = timeline[-1][0]
+    print(f"replayed {len(timeline)} events over {span:.0f}s "
+          f"(quiet {args.quiet}s, max window {args.max_window}s)")
+    print(f"  without aggregation: {len(timeline):3d} LLM calls + {len(timeline):3d} TTS jobs, "
+          f"backlog ~{len(timeline) * args.seconds_per_reaction / 60:.1f} min of speech")
+    print(f"  with aggregation:    {len(reactions):3d} LLM calls + {len(reactions):3d} TTS jobs, "
+          f"backlog ~{len(reactions) * args.seconds_per_reaction / 60:.1f} min of speech "
+          f"({1 - len(reactions) / len(timeline):.0%} saved)")
+    for event in reactions:
+        print(f"    {event.event_type:>6}: {event.details.get('summary') or event.username}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
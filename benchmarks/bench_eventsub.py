@@ -0,0 +1,117 @@
+"""
+Drives TwitchEventSubConduit against the local fake EventSub server: subscription
+bootstrap time (sequential vs concurrent), session_reconnect migration,
+keepalive-timeout detection and recovery after a dropped socket.
+
+    python -m benchmarks.bench_eventsub [--helix-latency 0.15]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+
+import aiohttp
+
+from app.services.twitch_eventsub_conduit import TwitchEventSubConduit, default_subscriptions
+from app.services import twitch_token_refresh
+from app.services.twitch_token_refresh import TwitchTokenProvider
+from benchmarks.fakes.eventsub_server import FakeEventSubServer
+
+
+class RecordingManager:
+    def __init__(self):
+        self.frames = []
+
+    async def broadcast_frame(self, frame, critical=False):
+        self.frames.append(frame)
+
+
+async def sequential_bootstrap(server: FakeEventSubServer, subscriptions):
+    """The previous subscribe_to_events: a new ClientSession and one POST at a time."""
+    async with aiohttp.ClientSession() as session:
+        for sub in subscriptions:
+            async with session.post(f"{server.helix_url}/eventsub/subscriptions", json=sub) as resp:
+                await resp.text()
+
+
+async def wait_for(predicate, timeout: float = 10.0):
+    deadline = time.perf_counter() + timeout
+    while not predicate():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("condition not met")
+        await asyncio.sleep(0.01)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--helix-latency", type=float, default=0.15)
+    parser.add_argument("--keepalive", type=int, default=2)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    twitch_token_refresh.SETTINGS_FILE = os.path.join(tempfile.mkdtemp(prefix="penny-eventsub-"), "settings.json")
+
+    server = await FakeEventSubServer(keepalive_seconds=args.keepalive, helix_latency=args.helix_latency).start()
+    subscriptions = default_subscriptions("1234")
+
+    start = time.perf_counter()
+    server.require_auth = False
+    await sequential_bootstrap(server, subscriptions)
+    sequential = time.perf_counter() - start
+    server.subscription_requests.clear()
+    server.require_auth = True
+
+    manager = RecordingManager()
+    tokens = TwitchTokenProvider("App", "TWITCH_APP_ACCESS_TOKEN", "TWITCH_APP_TOKEN_EXPIRES_AT",
+                                 env_path="/nonexistent", token_url=server.token_url)
+    await tokens.refresh()
+    conduit = TwitchEventSubConduit(manager, ws_url=server.ws_url, helix_url=server.helix_url,
+                                    subscriptions=subscriptions, tokens=tokens)
+    start = time.perf_counter()
+    await conduit.start()
+    await wait_for(lambda: conduit.connected)
+    concurrent = time.perf_counter() - start
+    print(f"bootstrap {len(subscriptions)} subs @ {args.helix_latency * 1000:.0f} ms: "
+          f"sequential {sequential * 1000:.0f} ms, conduit welcome+subscribe {concurrent * 1000:.0f} ms "
+          f"(max in flight {server.max_concurrent_subscribes})")
+
+    await server.notify("channel.cheer", {"type": "channel.cheer", "user_name": "viewer", "bits": 100})
+    await wait_for(lambda: len(manager.frames) == 1)
+
+    subs_before = len(server.subscription_requests)
+    start = time.perf_counter()
+    await server.request_reconnect()
+    await server.wait_welcomed()
+    await server.notify("channel.raid", {"type": "channel.raid", "user_name": "raider", "viewer_count": 12})
+    await wait_for(lambda: len(manager.frames) == 2)
+    print(f"session_reconnect: migrated and delivered next event in {(time.perf_counter() - start) * 1000:.0f} ms, "
+          f"re-subscribed {len(server.subscription_requests) - subs_before} subs")
+
+    await server.revoke("channel.cheer")
+    await wait_for(lambda: "channel.cheer" not in conduit.active_subscriptions)
+    print(f"revocation: active subscriptions now {len(conduit.active_subscriptions)}")
+
+    server.silent = True
+    start = time.perf_counter()
+    connections = server.connections
+    await wait_for(lambda: server.connections > connections, timeout=args.keepalive * 3 + 70)
+    server.silent = False
+    await wait_for(lambda: conduit.connected)
+    print(f"keepalive timeout: detected and reconnected after {time.perf_counter() - start:.1f}s "
+          f"(keepalive {args.keepalive}s + grace)")
+
+    start = time.perf_counter()
+    connections = server.connections
+    await server.drop()
+    await wait_for(lambda: server.connections > connections and conduit.connected, timeout=70)
+    print(f"dropped socket: reconnected with jittered backoff in {(time.perf_counter() - start) * 1000:.0f} ms, "
+          f"total reconnects {conduit.reconnects}")
+
+    await conduit.stop()
+    await tokens.stop()
+    await server.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,100 @@
+"""
+Raid shoutout storm against the fake Helix server: many concurrent shoutout lookups
+(user + channel) for a raid train of streamers, with and without the shared
+HelixClient (batching, TTL cache, rate-limit pacing).
+
+    python -m benchmarks.bench_helix [--lookups 500] [--streamers 60] [--rate-limit 30]
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+import aiohttp
+
+from app.services import twitch_token_refresh
+from app.services.helix_client import HelixClient
+from app.services.twitch_token_refresh import TwitchTokenProvider
+from benchmarks.fakes.eventsub_server import FakeEventSubServer
+
+
+async def naive_shoutout_lookup(server: FakeEventSubServer, login: str) -> None:
+    """One ClientSession and two requests per shoutout, like the per-call sessions before."""
+    async with aiohttp.ClientSession() as session:
+        async with session.get(f"{server.helix_url}/users", params={"login": login}) as resp:
+            user = (await resp.json())["data"]
+        if user:
+            async with session.get(f"{server.helix_url}/channels", params={"broadcaster_id": user[0]["id"]}) as resp:
+                await resp.json()
+
+
+async def client_shoutout_lookup(helix: HelixClient, login: str) -> None:
+    user = await helix.get_user(login=login)
+    if user:
+        await helix.get_channel(user["id"])
+
+
+async def storm(lookup, logins: list[str], spread: float) -> float:
+    """Fires the lookups spread over `spread` seconds, like chat spamming !so during a raid."""
+    async def delayed(login):
+        await asyncio.sleep(random.uniform(0, spread))
+        await lookup(login)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(delayed(login) for login in logins))
+    return time.perf_counter() - start
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lookups", type=int, default=500)
+    parser.add_argument("--streamers", type=int, default=60)
+    parser.add_argument("--spread", type=float, default=1.0)
+    parser.add_argument("--rate-limit", type=int, default=30, help="fake bucket size per 2s window")
+    args = parser.parse_args()
+    random.seed(11)
+    twitch_token_refresh.SETTINGS_FILE = os.path.join(tempfile.mkdtemp(prefix="penny-helix-"), "settings.json")
+
+    server = await FakeEventSubServer(helix_latency=0.02).start()
+    server.require_auth = False
+    server.rate_limit, server.rate_window = 100_000, 2.0
+    logins = [f"streamer{random.randrange(args.streamers)}" for _ in range(args.lookups)]
+    logins += [f"missing{i}" for i in range(5)]  # Typos
+
+    elapsed = await storm(lambda login: naive_shoutout_lookup(server, login), logins, args.spread)
+    print(f"{len(logins)} shoutout lookups, {args.streamers} distinct streamers")
+    print(f"  naive: {len(server.helix_requests):4d} Helix calls in {elapsed:.2f}s")
+
+    server.helix_requests.clear()
+    tokens = TwitchTokenProvider("App", "TWITCH_APP_ACCESS_TOKEN", "TWITCH_APP_TOKEN_EXPIRES_AT",
+                                 env_path="/nonexistent", token_url=server.token_url)
+    helix = HelixClient(tokens=tokens, base_url=server.helix_url)
+    elapsed = await storm(lambda login: client_shoutout_lookup(helix, login), logins, args.spread)
+    print(f"  client: {len(server.helix_requests):3d} Helix calls in {elapsed:.2f}s  {helix.stats()['user_cache']}")
+
+    server.helix_requests.clear()
+    elapsed = await storm(lambda login: client_shoutout_lookup(helix, login), logins, args.spread)
+    print(f"  client, warm cache: {len(server.helix_requests)} Helix calls in {elapsed:.2f}s")
+
+    # Pacing: distinct ids, no cache hits, against a tiny bucket
+    server.helix_requests.clear()
+    server.rate_limit, server.rate_limited = args.rate_limit, 0
+    server._bucket_reset = 0.0
+    paced = HelixClient(tokens=tokens, base_url=server.helix_url)
+    start = time.perf_counter()
+    results = await asyncio.gather(*(paced.request("GET", "users", params={"id": str(i)}) for i in range(args.rate_limit * 2)))
+    ok = sum(1 for status, _ in results if status == 200)
+    print(f"pacing: {len(results)} unbatched requests vs a {args.rate_limit}/2s bucket: {ok} ok, "
+          f"{server.rate_limited} 429s from server, {paced.bucket.waits} client-side waits, "
+          f"{time.perf_counter() - start:.1f}s")
+
+    await tokens.stop()
+    await server.stop()
+    from app.services.http_pool import HttpPool
+    await HttpPool.get_instance().close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,68 @@
+"""
+Local "was this said to Penny?" classifier: scoring cost per line at several batch
+sizes, and on a labelled set of streamer/collab lines the share of LLM calls it
+avoids versus the lines for Penny it would wrongly drop. Also fits the linear
+model on half of the set and evaluates it on the other half.
+
+    python -m benchmarks.bench_target_detection [--repeat 2000]
+"""
+import argparse
+import json
+import random
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.core.event_bus import EventBus
+from app.services.target_detection_service import TargetDetectionService, fit_linear_model
+
+FIXTURE = Path(__file__).parent / "fixtures" / "target_lines.json"
+
+
+def evaluate(detector: TargetDetectionService, lines: list[dict], label: str) -> None:
+    results = detector.classify([l["speaker"] for l in lines], [l["text"] for l in lines], now=1e9)
+    skipped = np.array([detector.should_skip(r) for r in results])
+    labels = np.array([l["label"] for l in lines], dtype=bool)
+    avoided = skipped.sum() / len(lines)
+    correct_skips = (skipped & ~labels).sum() / max(1, (~labels).sum())
+    dropped = (skipped & labels).sum()
+    accuracy = (np.array([r.is_targeted for r in results]) == labels).mean()
+    print(f"{label:>22}: accuracy {accuracy:5.1%}  LLM calls avoided {avoided:5.1%} "
+          f"({correct_skips:5.1%} of lines not for Penny)  lines for Penny dropped: {dropped}/{labels.sum()}")
+    for line, r, skip in zip(lines, results, skipped):
+        if skip and line["label"]:
+            print(f"{'':>24}dropped: {line['speaker']}: {line['text']}  ({r.reason})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+    lines = json.loads(FIXTURE.read_text(encoding="utf-8"))
+    detector = TargetDetectionService(EventBus(), streamer="Mournian", model_path="", log_path="")
+
+    for batch in (1, 32, 256):
+        speakers = [lines[i % len(lines)]["speaker"] for i in range(batch)]
+        texts = [lines[i % len(lines)]["text"] for i in range(batch)]
+        repeat = max(1, args.repeat // batch)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            detector.score(speakers, texts)
+        elapsed = time.perf_counter() - start
+        print(f"{'batch ' + str(batch):>22}: {elapsed / repeat / batch * 1e6:7.2f} us/line")
+    print()
+
+    evaluate(detector, lines, "hand-set weights")
+
+    random.seed(3)
+    shuffled = lines[:]
+    random.shuffle(shuffled)
+    train, test = shuffled[::2], shuffled[1::2]
+    X = detector.features([l["speaker"] for l in train], [l["text"] for l in train], now=1e9)
+    detector.weights, detector.bias = fit_linear_model(X, np.array([l["label"] for l in train]))
+    evaluate(detector, test, "trained (held-out half)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Exercises TwitchTokenProvider against the fake OAuth/Helix server: a burst of
+concurrent Helix calls all hitting 401 at once, get_token() throughput on the hot
+path, and the refresh timer firing ahead of expiry.
+
+    python -m benchmarks.bench_token_provider [--callers 200]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from app.services import twitch_token_refresh
+from app.services.twitch_token_refresh import TwitchTokenProvider
+from benchmarks.fakes.eventsub_server import FakeEventSubServer
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--callers", type=int, default=200)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="penny-tokens-")
+    twitch_token_refresh.SETTINGS_FILE = os.path.join(workdir, "settings.json")
+    server = await FakeEventSubServer().start()
+    server.token_latency = 0.1
+
+    provider = TwitchTokenProvider("App", "TWITCH_APP_ACCESS_TOKEN", "TWITCH_APP_TOKEN_EXPIRES_AT",
+                                   env_path=os.path.join(workdir, ".env"), token_url=server.token_url)
+    await provider.start()
+    print(f"start: {server.tokens_issued} token issued, expires in {provider.expires_in():.0f}s")
+
+    start = time.perf_counter()
+    for _ in range(100_000):
+        await provider.get_token()
+    print(f"get_token hot path: {(time.perf_counter() - start) / 100_000 * 1e6:.2f} us/call, "
+          f"{server.tokens_issued} tokens issued")
+
+    server.revoke_tokens()
+    issued = server.tokens_issued
+    url = f"{server.helix_url}/eventsub/subscriptions"
+    start = time.perf_counter()
+    results = await asyncio.gather(*(
+        provider.request("POST", url, json={"type": "channel.cheer", "version": "1"}) for _ in range(args.callers)
+    ))
+    ok = sum(1 for status, _ in results if status == 202)
+    print(f"{args.callers} concurrent calls after revocation: {ok} succeeded after retry, "
+          f"{server.tokens_issued - issued} refresh(es) in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    server.token_expires_in = 2
+    provider.refresh_margin = 1.0
+    await provider.refresh()
+    issued = server.tokens_issued
+    await asyncio.sleep(1.5)
+    print(f"timer: token with 2s lifetime and 1s margin refreshed {server.tokens_issued - issued} time(s) "
+          f"within 1.5s, before any caller saw it expire")
+
+    await provider.stop()
+    with open(twitch_token_refresh.SETTINGS_FILE, encoding="utf-8") as f:
+        print(f"persisted: {f.read().strip()}")
+    await server.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,109 @@
+"""
+Compares the old pydub post-processing round-trip (decode WAV -> _spawn/set_frame_rate
+twice -> gain -> export) against the in-memory NumPy VoiceProcessor on Piper-like PCM.
+
+    python -m benchmarks.bench_tts_dsp [--speed 1.1] [--pitch -2] [--gain -3]
+
+pydub is only needed for the baseline; the NumPy path runs without it.
+"""
+import argparse
+import io
+import os
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+from app.utils.audio_dsp import VoiceProcessor
+
+PIPER_RATE = 22050
+# Short chat reaction, a typical reply, and a long (max_tokens-ish) monologue.
+DURATIONS_S = [2.0, 8.0, 30.0]
+
+
+def fake_speech(seconds: float, rate: int = PIPER_RATE) -> bytes:
+    """Deterministic speech-like PCM: a few formants under a syllable-rate envelope."""
+    t = np.arange(int(seconds * rate)) / rate
+    voice = sum(np.sin(2 * np.pi * f * t) / (i + 1) for i, f in enumerate((140, 520, 1480, 2600)))
+    envelope = 0.5 * (1 + np.sin(2 * np.pi * 4.0 * t)) ** 2
+    samples = 0.2 * voice * envelope / 4
+    return (samples * 32767).astype("<i2").tobytes()
+
+
+def write_wav(path: str, pcm: bytes, rate: int = PIPER_RATE) -> None:
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(pcm)
+
+
+def pydub_path(path: str, speed: float, pitch: float, gain_db: float) -> None:
+    from pydub import AudioSegment
+
+    audio = AudioSegment.from_wav(path)
+    if speed != 1.0:
+        audio = audio._spawn(audio.raw_data, overrides={"frame_rate": int(audio.frame_rate * speed)})
+        audio = audio.set_frame_rate(44100)
+    if pitch != 0.0:
+        audio = audio._spawn(audio.raw_data, overrides={"frame_rate": int(audio.frame_rate * (2.0 ** (pitch / 12.0)))})
+        audio = audio.set_frame_rate(44100)
+    if gain_db != 0.0:
+        audio = audio + gain_db
+    audio.export(path, format="wav")
+
+
+def numpy_path(processor: VoiceProcessor, pcm: bytes) -> None:
+    out = processor.process_pcm(pcm)
+    # The service still wraps the result in a WAV container; include that cost.
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(processor.output_rate)
+        wav.writeframes(out)
+
+
+def timeit(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--speed", type=float, default=1.1)
+    parser.add_argument("--pitch", type=float, default=-2.0)
+    parser.add_argument("--gain", type=float, default=-3.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    processor = VoiceProcessor(PIPER_RATE, 44100, args.speed, args.pitch, args.gain)
+    print(f"speed={args.speed} pitch={args.pitch}st gain={args.gain}dB  ratio={processor.up}/{processor.down}")
+    print(f"{'audio':>8} {'pydub ms':>10} {'numpy ms':>10} {'speedup':>8}")
+
+    for seconds in DURATIONS_S:
+        pcm = fake_speech(seconds)
+        numpy_ms = timeit(lambda: numpy_path(processor, pcm), args.repeat) * 1000
+
+        try:
+            fd, path = tempfile.mkstemp(suffix=".wav")
+            os.close(fd)
+
+            def run_pydub():
+                write_wav(path, pcm)
+                pydub_path(path, args.speed, args.pitch, args.gain)
+
+            pydub_ms = timeit(run_pydub, args.repeat) * 1000
+            os.unlink(path)
+            print(f"{seconds:>7.0f}s {pydub_ms:>10.1f} {numpy_ms:>10.1f} {pydub_ms / numpy_ms:>7.1f}x")
+        except ImportError:
+            print(f"{seconds:>7.0f}s {'n/a':>10} {numpy_ms:>10.1f} {'':>8}")
+
+
+if __name__ == "__main__":
+    main()
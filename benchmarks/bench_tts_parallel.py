@@ -0,0 +1,76 @@
+"""
+Wall-clock comparison of single-shot Piper synthesis against sentence-parallel
+synthesis (TTS_PARALLEL_SENTENCES) for a long reply.
+
+    python -m benchmarks.bench_tts_parallel --piper /path/to/piper --voice /path/to/voice.onnx
+
+Run it on the multi-core box that hosts the stream; on a single core the parallel
+mode can only overlap Piper's start-up, not its inference.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from app.core.config import settings
+from app.services.tts_service import TTSService
+from app.services.artifact_store import AudioArtifactStore
+from app.core.event_bus import EventBus
+
+# Roughly what a max_tokens=1000 rant from Penny looks like once the JSON is stripped.
+LONG_REPLY = " ".join([
+    "Oh, you want my opinion? How adorable.",
+    "Let me explain this slowly, because clearly nobody else in this chat has the attention span for it.",
+    "That boss fight was not hard, you simply walked into every single attack like it owed you money.",
+    "I watched you dodge left three times in a row while the giant glowing arrow pointed right.",
+    "Chat saw it. I saw it. Future historians will study it as a cautionary tale.",
+    "And before you say the controls were broken, no, they were not, I checked, twice, out of pure spite.",
+    "Anyway, I am obviously right, as usual, and you should thank me for the free coaching session.",
+    "Next time, try reading the screen before you press buttons at random.",
+] * 3)
+
+
+async def run(tts: TTSService, text: str) -> tuple[float, float, int]:
+    start = time.perf_counter()
+    first = None
+    size = 0
+    async for pcm in tts.stream_pcm(text):
+        if first is None:
+            first = time.perf_counter() - start
+        size += len(pcm)
+    return time.perf_counter() - start, first or 0.0, size
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--piper", default=settings.PIPER_PATH)
+    parser.add_argument("--voice", default=settings.PIPER_VOICE_MODEL)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    settings.PIPER_PATH = args.piper
+    settings.PIPER_VOICE_MODEL = args.voice
+    store = AudioArtifactStore(spill_dir=tempfile.mkdtemp(prefix="penny-bench-"))
+
+    settings.TTS_PARALLEL_SENTENCES = False
+    single = TTSService(EventBus(), settings, store)
+    settings.TTS_PARALLEL_SENTENCES = True
+    settings.TTS_PARALLEL_WORKERS = args.workers
+    parallel = TTSService(EventBus(), settings, store)
+
+    print(f"{len(LONG_REPLY)} chars, {args.workers} workers, cpu_count={os.cpu_count()}")
+    results = {}
+    for name, tts in (("single", single), ("parallel", parallel)):
+        runs = [await run(tts, LONG_REPLY) for _ in range(args.repeat)]
+        total, first, size = min(runs)
+        results[name] = total
+        audio_s = size / 2 / tts.sample_rate
+        print(f"{name:>9}: total {total * 1000:8.0f} ms  first audio {first * 1000:6.0f} ms  "
+              f"audio {audio_s:5.1f} s  RTF {total / audio_s:.3f}")
+    print(f"speedup: {results['single'] / results['parallel']:.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
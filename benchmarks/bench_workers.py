@@ -0,0 +1,148 @@
+"""
+Worker-count scaling benchmark for /respond: the app under `uvicorn --workers N`,
+either with Whisper loaded in every worker ("local") or with every worker sending
+audio to one shared inference server over its Unix socket ("shared",
+app/services/inference_server.py). Reports throughput, latency and the resident
+memory of the whole process tree (uvicorn master, workers and inference server),
+which is where a per-worker model shows up. OpenAI and Piper are the local fakes.
+
+    python -m benchmarks.bench_workers [--workers 1,2,4] [--modes local,shared]
+        [--concurrency 16] [--requests 64] [--whisper-model tiny.en] [--inference-workers 2]
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import aiohttp
+
+from app.services.inference_client import InferenceClient
+from benchmarks.bench_e2e import (
+    REPO, RESULTS_DIR, AppProcess, current_commit, install_fake_piper, run_respond, synthetic_clip,
+)
+from benchmarks.fakes.openai_server import FakeOpenAIServer
+
+
+def _children() -> dict[int, list[int]]:
+    children: dict[int, list[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name can contain spaces, so split after its closing parenthesis
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    return children
+
+
+def tree_rss_mb(*roots: int) -> float:
+    """Resident memory of the given processes and all their descendants (Linux /proc)."""
+    children = _children()
+    total_kb, pending = 0, list(roots)
+    while pending:
+        pid = pending.pop()
+        pending.extend(children.get(pid, []))
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                total_kb += next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+        except (OSError, StopIteration):
+            pass
+    return total_kb / 1024
+
+
+async def run_config(args, env: dict, workdir: str, clip: bytes, mode: str, workers: int) -> dict:
+    env = dict(env, WEB_CONCURRENCY=str(workers))  # So artifacts are shared between the workers
+    server = None
+    if mode == "shared":
+        socket_path = str(Path(workdir) / "inference.sock")
+        env["INFERENCE_SOCKET_PATH"] = socket_path
+        server = subprocess.Popen(
+            [sys.executable, "-m", "app.services.inference_server", "--socket", socket_path,
+             "--model", args.whisper_model, "--workers", str(args.inference_workers)],
+            cwd=workdir, env=env,
+        )
+        await InferenceClient(socket_path).wait_ready(timeout=300)
+
+    app = AppProcess(env, cwd=workdir, workers=workers)
+    try:
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=args.timeout)) as session:
+            await app.start(session)
+            await run_respond(session, app.base_url, clip, workers, workers)  # Let every worker serve once
+            result = await run_respond(session, app.base_url, clip, args.concurrency, args.requests)
+            result["rss_mb"] = round(tree_rss_mb(*(p.pid for p in (app.process, server) if p)), 1)
+            result["startup_seconds"] = round(app.startup_seconds, 2)
+            return result
+    finally:
+        app.stop()
+        if server:
+            server.terminate()
+            server.wait(timeout=15)
+
+
+async def main_async(args) -> dict:
+    clip = Path(args.audio).read_bytes() if args.audio else synthetic_clip()
+    openai = await FakeOpenAIServer(first_token_latency=args.llm_first_token_ms / 1000).start()
+    results: dict = {}
+    try:
+        with tempfile.TemporaryDirectory(prefix="penny-workers-") as workdir:
+            piper, voice = install_fake_piper(Path(workdir))
+            env = {
+                **os.environ,
+                "PYTHONPATH": os.pathsep.join(filter(None, [str(REPO), os.environ.get("PYTHONPATH")])),
+                "OPENAI_API_KEY": "sk-bench",
+                "OPENAI_BASE_URL": openai.base_url,
+                "PIPER_PATH": str(piper),
+                "PIPER_VOICE_MODEL": str(voice),
+                "WHISPER_MODEL": args.whisper_model,
+                "TWITCH_CLIENT_ID": "",
+                "TWITCH_BROADCASTER_ID": "",
+                "LOOP_WATCHDOG_ENABLED": "false",
+            }
+            print(f"{'mode':>6} {'workers':>7} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'whisper p50':>11} {'RSS MB':>8}")
+            for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+                for workers in [int(w) for w in args.workers.split(",")]:
+                    result = await run_config(args, env, workdir, clip, mode, workers)
+                    results.setdefault(mode, {})[str(workers)] = result
+                    whisper = result["server_timing_p50_ms"].get("whisper", 0.0)
+                    print(f"{mode:>6} {workers:>7} {result['throughput_rps']:>7.2f} {result['total'].get('p50_ms', 0):>8.1f} "
+                          f"{result['total'].get('p95_ms', 0):>8.1f} {whisper:>11.1f} {result['rss_mb']:>8.1f}"
+                          + (f"  errors {result['errors']}" if result["errors"] else ""))
+    finally:
+        await openai.stop()
+
+    return {
+        "commit": current_commit(),
+        "config": vars(args),
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--modes", default="local,shared")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--audio", help="WAV clip to send to /respond (default: synthetic voiced audio)")
+    parser.add_argument("--whisper-model", default="tiny.en")
+    parser.add_argument("--inference-workers", type=int, default=2, help="Concurrent transcriptions in the shared server")
+    parser.add_argument("--llm-first-token-ms", type=float, default=300.0)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    output = RESULTS_DIR / f"workers-{report['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
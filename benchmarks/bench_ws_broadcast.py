@@ -0,0 +1,112 @@
+"""
+Load test for WebSocketManager fan-out with hundreds of simulated clients, a few of
+which are slow or dead. Compares against the old one-await-per-client loop.
+
+    python -m benchmarks.bench_ws_broadcast [--clients 500] [--slow 5] [--messages 200]
+"""
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+
+from app.services.websocket_manager import WebSocketManager
+
+
+class FakeWebSocket:
+    def __init__(self, delay: float = 0.0, dead: bool = False):
+        self.delay = delay
+        self.dead = dead
+        self.received = 0
+        self.latencies = []
+
+    async def accept(self):
+        pass
+
+    async def close(self, code: int = 1000):
+        pass
+
+    async def send_text(self, data: str):
+        if self.dead:
+            raise ConnectionResetError("peer went away")
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.latencies.append(time.perf_counter() - float(data))
+        self.received += 1
+
+    send_bytes = send_text
+
+
+async def sequential_broadcast(clients, message: str):
+    """The previous WebSocketManager.broadcast: await each client in turn."""
+    for ws in clients:
+        try:
+            await ws.send_text(message)
+        except Exception:
+            pass
+
+
+def make_clients(n: int, slow: int, dead: int, slow_delay: float):
+    return ([FakeWebSocket(delay=slow_delay) for _ in range(slow)]
+            + [FakeWebSocket(dead=True) for _ in range(dead)]
+            + [FakeWebSocket() for _ in range(n - slow - dead)])
+
+
+def report(name: str, elapsed: float, fast_clients):
+    latencies = sorted(l for ws in fast_clients for l in ws.latencies)
+    p = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+    delivered = sum(ws.received for ws in fast_clients)
+    print(f"{name:>10}: {elapsed * 1000:8.1f} ms to publish, fast-client delivery "
+          f"p50 {p(0.5):7.2f} ms  p99 {p(0.99):7.2f} ms  mean {statistics.fmean(latencies) * 1000:7.2f} ms  "
+          f"({delivered} msgs)")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--slow", type=int, default=5)
+    parser.add_argument("--dead", type=int, default=5)
+    parser.add_argument("--slow-delay", type=float, default=0.05)
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--policy", default="drop_noncritical")
+    args = parser.parse_args()
+
+    print(f"{args.clients} clients ({args.slow} slow @ {args.slow_delay * 1000:.0f} ms/send, {args.dead} dead), "
+          f"{args.messages} messages")
+
+    # Sequential baseline: only a quarter of the messages, it is that slow
+    clients = make_clients(args.clients, args.slow, args.dead, args.slow_delay)
+    baseline_messages = max(1, args.messages // 4)
+    start = time.perf_counter()
+    for _ in range(baseline_messages):
+        await sequential_broadcast(clients, repr(time.perf_counter()))
+    report(f"seq x{baseline_messages}", time.perf_counter() - start, clients[args.slow + args.dead:])
+
+    clients = make_clients(args.clients, args.slow, args.dead, args.slow_delay)
+    logging.disable(logging.WARNING)  # one "send failed" line per dead client is just noise here
+    manager = WebSocketManager(max_queue=64, policy=args.policy)
+    for ws in clients:
+        await manager.connect(ws)
+    start = time.perf_counter()
+    for _ in range(args.messages):
+        await manager.broadcast(repr(time.perf_counter()))
+        await asyncio.sleep(0)  # let sender tasks run between messages, like real traffic
+    elapsed = time.perf_counter() - start
+    fast = clients[args.slow + args.dead:]
+    fast_ids = {manager._clients[ws].id for ws in fast}
+    while any(s["queue_depth"] for s in manager.stats() if s["id"] in fast_ids):
+        await asyncio.sleep(0.001)
+    report("queued", elapsed, fast)
+    fast_dropped = sum(s["dropped"] for s in manager.stats() if s["id"] in fast_ids)
+    print(f"fast-client drops: {fast_dropped}")
+
+    slow_stats = [s for s in manager.stats() if s["id"] not in fast_ids]
+    print(f"connected after run: {len(manager.active_connections)} "
+          f"(dead sockets removed: {args.clients - len(manager.active_connections)})")
+    if slow_stats:
+        print(f"slow clients: depth {slow_stats[0]['queue_depth']}, dropped {slow_stats[0]['dropped']}, "
+              f"avg send {slow_stats[0]['avg_send_ms']} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,208 @@
+"""
+Local stand-in for Twitch EventSub: a websocket server speaking the session_welcome /
+session_keepalive / notification / session_reconnect protocol, plus the Helix
+POST /eventsub/subscriptions endpoint, GET /users and /channels with Ratelimit-*
+headers, and a minimal /oauth2/token issuer. Used by the EventSub benchmarks to drive
+TwitchEventSubConduit without touching Twitch.
+"""
+import asyncio
+import json
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+
+import websockets
+from aiohttp import web
+
+
+def _metadata(message_type: str, subscription_type: Optional[str] = None) -> dict:
+    metadata = {
+        "message_id": uuid.uuid4().hex,
+        "message_type": message_type,
+        "message_timestamp": datetime.now(timezone.utc).isoformat(),
+    }
+    if subscription_type:
+        metadata["subscription_type"] = subscription_type
+        metadata["subscription_version"] = "1"
+    return metadata
+
+
+class FakeEventSubServer:
+    def __init__(self, keepalive_seconds: int = 10, helix_latency: float = 0.0, host: str = "127.0.0.1"):
+        self.host = host
+        self.keepalive_seconds = keepalive_seconds
+        self.helix_latency = helix_latency
+        self.token_expires_in = 3600
+        self.token_latency = 0.0
+        self.tokens_issued = 0
+        self.valid_tokens: set[str] = set()
+        self.require_auth = True
+        self.helix_requests: list[str] = []
+        self.rate_limit = 800
+        self.rate_window = 60.0
+        self.rate_limited = 0
+        self._bucket_remaining = self.rate_limit
+        self._bucket_reset = 0.0
+        self.session_id = uuid.uuid4().hex
+        self.silent = False
+        self.connections = 0
+        self.subscription_requests: list[dict] = []
+        self.max_concurrent_subscribes = 0
+        self._in_flight = 0
+        self._current = None
+        self._welcomed = asyncio.Event()
+        self._ws_server = None
+        self._helix_runner: Optional[web.AppRunner] = None
+        self.ws_url = ""
+        self.helix_url = ""
+        self.token_url = ""
+
+    async def start(self):
+        self._ws_server = await websockets.serve(self._handle, self.host, 0)
+        ws_port = self._ws_server.sockets[0].getsockname()[1]
+        self.ws_url = f"ws://{self.host}:{ws_port}/ws"
+
+        app = web.Application()
+        app.router.add_post("/helix/eventsub/subscriptions", self._subscribe)
+        app.router.add_post("/oauth2/token", self._issue_token)
+        app.router.add_get("/helix/users", self._users)
+        app.router.add_get("/helix/channels", self._channels)
+        self._helix_runner = web.AppRunner(app)
+        await self._helix_runner.setup()
+        site = web.TCPSite(self._helix_runner, self.host, 0)
+        await site.start()
+        helix_port = site._server.sockets[0].getsockname()[1]
+        self.helix_url = f"http://{self.host}:{helix_port}/helix"
+        self.token_url = f"http://{self.host}:{helix_port}/oauth2/token"
+        return self
+
+    async def stop(self):
+        if self._ws_server:
+            self._ws_server.close()
+            await self._ws_server.wait_closed()
+        if self._helix_runner:
+            await self._helix_runner.cleanup()
+
+    async def wait_welcomed(self, timeout: float = 5.0):
+        await asyncio.wait_for(self._welcomed.wait(), timeout)
+        self._welcomed.clear()
+
+    async def _handle(self, ws):
+        self.connections += 1
+        self._current = ws
+        await ws.send(json.dumps({
+            "metadata": _metadata("session_welcome"),
+            "payload": {"session": {
+                "id": self.session_id,
+                "status": "connected",
+                "keepalive_timeout_seconds": self.keepalive_seconds,
+                "reconnect_url": None,
+            }},
+        }))
+        self._welcomed.set()
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(ws.recv(), timeout=self.keepalive_seconds)
+                except asyncio.TimeoutError:
+                    if not self.silent and ws is self._current:
+                        await ws.send(json.dumps({"metadata": _metadata("session_keepalive"), "payload": {}}))
+        except websockets.ConnectionClosed:
+            pass
+
+    async def _issue_token(self, request: web.Request) -> web.Response:
+        await request.post()
+        if self.token_latency:
+            await asyncio.sleep(self.token_latency)
+        self.tokens_issued += 1
+        token = f"token-{self.tokens_issued}"
+        self.valid_tokens.add(token)
+        return web.json_response({"access_token": token, "expires_in": self.token_expires_in, "token_type": "bearer"})
+
+    def revoke_tokens(self):
+        """Invalidates every issued token, so the next Helix call gets a 401."""
+        self.valid_tokens.clear()
+
+    def _rate_limit_headers(self) -> tuple[bool, dict]:
+        now = time.time()
+        if now >= self._bucket_reset:
+            self._bucket_remaining = self.rate_limit
+            self._bucket_reset = now + self.rate_window
+        allowed = self._bucket_remaining > 0
+        if allowed:
+            self._bucket_remaining -= 1
+        else:
+            self.rate_limited += 1
+        return allowed, {
+            "Ratelimit-Limit": str(self.rate_limit),
+            "Ratelimit-Remaining": str(self._bucket_remaining),
+            "Ratelimit-Reset": str(int(self._bucket_reset) + 1),
+        }
+
+    async def _helix_get(self, request: web.Request, param: str, make) -> web.Response:
+        allowed, headers = self._rate_limit_headers()
+        if not allowed:
+            return web.json_response({"error": "Too Many Requests", "status": 429}, status=429, headers=headers)
+        self.helix_requests.append(str(request.rel_url))
+        if self.helix_latency:
+            await asyncio.sleep(self.helix_latency)
+        data = [make(value) for value in request.query.getall(param, []) if not value.startswith("missing")]
+        return web.json_response({"data": data}, headers=headers)
+
+    async def _users(self, request: web.Request) -> web.Response:
+        param = "login" if "login" in request.query else "id"
+        def make(value):
+            login = value if param == "login" else f"user{value}"
+            user_id = value if param == "id" else str(abs(hash(value)) % 10**8)
+            return {"id": user_id, "login": login, "display_name": login.title(), "description": f"{login} streams things."}
+        return await self._helix_get(request, param, make)
+
+    async def _channels(self, request: web.Request) -> web.Response:
+        def make(value):
+            return {"broadcaster_id": value, "broadcaster_login": f"user{value}", "game_name": "Just Chatting", "title": "raid train!"}
+        return await self._helix_get(request, "broadcaster_id", make)
+
+    async def _subscribe(self, request: web.Request) -> web.Response:
+        token = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        if self.require_auth and token not in self.valid_tokens:
+            return web.json_response({"error": "Unauthorized", "status": 401, "message": "Invalid OAuth token"}, status=401)
+        self._in_flight += 1
+        self.max_concurrent_subscribes = max(self.max_concurrent_subscribes, self._in_flight)
+        try:
+            body = await request.json()
+            if self.helix_latency:
+                await asyncio.sleep(self.helix_latency)
+            self.subscription_requests.append(body)
+            return web.json_response({"data": [{"id": uuid.uuid4().hex, "status": "enabled", **body}]}, status=202)
+        finally:
+            self._in_flight -= 1
+
+    async def notify(self, subscription_type: str, event: dict):
+        await self._current.send(json.dumps({
+            "metadata": _metadata("notification", subscription_type),
+            "payload": {"subscription": {"type": subscription_type}, "event": event},
+        }))
+
+    async def revoke(self, subscription_type: str, status: str = "authorization_revoked"):
+        await self._current.send(json.dumps({
+            "metadata": _metadata("revocation", subscription_type),
+            "payload": {"subscription": {"type": subscription_type, "status": status}},
+        }))
+
+    async def request_reconnect(self):
+        """Sends session_reconnect on the current socket; the client should move to a new one."""
+        await self._current.send(json.dumps({
+            "metadata": _metadata("session_reconnect"),
+            "payload": {"session": {
+                "id": self.session_id,
+                "status": "reconnecting",
+                "keepalive_timeout_seconds": None,
+                "reconnect_url": f"{self.ws_url}?reconnect={time.monotonic_ns()}",
+            }},
+        }))
+
+    async def drop(self):
+        """Closes the current socket abruptly, like a network failure."""
+        self.session_id = uuid.uuid4().hex
+        await self._current.close(code=4000)
@@ -0,0 +1,105 @@
+"""
+Local stand-in for the OpenAI chat completions API (POST /v1/chat/completions),
+plain and streamed (SSE). Latency is modelled as time to first token plus a
+per-token delay, so LLM cost can be dialled in without a network or an API key.
+Every request is recorded with its arrival time for the benchmarks to correlate.
+"""
+import asyncio
+import json
+import time
+import uuid
+from typing import Optional
+
+from aiohttp import web
+
+DEFAULT_REPLY = (
+    "Oh, wonderful, another question. The answer is obviously forty-two, "
+    "and frankly you should feel bad for asking."
+)
+
+
+class FakeOpenAIServer:
+    def __init__(self, first_token_latency: float = 0.3, token_latency: float = 0.02,
+                 reply: str = DEFAULT_REPLY, host: str = "127.0.0.1"):
+        self.host = host
+        self.first_token_latency = first_token_latency
+        self.token_latency = token_latency
+        self.reply = reply
+        self.requests: list[tuple[float, str]] = []  # (arrival perf_counter, last user message)
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.tokens_streamed = 0
+        self.aborted = 0
+        self.base_url = ""
+        self._runner: Optional[web.AppRunner] = None
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self._completions)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{self.host}:{port}/v1"
+        return self
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+    def _tokens(self) -> list[str]:
+        words = self.reply.split(" ")
+        return [w if i == 0 else " " + w for i, w in enumerate(words)]
+
+    def _completion(self, model: str, content: str) -> dict:
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": len(self._tokens()), "total_tokens": len(self._tokens())},
+        }
+
+    async def _completions(self, request: web.Request) -> web.StreamResponse:
+        arrived = time.perf_counter()
+        body = await request.json()
+        messages = body.get("messages") or [{}]
+        self.requests.append((arrived, str(messages[-1].get("content", ""))))
+        model = body.get("model", "gpt-4o")
+        tokens = self._tokens()
+
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.first_token_latency)
+            if not body.get("stream"):
+                await asyncio.sleep(self.token_latency * (len(tokens) - 1))
+                return web.json_response(self._completion(model, self.reply))
+
+            response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+            await response.prepare(request)
+            chunk_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+            for i, token in enumerate(tokens):
+                if i:
+                    await asyncio.sleep(self.token_latency)
+                chunk = {
+                    "id": chunk_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                    "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+                }
+                try:
+                    await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                except ConnectionResetError:
+                    self.aborted += 1  # Client closed the stream mid-reply (e.g. a barge-in)
+                    return response
+                self.tokens_streamed += 1
+            done = {
+                "id": chunk_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+            }
+            await response.write(f"data: {json.dumps(done)}\n\ndata: [DONE]\n\n".encode())
+            await response.write_eof()
+            return response
+        finally:
+            self.in_flight -= 1
@@ -0,0 +1,67 @@
+"""
+Stand-in for the Piper CLI: same arguments (--model <voice.onnx> --output_raw), reads
+text on stdin and writes deterministic int16 PCM to stdout. Each character becomes
+FAKE_PIPER_MS_PER_CHAR of tone whose pitch depends on the character. Output is paced
+by FAKE_PIPER_RTF (seconds of compute per second of audio) after a
+FAKE_PIPER_STARTUP_MS model-load delay, like a real voice on CPU.
+
+    echo "hello" | python benchmarks/fakes/piper.py --model voice.onnx --output_raw > out.raw
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from array import array
+
+CHUNK_SECONDS = 0.05
+
+
+def sample_rate(model: str) -> int:
+    try:
+        with open(f"{model}.json", "r", encoding="utf-8") as f:
+            return int(json.load(f).get("audio", {}).get("sample_rate", 22050))
+    except (OSError, ValueError):
+        return 22050
+
+
+def synthesize(text: str, rate: int, ms_per_char: float) -> array:
+    samples = array("h")
+    per_char = int(rate * ms_per_char / 1000)
+    for ch in text:
+        if ch.isspace():
+            samples.extend([0] * per_char)
+            continue
+        step = 2 * math.pi * (180 + (ord(ch) % 32) * 12) / rate
+        samples.extend(int(8000 * math.sin(step * i)) for i in range(per_char))
+    samples.extend([0] * int(rate * 0.2))  # Piper's trailing silence
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", "-m", required=True)
+    parser.add_argument("--output_raw", action="store_true")
+    parser.add_argument("--output_file", "-f")
+    args, _ = parser.parse_known_args()
+
+    startup = float(os.getenv("FAKE_PIPER_STARTUP_MS", "150")) / 1000
+    rtf = float(os.getenv("FAKE_PIPER_RTF", "0.1"))
+    ms_per_char = float(os.getenv("FAKE_PIPER_MS_PER_CHAR", "60"))
+
+    text = sys.stdin.read()
+    rate = sample_rate(args.model)
+    time.sleep(startup)
+    pcm = synthesize(text.strip(), rate, ms_per_char).tobytes()
+
+    out = sys.stdout.buffer
+    chunk = int(rate * CHUNK_SECONDS) * 2
+    for start in range(0, len(pcm), chunk):
+        time.sleep(CHUNK_SECONDS * rtf)
+        out.write(pcm[start:start + chunk])
+        out.flush()
+
+
+if __name__ == "__main__":
+    main()
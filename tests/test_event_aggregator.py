@@ -0,0 +1,25 @@
+import asyncio
+
+from app.core.events import TwitchUserEvent
+from app.services.event_aggregator import EventAggregator
+
+
+def test_sub_wave_merged_into_gift_does_not_count_as_recipients():
+    async def scenario():
+        summaries = []
+
+        async def on_flush(event):
+            summaries.append(event.details.get("summary"))
+
+        aggregator = EventAggregator(on_flush, quiet_seconds=60, max_seconds=60)
+        aggregator.add(TwitchUserEvent("sub", "a", {}))
+        aggregator.add(TwitchUserEvent("sub", "b", {}))
+        aggregator.add(TwitchUserEvent("gift", "Bob", {"count": 3}))
+        aggregator._flush(("sub",))  # The sub wave's quiet timer fires while the gift is open
+        for name in ("r1", "r2", "r3"):
+            aggregator.add(TwitchUserEvent("sub", name, {"is_gift": True}))
+        await asyncio.sleep(0)
+        assert summaries == ["Bob gifted 3 subs, 2 new subs"]
+        assert not aggregator._bursts
+
+    asyncio.run(scenario())
@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from app.core.events import TranscriptionAvailableEvent
+from app.services.target_detection_service import FEATURES, TargetDetectionService
+
+COLUMN = {name: i for i, name in enumerate(FEATURES)}
+
+
+class _Bus:
+    def subscribe_async(self, *args):
+        pass
+
+    def unsubscribe(self, *args):
+        pass
+
+    async def publish(self, event):
+        pass
+
+
+@pytest.fixture
+def service():
+    return TargetDetectionService(_Bus(), names=["penny"], streamer="streamer", skip_confidence=0.6, model_path="", log_path="")
+
+
+@pytest.mark.parametrize("text", ["Well, what do you think Penny", "Honestly, you are the best Penny", "So, Penny, any ideas?"])
+def test_discourse_marker_is_not_other_address(service, text):
+    row = service.features(["streamer"], [text], now=0.0)[0]
+    assert row[COLUMN["other_address"]] == 0.0
+    assert not service.should_skip(service.classify(["streamer"], [text], now=0.0)[0])
+
+
+@pytest.mark.parametrize("text", ["Dave, what do you think", "chat, look at this", "@someone you there?"])
+def test_other_address(service, text):
+    row = service.features(["streamer"], [text], now=0.0)[0]
+    assert row[COLUMN["other_address"]] == 1.0
+
+
+def test_bot_name_is_not_other_address(service):
+    row = service.features(["streamer"], ["Penny, what do you think"], now=0.0)[0]
+    assert row[COLUMN["other_address"]] == 0.0
+    assert row[COLUMN["vocative"]] == 1.0
+
+
+def test_it_is_not_about_penny(service):
+    text = "What is it, Penny?"
+    row = service.features(["streamer"], [text], now=0.0)[0]
+    assert row[COLUMN["about_penny"]] == 0.0
+    result = service.classify(["streamer"], [text], now=0.0)[0]
+    assert result.is_targeted
+
+
+def test_talking_about_penny(service):
+    row = service.features(["streamer"], ["Penny thinks she is funny"], now=0.0)[0]
+    assert row[COLUMN["about_penny"]] == 1.0
+    assert row[COLUMN["name"]] == 1.0
+
+
+def test_only_gated_transcripts_are_scored(service):
+    asyncio.run(service.handle_transcription(TranscriptionAvailableEvent(text="chat, look at this", query_llm=False)))
+    assert service.checked == 0
+    asyncio.run(service.handle_transcription(TranscriptionAvailableEvent(text="chat, look at this")))
+    assert service.checked == 1
@@ -0,0 +1,47 @@
+import pytest
+
+from app.utils.tts_text import DEFAULT_EMOTES, TextNormalizer
+
+
+@pytest.fixture
+def normalize():
+    return TextNormalizer()
+
+
+@pytest.mark.parametrize("text, spoken", [
+    ("Clueless as always", "Clueless as always"),
+    ("Aware of that? EZ.", "Aware of that? EZ."),
+    ("Clap for the streamer", "Clap for the streamer"),
+    ("great run Kappa", "great run"),
+    ("great run Kappa!", "great run!"),
+    ("notKappa", "notKappa"),
+])
+def test_emotes(normalize, text, spoken):
+    assert normalize(text) == spoken
+
+
+def test_extra_emotes_are_standalone_tokens_only():
+    normalize = TextNormalizer([*DEFAULT_EMOTES, "EZ"])
+    assert normalize("Aware of that? EZ.") == "Aware of that?"
+    assert normalize("EZPZ run") == "EZPZ run"
+
+
+@pytest.mark.parametrize("text, spoken", [
+    ("wait 5m", "wait five m"),
+    ("5M views", "five million views"),
+    ("10k subs", "ten thousand subs"),
+    ("Python 3.11.7 is out.", "Python three point eleven point seven is out."),
+    ("pi is 3.14", "pi is three point one four"),
+    ("$4.99 each", "four dollars ninety-nine cents each"),
+    ("RTX4090", "RTX four thousand ninety"),
+    ("GTA5", "GTA five"),
+    ("x2", "x two"),
+    ("10:30", "ten thirty"),
+    ("at 9:05pm", "at nine oh five P M"),
+    ("2024", "twenty twenty-four"),
+    ("since 1999", "since nineteen ninety-nine"),
+    ("2005", "two thousand five"),
+    ("1,500 viewers", "one thousand five hundred viewers"),
+])
+def test_numbers(normalize, text, spoken):
+    assert normalize(text) == spoken